@@ -1,31 +1,75 @@
 from __future__ import annotations
-from openai import OpenAI
-from dotenv import load_dotenv, find_dotenv
 import os
-import pathlib
-env_path = pathlib.Path(__file__).resolve().parents[1] / ".env"  # project_root/.env
-load_dotenv(find_dotenv())
-
+import asyncio
 import json
 import logging
 import random
+import re
+import threading
 import time
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List
 
 try:  # Support execution via ``python src/ai_engine.py`` and ``-m src.ai_engine``
-    from src.prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
+    from src.prompts import BATCH_USER_PROMPT_TEMPLATE, SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
 except ImportError:  # pragma: no cover - defensive import for script usage
-    from prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE  # type: ignore
+    from prompts import BATCH_USER_PROMPT_TEMPLATE, SYSTEM_PROMPT, USER_PROMPT_TEMPLATE  # type: ignore
 
 try:
     from src.validators import validate_output as schema_validate_output
 except ImportError:  # pragma: no cover - defensive import for script usage
     from validators import validate_output as schema_validate_output  # type: ignore
 
+try:
+    from src.circuit_breaker import CircuitOpenError, get_circuit_breaker
+    from src.dedupe import dedupe_stories as _dedupe_stories
+    from src.metrics import observe_stage, timed, timed_function
+    from src.rate_limiter import estimate_tokens, get_rate_limiter
+    from src.usage import empty_usage, record_response, split_usage
+    from src.response_cache import get_response_cache, make_key as make_cache_key
+except ImportError:  # pragma: no cover - defensive import for script usage
+    from circuit_breaker import CircuitOpenError, get_circuit_breaker  # type: ignore
+    from dedupe import dedupe_stories as _dedupe_stories  # type: ignore
+    from metrics import observe_stage, timed, timed_function  # type: ignore
+    from rate_limiter import estimate_tokens, get_rate_limiter  # type: ignore
+    from usage import empty_usage, record_response, split_usage  # type: ignore
+    from response_cache import get_response_cache, make_key as make_cache_key  # type: ignore
+
+try:
+    from src.config import Config
+except ImportError:  # pragma: no cover - defensive import for script usage
+    from config import Config  # type: ignore
+
+TEMPERATURE = 0.3
+
+# The OpenAI SDK is slow to import, so it is loaded on first use (never in
+# mock mode). Tests may set these directly.
+OpenAI: Any = None
+AsyncOpenAI: Any = None
+
 _client: OpenAI | None = None
+_client_lock = threading.Lock()
+
+def _load_openai() -> bool:
+    """Import the OpenAI SDK on first use; False if it is not installed."""
+
+    global OpenAI, AsyncOpenAI
+
+    if OpenAI is None or AsyncOpenAI is None:
+        try:
+            import openai
+        except ImportError:  # pragma: no cover - depends on the environment
+            return False
+        OpenAI = OpenAI or openai.OpenAI
+        AsyncOpenAI = AsyncOpenAI or openai.AsyncOpenAI
+    return True
+
 
 def _initialise_client() -> OpenAI | None:
-    """Create (or reuse) an OpenAI client when credentials are present."""
+    """Create (or reuse) an OpenAI client when credentials are present.
+
+    Safe to call from several worker threads at once: the client is built at
+    most once, under ``_client_lock``.
+    """
 
     global _client
 
@@ -33,16 +77,19 @@ def _initialise_client() -> OpenAI | None:
         return _client
 
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or OpenAI is None:
+    if not api_key or not _load_openai():
         logging.info("OpenAI client unavailable – running in mock mode.")
         return None
 
-    try:
-        _client = OpenAI(api_key=api_key)
-        logging.info("OpenAI client initialised successfully.")
-    except Exception as exc:  # pragma: no cover - depends on runtime environment
-        logging.warning("Failed to initialise OpenAI client: %s", exc)
-        _client = None
+    with _client_lock:
+        if _client is not None:  # another thread won the race
+            return _client
+        try:
+            _client = OpenAI(api_key=api_key)
+            logging.info("OpenAI client initialised successfully.")
+        except Exception as exc:  # pragma: no cover - depends on runtime environment
+            logging.warning("Failed to initialise OpenAI client: %s", exc)
+            _client = None
 
     return _client
 
@@ -53,6 +100,13 @@ def using_live_model() -> bool:
     return _initialise_client() is not None
 
 
+def model_name() -> str:
+    """Name of the model live requests are sent to (``OPENAI_MODEL``)."""
+
+    return _model_name()
+
+
+@timed_function("json_parse")
 def _safe_json_loads(text: str) -> Dict[str, Any]:
     """
     Try to parse JSON. If the model wrapped it in prose or code fences,
@@ -144,6 +198,7 @@ def _mock_user_stories(epic_text: str, epic_title: str | None) -> Dict[str, Any]
         "TestCases": tests,
     }
 
+@timed_function("normalise")
 def _normalise_user_stories(raw: Dict[str, Any], epic_title: str | None, epic_id: str | None, epic_description: str | None) -> Dict[str, Any]:
     """Normalise the response from the model (or mock) into schema-compliant JSON."""
 
@@ -232,48 +287,601 @@ def generate_user_stories(
     *,
     epic_id: str | None = None,
     epic_description: str | None = None,
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
     """Generate user stories and test cases for an epic.
 
     The return value always matches ``output.schema.json`` (a list element) so
     that downstream code can directly run schema validation.
+
+    Live responses are served from the response cache when an identical
+    request (model, prompts, temperature, epic text) was answered before;
+    pass ``use_cache=False`` to force a fresh model call.
     """
 
     client = _initialise_client()
     if client is None:
         logging.info("Using deterministic mock output for epic: %s", epic_title or epic_text)
-        raw = _mock_user_stories(epic_text, epic_title)
-        return _normalise_user_stories(raw, epic_title, epic_id, epic_description)
+        return _mock_result(epic_text, epic_title, epic_id, epic_description)
+
+    model = _model_name()
+    cache = get_response_cache() if use_cache else None
+    cache_key = _cache_key(model, epic_text) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logging.info("Response cache hit for epic: %s", epic_title or epic_text)
+            return _with_usage(_normalise_user_stories(cached, epic_title, epic_id, epic_description),
+                               empty_usage(model, cached=True))
+
+    with timed("prompt_build"):
+        prompt = USER_PROMPT_TEMPLATE.format(epic=epic_text)
+    usage = empty_usage(model)
+    try:
+        raw = _request_json(client, model, prompt, usage=usage)
+    except CircuitOpenError:
+        logging.info("Live model circuit open; using mock output for epic: %s", epic_title or epic_text)
+        return _mock_result(epic_text, epic_title, epic_id, epic_description, usage, fallback=True)
+    except Exception as exc:  # pragma: no cover - network dependent
+        logging.error("Falling back to mock output after OpenAI errors: %s", exc)
+        return _mock_result(epic_text, epic_title, epic_id, epic_description, usage, fallback=True)
+
+    return _finish_live_result(raw, cache, cache_key, epic_title, epic_id, epic_description, usage)
+
+
+# Helpers shared by the sync, batched and asyncio generation paths.
+def _model_name() -> str:
+    return os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+
+def _cache_key(model: str, epic_text: str) -> str:
+    return make_cache_key(
+        model=model,
+        prompt_template=USER_PROMPT_TEMPLATE,
+        system_prompt=SYSTEM_PROMPT,
+        temperature=TEMPERATURE,
+        epic_text=epic_text,
+    )
+
+
+def _completion_kwargs(model: str, prompt: str) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": TEMPERATURE,
+        "response_format": {"type": "json_object"},
+    }
+
+
+def _backoff_seconds(attempt: int) -> float:
+    return 0.6 * attempt + random.uniform(0, 0.2)
 
-    prompt = USER_PROMPT_TEMPLATE.format(epic=epic_text)
+
+def _with_usage(result: Dict[str, Any], usage: Dict[str, Any]) -> Dict[str, Any]:
+    result["usage"] = usage
+    return result
+
+
+def _mock_result(epic_text: str, epic_title: str | None, epic_id: str | None, epic_description: str | None, usage: Dict[str, Any] | None = None, fallback: bool = False) -> Dict[str, Any]:
+    # ``usage`` keeps any tokens already spent on failed live attempts, and
+    # ``fallback`` marks mock output that stands in for a failed live reply.
+    raw = _mock_user_stories(epic_text, epic_title)
+    result = _with_usage(_normalise_user_stories(raw, epic_title, epic_id, epic_description), usage or empty_usage())
+    if fallback:
+        result["fallback"] = True
+    return result
+
+
+def _finish_live_result(raw: Dict[str, Any], cache, cache_key: str | None, epic_title: str | None, epic_id: str | None, epic_description: str | None, usage: Dict[str, Any]) -> Dict[str, Any]:
+    raw.setdefault("UserStories", [])
+    raw.setdefault("TestCases", [])
+    if cache is not None:
+        cache.set(cache_key, raw)
+    return _with_usage(_normalise_user_stories(raw, epic_title, epic_id, epic_description), usage)
+
+
+def _request_json(client: OpenAI, model: str, prompt: str, usage: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Send one chat completion and parse its JSON body, retrying with backoff.
+
+    Every attempt first takes its turn on the shared rate limiter. A 429
+    waits for the provider's retry-after (applied to all callers through
+    the limiter) instead of the fixed backoff. Other failures count
+    towards the circuit breaker; once it opens, :class:`CircuitOpenError`
+    is raised straight away. Raises the last error once all attempts have
+    failed. Token usage of every completion is added to ``usage``.
+    """
+
+    breaker = get_circuit_breaker()
+    limiter = get_rate_limiter()
+    kwargs = _completion_kwargs(model, prompt)
+    estimate = estimate_tokens(prompt)
     last_error: Exception | None = None
 
     for attempt in range(1, 4):  # simple retry with backoff
+        probe = breaker is not None and breaker.check()
+        try:
+            if limiter is not None:
+                observe_stage("rate_limit_wait", limiter.acquire(estimate))
+            try:
+                with timed("model_call"):
+                    raw_api = getattr(client.chat.completions, "with_raw_response", None)
+                    if limiter is not None and raw_api is not None:
+                        raw_response = raw_api.create(**kwargs)
+                        limiter.observe(raw_response.headers)
+                        response = raw_response.parse()
+                    else:
+                        response = client.chat.completions.create(**kwargs)
+            except Exception as exc:  # pragma: no cover - network dependent
+                last_error = exc
+                logging.warning("OpenAI call failed (attempt %s): %s", attempt, exc)
+                if not _note_rate_limited(limiter, exc):
+                    _note_failure(breaker)
+                    time.sleep(_backoff_seconds(attempt))
+                continue
+
+            if breaker is not None:
+                breaker.record_success()
+        finally:
+            if probe:
+                # A 429 (or an interrupt) counts neither way; free the probe.
+                breaker.release_probe()
+        record_response(usage, response, model)
+        if limiter is not None:
+            limiter.settle(estimate, _total_tokens(response))
         try:
-            response = client.chat.completions.create(
-                model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"},
-            )
-
             content = response.choices[0].message.content
-            raw = _safe_json_loads(content)
-            raw.setdefault("UserStories", [])
-            raw.setdefault("TestCases", [])
-            return _normalise_user_stories(raw, epic_title, epic_id, epic_description)
+            return _safe_json_loads(content)
+        except Exception as exc:  # pragma: no cover - malformed reply, the model itself is up
+            last_error = exc
+            logging.warning("Unusable OpenAI reply (attempt %s): %s", attempt, exc)
+            time.sleep(_backoff_seconds(attempt))
+
+    raise last_error  # type: ignore[misc]
+
+
+def _total_tokens(response: Any) -> int | None:
+    usage = getattr(response, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return total if isinstance(total, int) else None
+
+
+def _note_failure(breaker) -> None:
+    if breaker is not None:
+        breaker.record_failure()
+
+
+def _note_rate_limited(limiter, exc: Exception) -> bool:
+    """Hand a 429 to the limiter, whose pause replaces the local backoff sleep."""
+    if limiter is None or getattr(exc, "status_code", None) != 429:
+        return False
+    limiter.on_rate_limited(getattr(getattr(exc, "response", None), "headers", None))
+    return True
+
+
+def _split_batch_response(raw: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Map ``epic_id`` -> per-epic payload from a batched model response.
+
+    Accepts ``{"Epics": {id: {...}}}``, ``{"Epics": [{"epic_id": id, ...}]}``
+    or the id mapping at the top level.
+    """
+
+    body = raw.get("Epics", raw.get("epics", raw)) if isinstance(raw, dict) else {}
+    if isinstance(body, list):
+        body = {str(item.get("epic_id")): item for item in body if isinstance(item, dict) and item.get("epic_id")}
+    if not isinstance(body, dict):
+        return {}
+    return {
+        str(key): value
+        for key, value in body.items()
+        if isinstance(value, dict) and ("UserStories" in value or "TestCases" in value)
+    }
+
+
+def generate_user_stories_batch(
+    epics: List[Dict[str, Any]],
+    *,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """Generate several epics with a single chat completion.
+
+    ``epics`` holds the keyword arguments of :func:`generate_user_stories`
+    (``epic_text``, ``epic_title``, ``epic_id``, ``epic_description``).
+    Results come back in input order. Epics already in the response cache
+    are served from it, and any epic missing from (or malformed in) the
+    batched response is generated on its own, so the output is always
+    complete. Mock mode and one-epic batches use the per-epic path.
+    """
+
+    client = _initialise_client()
+    if client is None or len(epics) <= 1:
+        return [generate_user_stories(**epic, use_cache=use_cache) for epic in epics]
+
+    model = _model_name()
+    cache = get_response_cache() if use_cache else None
+    results: List[Dict[str, Any] | None] = [None] * len(epics)
+    pending: Dict[str, int] = {}
+
+    for index, epic in enumerate(epics):
+        if cache is not None:
+            cached = cache.get(_cache_key(model, epic["epic_text"]))
+            if cached is not None:
+                results[index] = _with_usage(_normalise_user_stories(
+                    cached, epic.get("epic_title"), epic.get("epic_id"), epic.get("epic_description")),
+                    empty_usage(model, cached=True))
+                continue
+        key = str(epic.get("epic_id") or f"E{index + 1}")
+        while key in pending:  # keep keys unique even if ids repeat
+            key = f"{key}-{index + 1}"
+        pending[key] = index
+
+    by_id: Dict[str, Dict[str, Any]] = {}
+    batch_usage = empty_usage(model)
+    if len(pending) > 1:
+        with timed("prompt_build"):
+            listing = "\n".join(f"- [{key}] {epics[index]['epic_text']}" for key, index in pending.items())
+            prompt = BATCH_USER_PROMPT_TEMPLATE.format(epics=listing)
+        try:
+            by_id = _split_batch_response(_request_json(client, model, prompt, usage=batch_usage))
         except Exception as exc:  # pragma: no cover - network dependent
+            logging.warning("Batched OpenAI call failed, generating epics one by one: %s", exc)
+
+    # The batched call's tokens are shared among the epics it answered.
+    shares = iter(split_usage(batch_usage, sum(1 for key in pending if key in by_id)))
+    for key, index in pending.items():
+        epic = epics[index]
+        raw = by_id.get(key)
+        if raw is None:
+            logging.info("Epic %s missing from batched response – generating it individually.", key)
+            results[index] = generate_user_stories(**epic, use_cache=use_cache)
+            continue
+        # Cached per epic, so a later single or batched request is a hit.
+        results[index] = _finish_live_result(
+            raw, cache, _cache_key(model, epic["epic_text"]),
+            epic.get("epic_title"), epic.get("epic_id"), epic.get("epic_description"), next(shares))
+
+    return [r for r in results if r is not None]
+
+
+# ---------------------------------------------------------
+# Asyncio generation path
+#    - Same cache, normalisation and mock fallback as the sync path, but
+#      many in-flight model calls share one thread and event loop.
+# ---------------------------------------------------------
+_async_client: AsyncOpenAI | None = None
+
+
+def _initialise_async_client() -> AsyncOpenAI | None:
+    """Create (or reuse) an AsyncOpenAI client for callers with a long-lived loop."""
+
+    global _async_client
+
+    if _async_client is not None:
+        return _async_client
+    if _initialise_client() is None or AsyncOpenAI is None:
+        return None
+    with _client_lock:
+        if _async_client is None:
+            _async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _async_client
+
+
+async def _request_json_async(client: AsyncOpenAI, model: str, prompt: str, usage: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Async twin of :func:`_request_json`; waits with ``asyncio.sleep``."""
+
+    breaker = get_circuit_breaker()
+    limiter = get_rate_limiter()
+    kwargs = _completion_kwargs(model, prompt)
+    estimate = estimate_tokens(prompt)
+    last_error: Exception | None = None
+
+    for attempt in range(1, 4):
+        probe = breaker is not None and breaker.check()
+        try:
+            if limiter is not None:
+                observe_stage("rate_limit_wait", await limiter.acquire_async(estimate))
+            try:
+                with timed("model_call"):
+                    raw_api = getattr(client.chat.completions, "with_raw_response", None)
+                    if limiter is not None and raw_api is not None:
+                        raw_response = await raw_api.create(**kwargs)
+                        limiter.observe(raw_response.headers)
+                        response = raw_response.parse()
+                    else:
+                        response = await client.chat.completions.create(**kwargs)
+            except Exception as exc:  # pragma: no cover - network dependent
+                last_error = exc
+                logging.warning("Async OpenAI call failed (attempt %s): %s", attempt, exc)
+                if not _note_rate_limited(limiter, exc):
+                    _note_failure(breaker)
+                    await asyncio.sleep(_backoff_seconds(attempt))
+                continue
+
+            if breaker is not None:
+                breaker.record_success()
+        finally:
+            if probe:
+                # A 429 or a cancelled task counts neither way; free the probe.
+                breaker.release_probe()
+        record_response(usage, response, model)
+        if limiter is not None:
+            limiter.settle(estimate, _total_tokens(response))
+        try:
+            return _safe_json_loads(response.choices[0].message.content)
+        except Exception as exc:  # pragma: no cover - malformed reply, the model itself is up
             last_error = exc
-            sleep_time = 0.6 * attempt + random.uniform(0, 0.2)
-            logging.warning("OpenAI call failed (attempt %s): %s", attempt, exc)
-            time.sleep(sleep_time)
+            logging.warning("Unusable async OpenAI reply (attempt %s): %s", attempt, exc)
+            await asyncio.sleep(_backoff_seconds(attempt))
 
-    logging.error("Falling back to mock output after OpenAI errors: %s", last_error)
-    raw = _mock_user_stories(epic_text, epic_title)
-    return _normalise_user_stories(raw, epic_title, epic_id, epic_description)
+    raise last_error  # type: ignore[misc]
+
+
+async def generate_user_stories_async(
+    epic_text: str,
+    epic_title: str | None = None,
+    *,
+    epic_id: str | None = None,
+    epic_description: str | None = None,
+    use_cache: bool = True,
+    client: AsyncOpenAI | None = None,
+    semaphore: asyncio.Semaphore | None = None,
+) -> Dict[str, Any]:
+    """Asyncio version of :func:`generate_user_stories` with the same output.
+
+    ``semaphore`` bounds how many model calls are in flight at once; pass the
+    same one to every call that should share the limit.
+    """
+
+    client = client or _initialise_async_client()
+    if client is None:
+        logging.info("Using deterministic mock output for epic: %s", epic_title or epic_text)
+        return _mock_result(epic_text, epic_title, epic_id, epic_description)
+
+    model = _model_name()
+    cache = get_response_cache() if use_cache else None
+    cache_key = _cache_key(model, epic_text) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return _with_usage(_normalise_user_stories(cached, epic_title, epic_id, epic_description),
+                               empty_usage(model, cached=True))
+
+    with timed("prompt_build"):
+        prompt = USER_PROMPT_TEMPLATE.format(epic=epic_text)
+    usage = empty_usage(model)
+    try:
+        if semaphore is None:
+            raw = await _request_json_async(client, model, prompt, usage=usage)
+        else:
+            async with semaphore:
+                raw = await _request_json_async(client, model, prompt, usage=usage)
+    except CircuitOpenError:
+        logging.info("Live model circuit open; using mock output for epic: %s", epic_title or epic_text)
+        return _mock_result(epic_text, epic_title, epic_id, epic_description, usage, fallback=True)
+    except Exception as exc:  # pragma: no cover - network dependent
+        logging.error("Falling back to mock output after OpenAI errors: %s", exc)
+        return _mock_result(epic_text, epic_title, epic_id, epic_description, usage, fallback=True)
+
+    return _finish_live_result(raw, cache, cache_key, epic_title, epic_id, epic_description, usage)
+
+
+def generate_many(
+    epics: List[Dict[str, Any]],
+    *,
+    use_cache: bool = True,
+    max_concurrency: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Generate many epics concurrently from one thread, in input order.
+
+    ``epics`` holds :func:`generate_user_stories` keyword arguments. Runs its
+    own event loop, so call it from synchronous code (e.g. a Flask view),
+    not from inside a running loop.
+    """
+
+    if _initialise_client() is None:
+        return [generate_user_stories(**epic, use_cache=use_cache) for epic in epics]
+
+    limit = max_concurrency or Config.ASYNC_MAX_CONCURRENCY
+
+    async def _run() -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(max(1, limit))
+        # A client per loop: httpx connection pools cannot outlive their loop.
+        async with AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")) as client:
+            return list(await asyncio.gather(*(
+                generate_user_stories_async(**epic, use_cache=use_cache, client=client, semaphore=semaphore)
+                for epic in epics
+            )))
+
+    return asyncio.run(_run())
+
+
+# ---------------------------------------------------------
+# Streaming generation path (chat)
+#    - Yields the reply text as it arrives and each user story as soon
+#      as its JSON object is complete; the final, normalised result is
+#      always the last event and supersedes anything partial.
+# ---------------------------------------------------------
+STREAM_CHUNK_CHARS = 24  # size of the pieces mock and cached replies are replayed in
+
+
+class StoryStreamParser:
+    """Pulls complete objects out of the ``"UserStories"`` array of a partial JSON reply."""
+
+    _ARRAY_START = re.compile(r'"UserStories"\s*:\s*\[')
+
+    def __init__(self) -> None:
+        self.text = ""
+        self._pos = -1        # scan position inside the array (-1: not found yet)
+        self._depth = 0
+        self._start = 0
+        self._in_string = False
+        self._escaped = False
+        self._done = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.text += chunk
+        if self._done:
+            return []
+        if self._pos < 0:
+            match = self._ARRAY_START.search(self.text)
+            if match is None:
+                return []
+            self._pos = match.end()
+
+        stories: List[Dict[str, Any]] = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:  # closing bracket of the array itself
+                    self._done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        story = json.loads(text[self._start:i + 1])
+                    except ValueError:
+                        continue
+                    if isinstance(story, dict):
+                        stories.append(story)
+        self._pos = len(text)
+        return stories
+
+
+def _replay_events(text: str) -> Iterator[Dict[str, Any]]:
+    """Stream an already complete reply (mock or cached) in small pieces."""
+    parser = StoryStreamParser()
+    count = 0
+    for start in range(0, len(text), STREAM_CHUNK_CHARS):
+        piece = text[start:start + STREAM_CHUNK_CHARS]
+        yield {"type": "delta", "text": piece}
+        for story in parser.feed(piece):
+            yield {"type": "story", "index": count, "story": story}
+            count += 1
+
+
+def stream_user_stories(
+    epic_text: str,
+    epic_title: str | None = None,
+    *,
+    epic_id: str | None = None,
+    epic_description: str | None = None,
+    use_cache: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """Streaming form of :func:`generate_user_stories`.
+
+    Yields ``{"type": "delta", "text": ...}`` for each piece of the reply,
+    ``{"type": "story", "index": n, "story": {...}}`` as each user story
+    parses, and finally ``{"type": "result", "result": {...}}`` with the same
+    payload :func:`generate_user_stories` would return. Mock output and cache
+    hits are replayed through the same events. A streamed call is not
+    retried (its text has already been sent); if it fails, the final result
+    falls back to the mock output.
+    """
+
+    client = _initialise_client()
+    if client is None:
+        logging.info("Streaming deterministic mock output for epic: %s", epic_title or epic_text)
+        raw = _mock_user_stories(epic_text, epic_title)
+        yield from _replay_events(json.dumps(raw, ensure_ascii=False))
+        yield {"type": "result", "result": _with_usage(
+            _normalise_user_stories(raw, epic_title, epic_id, epic_description), empty_usage())}
+        return
+
+    model = _model_name()
+    cache = get_response_cache() if use_cache else None
+    cache_key = _cache_key(model, epic_text) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield from _replay_events(json.dumps(cached, ensure_ascii=False))
+            yield {"type": "result", "result": _with_usage(
+                _normalise_user_stories(cached, epic_title, epic_id, epic_description),
+                empty_usage(model, cached=True))}
+            return
+
+    with timed("prompt_build"):
+        prompt = USER_PROMPT_TEMPLATE.format(epic=epic_text)
+    usage = empty_usage(model)
+    breaker = get_circuit_breaker()
+    limiter = get_rate_limiter()
+    estimate = estimate_tokens(prompt)
+    parser = StoryStreamParser()
+    count = 0
+    probe = False
+    reserved = False
+    stream = None
+    try:
+        probe = breaker is not None and breaker.check()
+        if limiter is not None:
+            observe_stage("rate_limit_wait", limiter.acquire(estimate))
+            reserved = True
+        started = time.perf_counter()
+        first_token = True
+        stream = client.chat.completions.create(
+            **_completion_kwargs(model, prompt),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                record_response(usage, chunk, model)
+                if limiter is not None:
+                    limiter.settle(estimate, _total_tokens(chunk))
+                    reserved = False
+            choices = getattr(chunk, "choices", None) or []
+            piece = getattr(choices[0].delta, "content", None) if choices else None
+            if not piece:
+                continue
+            if first_token:
+                observe_stage("model_first_token", time.perf_counter() - started)
+                first_token = False
+            yield {"type": "delta", "text": piece}
+            for story in parser.feed(piece):
+                yield {"type": "story", "index": count, "story": story}
+                count += 1
+        observe_stage("model_call", time.perf_counter() - started)
+        if breaker is not None:
+            breaker.record_success()
+        raw = _safe_json_loads(parser.text)
+    except CircuitOpenError:
+        logging.info("Live model circuit open; using mock output for epic: %s", epic_title or epic_text)
+        yield {"type": "result", "result": _mock_result(epic_text, epic_title, epic_id, epic_description, usage, fallback=True)}
+        return
+    except Exception as exc:  # pragma: no cover - network dependent
+        logging.error("Falling back to mock output after a failed OpenAI stream: %s", exc)
+        if not _note_rate_limited(limiter, exc):
+            _note_failure(breaker)
+        yield {"type": "result", "result": _mock_result(epic_text, epic_title, epic_id, epic_description, usage, fallback=True)}
+        return
+    finally:
+        # Also runs when the consumer goes away mid-stream (GeneratorExit),
+        # which counts neither as a success nor as a failure of the model.
+        if probe:
+            breaker.release_probe()
+        if reserved:
+            # No usage chunk arrived; settle on the prompt plus what was streamed.
+            limiter.settle(estimate, estimate_tokens(prompt, len(parser.text) // 4))
+        if stream is not None and hasattr(stream, "close"):
+            stream.close()
+
+    yield {"type": "result", "result": _finish_live_result(
+        raw, cache, cache_key, epic_title, epic_id, epic_description, usage)}
 
 
 # ---------------------------------------------------------
@@ -295,8 +903,27 @@ def validate_output(data: Any) -> bool:
 # ---------------------------------------------------------
 # 6. Helper Function: post_process()
 #    - Removes duplicate epics and cleans data
+#    - Optionally merges near-duplicate stories across epics
 # ---------------------------------------------------------
-def post_process(all_outputs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def post_process(
+    all_outputs: Iterable[Dict[str, Any]],
+    *,
+    dedupe_stories: bool | None = None,
+    threshold: float | None = None,
+) -> List[Dict[str, Any]]:
+    return post_process_with_report(all_outputs, dedupe_stories=dedupe_stories, threshold=threshold)[0]
+
+def post_process_with_report(
+    all_outputs: Iterable[Dict[str, Any]],
+    *,
+    dedupe_stories: bool | None = None,
+    threshold: float | None = None,
+) -> tuple[List[Dict[str, Any]], Dict[str, Any] | None]:
+    """``post_process`` plus the story dedupe report (None when dedupe is off).
+
+    ``dedupe_stories`` defaults to ``Config.STORY_DEDUPE_ENABLED`` and
+    ``threshold`` to ``Config.STORY_DEDUPE_THRESHOLD``.
+    """
     seen: set[str] = set()
     cleaned: List[Dict[str, Any]] = []
     for epic_data in all_outputs:
@@ -310,7 +937,13 @@ def post_process(all_outputs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
             continue
         seen.add(key)
         cleaned.append(epic_data)
-    return cleaned
+
+    if dedupe_stories is None:
+        dedupe_stories = Config.STORY_DEDUPE_ENABLED
+    if not dedupe_stories:
+        return cleaned, None
+    cleaned, result = _dedupe_stories(cleaned, threshold)
+    return cleaned, result.to_dict()
 
 # ---------------------------------------------------------
 # Simulated Jira Integration (for demo)
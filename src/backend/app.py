@@ -1,13 +1,11 @@
 from __future__ import annotations
-from dotenv import load_dotenv, find_dotenv
 from pathlib import Path
-env_path = Path(__file__).resolve().parents[2] / ".env"
 import logging
 
-from flask import Flask
+from flask import Flask, g, request
 from flask_cors import CORS
 
-load_dotenv(find_dotenv())
+import src.config  # noqa: F401 - loads .env once for the whole process
 
 def create_app() -> Flask:
     here = Path(__file__).resolve().parent
@@ -28,17 +26,42 @@ def create_app() -> Flask:
     from src.backend.routes.epics import bp as epics_bp
     from src.backend.routes.ui import bp as ui_bp
     from src.backend.routes.chat import bp as chat_bp
+    from src.backend.routes.jobs import bp as jobs_bp
 
     app.register_blueprint(health_bp)  # /health
     app.register_blueprint(gen_bp, url_prefix="/api/generate")
     app.register_blueprint(exp_bp, url_prefix="/api/runs")
     app.register_blueprint(epics_bp, url_prefix="/api/epics")
     app.register_blueprint(chat_bp, url_prefix="/api/chat")
+    app.register_blueprint(jobs_bp, url_prefix="/api/jobs")
     app.register_blueprint(ui_bp)
 
+    _instrument(app)
     return app
 
 
+def _instrument(app: Flask) -> None:
+    """Count and time every request by route template and model mode for /metrics."""
+    import time
+
+    from src import metrics
+    from src.ai_engine import using_live_model
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        started = getattr(g, "_metrics_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            mode = "live" if using_live_model() else "mock"
+            metrics.HTTP_REQUESTS.inc(route, request.method, response.status_code, mode)
+            metrics.HTTP_SECONDS.observe(time.perf_counter() - started, route, mode)
+        return response
+
+
 if __name__ == "__main__":
     app = create_app()
     app.run(port=5000, debug=True)
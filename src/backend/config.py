@@ -1,7 +1,6 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+import src.config  # noqa: F401 - loads .env once for the whole process
 
 class Config:
     # App
@@ -21,5 +20,6 @@ class Config:
     
     # Limits
     MAX_EPICS_PER_REQUEST = int(os.getenv("MAX_EPICS_PER_REQUEST", 10))
+    GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", 4))
     REQUEST_TIMEOUT_SEC = int(os.getenv("REQUEST_TIMEOUT_SEC", 20))
     RETRY_COUNT = int(os.getenv("RETRY_COUNT", 2))
\ No newline at end of file
@@ -16,3 +16,5 @@ class GenerateRequest(BaseModel):
     project_name: str
     epics: List[EpicIn]
     constraints: Optional[Constraint] = None
+    dedupe_stories: Optional[bool] = None
+    dedupe_threshold: Optional[float] = None
@@ -1,8 +1,11 @@
 from __future__ import annotations
+import json
 from typing import Iterable, List
-from flask import Blueprint, jsonify, request, render_template
+from flask import Blueprint, Response, jsonify, request, render_template, stream_with_context
 from src import ai_engine
-from src.chat_agent import ChatMessage, EpicChatAgent
+from src.backend.services.chat_sessions import get_chat_sessions
+from src.chat_agent import ChatMessage
+from src.validators import validate_output
 
 bp = Blueprint("chat", __name__)  # no prefix here
 
@@ -21,16 +24,101 @@ def _load_history(messages: Iterable[dict]) -> List[ChatMessage]:
 
 @bp.post("")
 def chat_endpoint():
+    """
+    Expected payload:
+      {
+        "message": "Generate stories for ...",
+        "session_id": "..."    # optional; omitted or expired ids start a new session
+      }
+
+    The conversation is kept server-side, so the response carries only the
+    new reply and the session id to send with the next message.
+    """
     payload = request.get_json(silent=True) or {}
     message = str(payload.get("message") or "").strip()
     if not message:
         return jsonify({"error": "message_required", "message": "Please provide a prompt."}), 400
 
-    agent = EpicChatAgent(history=_load_history(payload.get("history")))
-    reply = agent.respond(message)
+    sessions = get_chat_sessions()
+    session, created = sessions.get_or_create(payload.get("session_id"))
+    with session.lock:
+        if created and payload.get("history"):
+            # Older clients still post the whole conversation; seed the session once.
+            session.agent.history = _load_history(payload.get("history"))
+        reply = session.agent.respond(message)
+        sessions.trim(session)
+        turns = len(session.agent.history) // 2
 
     return jsonify({
         "reply": reply.to_dict(),
-        "history": agent.serialise_history(),
+        "session_id": session.session_id,
+        "turns": turns,
         "mode": "openai" if ai_engine.using_live_model() else "mock",
     })
+
+@bp.post("/stream")
+def chat_stream():
+    """
+    Same payload as ``POST /api/chat``, answered as server-sent events:
+
+      event: delta   {"text": "..."}                 reply text as it arrives
+      event: story   {"index": 0, "story": {...}}    each user story once it parses
+      event: reply   {"reply": {...}, "session_id": "...", "turns": n,
+                      "mode": "...", "validation": {...}}
+
+    The ``reply`` event carries the final, schema-validated payload and
+    replaces any partial stories shown so far.
+    """
+    payload = request.get_json(silent=True) or {}
+    message = str(payload.get("message") or "").strip()
+    if not message:
+        return jsonify({"error": "message_required", "message": "Please provide a prompt."}), 400
+
+    sessions = get_chat_sessions()
+    session, created = sessions.get_or_create(payload.get("session_id"))
+    mode = "openai" if ai_engine.using_live_model() else "mock"
+
+    def _encode(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def _events():
+        # Held for the whole reply so messages in one session stay in order.
+        with session.lock:
+            if created and payload.get("history"):
+                session.agent.history = _load_history(payload.get("history"))
+            for event in session.agent.respond_stream(message):
+                kind = event.pop("type")
+                if kind != "reply":
+                    yield _encode(kind, event)
+                    continue
+                reply = event["reply"]
+                sessions.trim(session)
+                schema_passed, schema_errors = validate_output([reply.payload or {}], collect_all=True)
+                yield _encode("reply", {
+                    "reply": reply.to_dict(),
+                    "session_id": session.session_id,
+                    "turns": len(session.agent.history) // 2,
+                    "mode": mode,
+                    "validation": {"schema_passed": schema_passed, "errors": schema_errors},
+                })
+
+    return Response(
+        stream_with_context(_events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@bp.get("/sessions/<session_id>")
+def chat_history(session_id: str):
+    """The retained conversation, e.g. to redraw the chat after a page reload."""
+    session = get_chat_sessions().get(session_id)
+    if session is None:
+        return jsonify({"error": "session_not_found"}), 404
+    with session.lock:
+        history = session.agent.serialise_history()
+    return jsonify({"session_id": session_id, "history": history})
+
+@bp.delete("/sessions/<session_id>")
+def chat_reset(session_id: str):
+    get_chat_sessions().drop(session_id)
+    return "", 204
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from src.config import Config
-from src.backend.services.jira_api import JiraAPI
+from src.backend.services.jira_api import get_jira_client
 
 bp = Blueprint("epics", __name__)
 
@@ -14,7 +14,7 @@ def list_epics():
         return jsonify({"error": "Missing query param 'project'"}), 400
 
     try:
-        jira = JiraAPI()
+        jira = get_jira_client()
         epics = jira.search_epics(project_key=project, max_results=25)
         return jsonify({"project": project, "count": len(epics), "epics": epics})
     except Exception as e:
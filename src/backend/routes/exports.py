@@ -1,70 +1,175 @@
 # src/backend/routes/exports.py
-from flask import Blueprint, jsonify, Response
-import json, os, csv, io
+from flask import Blueprint, jsonify, Response, request
+import json, os, csv, time, itertools
 
-bp = Blueprint("exports", __name__)
+from src.backend.services.run_catalog import get_run_catalog
+from src.backend.services.runs import get_run_store
+from src.metrics import observe_stage, timed
 
-# Absolute path to runs_data (adjust if your folder is elsewhere)
-RUNS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "runs_data"))
+bp = Blueprint("exports", __name__)
 
 def _load_run(run_id: str):
     """
-    Load a saved run JSON from runs_data/<run_id>.json.
+    Load a saved run through the run store (cached after the first read).
     Returns (data, path). If missing, (None, path).
     """
-    path = os.path.join(RUNS_DIR, f"{run_id}.json")
-    if not os.path.exists(path):
-        return None, path
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f), path
+    store = get_run_store()
+    data = store.load(run_id)
+    path = store.path_for(run_id) or os.path.join(store.runs_dir, f"{run_id}.json")
+    return data, path
+
+SUMMARY_HEADER = ["Epic ID", "Story", "Test Case"]
+DETAILED_HEADER = [
+    "Epic ID", "Epic", "Story", "Story Description", "Given", "When", "Then", "Story Points",
+    "Test Case ID", "Objective", "Preconditions", "Test Steps", "Expected Result",
+]
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line straight back."""
 
-def to_csv(output_section: dict) -> str:
+    def write(self, value: str) -> str:
+        return value
+
+
+def _section_epics(output_section: dict) -> list:
     """
-    Convert output into rows: Epic ID, Story, Test Case.
-    Accepts either:
-      - {"epics": [...]}  (normalized structure)
+    The epic list of a run's output section. Accepts either:
+      - {"epics": [...]}  (normalized structure; UserStories/TestCases or stories/test_cases)
       - {"stories": [...]} (older/simple structure)
     """
-    out = io.StringIO()
-    w = csv.writer(out)
-    w.writerow(["Epic ID", "Story", "Test Case"])
-
-    # Prefer normalized "epics" shape: [{"epic_id":..., "stories":[...], "test_cases":[...]}]
     epics = (output_section or {}).get("epics")
-    if isinstance(epics, list):
-        for epic in epics:
-            epic_id = (epic or {}).get("epic_id", "")
-            stories = (epic or {}).get("stories") or []
-            tests   = (epic or {}).get("test_cases") or []
-            max_len = max(len(stories), len(tests), 1)
-            for i in range(max_len):
-                story = stories[i] if i < len(stories) else ""
-                test  = tests[i]   if i < len(tests)   else ""
-                # Story could be dict or string
-                if isinstance(story, dict):
-                    story = story.get("title") or story.get("description") or json.dumps(story, ensure_ascii=False)
-                if isinstance(test, dict):
-                    test = test.get("objective") or test.get("expected_result") or json.dumps(test, ensure_ascii=False)
-                w.writerow([epic_id, story, test])
-        return out.getvalue()
-
-    # Fallback to legacy "stories" shape: [{"epic_id":..., "stories":[...], "test_cases":[...]}]
-    stories_list = (output_section or {}).get("stories") or []
-    for entry in stories_list:
-        epic_id = (entry or {}).get("epic_id", "")
-        stories = (entry or {}).get("stories") or []
-        tests   = (entry or {}).get("test_cases") or []
-        max_len = max(len(stories), len(tests), 1)
-        for i in range(max_len):
+    if not isinstance(epics, list):
+        # Fallback to legacy "stories" shape: [{"epic_id":..., "stories":[...], "test_cases":[...]}]
+        epics = (output_section or {}).get("stories") or []
+    return epics
+
+
+def _iter_epic_pairs(output_section: dict):
+    """Yield (epic, story, test) rows for every epic of ``output_section``."""
+    return _iter_pairs(_section_epics(output_section))
+
+
+def _iter_pairs(epics):
+    """
+    Yield (epic, story, test) rows, pairing the i-th story with the i-th test.
+    Story and test may be dicts, strings or "" when one list is shorter.
+    """
+    for epic in epics:
+        epic = epic or {}
+        stories = epic.get("UserStories") or epic.get("stories") or []
+        tests = epic.get("TestCases") or epic.get("test_cases") or []
+        for i in range(max(len(stories), len(tests), 1)):
             story = stories[i] if i < len(stories) else ""
-            test  = tests[i]   if i < len(tests)   else ""
-            if isinstance(story, dict):
-                story = story.get("title") or story.get("description") or json.dumps(story, ensure_ascii=False)
-            if isinstance(test, dict):
-                test = test.get("objective") or test.get("expected_result") or json.dumps(test, ensure_ascii=False)
-            w.writerow([epic_id, story, test])
+            test = tests[i] if i < len(tests) else ""
+            yield epic, story, test
+
+
+def _story_label(story) -> str:
+    # Story could be dict or string
+    if isinstance(story, dict):
+        return story.get("title") or story.get("description") or json.dumps(story, ensure_ascii=False)
+    return story
+
+
+def _test_label(test) -> str:
+    if not isinstance(test, dict):
+        return test
+    objective = test.get("objective") or ""
+    expected = test.get("expected_result") or ""
+    label = f"{objective} → {expected}" if objective and expected else (objective or expected)
+    if not label:
+        return json.dumps(test, ensure_ascii=False)
+    return f"{test['id']}: {label}" if test.get("id") else label
+
+
+def _get_flat_rows(output_section: dict) -> list:
+    """Summary rows: Epic ID, story title, "TC-ID: objective → expected result"."""
+    return [
+        [epic.get("epic_id", ""), _story_label(story), _test_label(test)]
+        for epic, story, test in _iter_epic_pairs(output_section)
+    ]
 
-    return out.getvalue()
+
+def _detailed_row(epic: dict, story, test) -> list:
+    story = story if isinstance(story, dict) else {"title": story}
+    test = test if isinstance(test, dict) else {"objective": test}
+    ac = story.get("acceptance_criteria") or {}
+    ac = ac if isinstance(ac, dict) else {}
+    steps = test.get("test_steps") or []
+    if isinstance(steps, list):
+        steps = " | ".join(str(step) for step in steps)
+    return [
+        epic.get("epic_id", ""),
+        epic.get("Epic") or epic.get("title") or "",
+        story.get("title", ""),
+        story.get("description", ""),
+        ac.get("Given", ""),
+        ac.get("When", ""),
+        ac.get("Then", ""),
+        story.get("story_points", ""),
+        test.get("id", ""),
+        test.get("objective", ""),
+        test.get("preconditions", ""),
+        steps,
+        test.get("expected_result", ""),
+    ]
+
+
+def iter_csv(output_section: dict, detailed: bool = True):
+    """
+    Yield the CSV one line at a time (BOM + header first) so large runs can be
+    streamed without building the whole file in memory.
+    """
+    return iter_csv_epics(_section_epics(output_section), detailed=detailed)
+
+
+def iter_csv_epics(epics, detailed: bool = True):
+    """Like :func:`iter_csv`, but over any iterable of epics (e.g. read lazily from the run file)."""
+    # Only our own work counts towards export_render, not time the consumer
+    # spends between lines (e.g. writing them to a slow client).
+    spent, started = 0.0, time.perf_counter()
+    try:
+        w = csv.writer(_Echo())
+        header = "\ufeff" + w.writerow(DETAILED_HEADER if detailed else SUMMARY_HEADER)
+        spent += time.perf_counter() - started
+        yield header
+        for epic, story, test in _iter_pairs(epics):
+            started = time.perf_counter()
+            if detailed:
+                line = w.writerow(_detailed_row(epic, story, test))
+            else:
+                line = w.writerow([epic.get("epic_id", ""), _story_label(story), _test_label(test)])
+            spent += time.perf_counter() - started
+            yield line
+    finally:
+        observe_stage("export_render", spent)
+
+
+def to_csv(output_section: dict, detailed: bool = False) -> str:
+    """
+    Convert output into CSV text. The summary layout has the columns
+    Epic ID, Story, Test Case; detailed=True adds every story and test field.
+    """
+    return "".join(iter_csv(output_section, detailed=detailed))
+
+@bp.get("")
+def list_runs():
+    """
+    GET /api/runs?limit=20&cursor=...&project=...&mode=...
+    Newest runs first; follow next_cursor for the next page.
+    """
+    limit = max(1, min(request.args.get("limit", 20, type=int), 200))
+    try:
+        runs, next_cursor = get_run_catalog().list_runs(
+            limit=limit,
+            cursor=request.args.get("cursor"),
+            project=request.args.get("project"),
+            mode=request.args.get("mode"),
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return jsonify({"runs": runs, "count": len(runs), "next_cursor": next_cursor}), 200
 
 @bp.get("/<run_id>/json")
 def get_json(run_id):
@@ -72,28 +177,36 @@ def get_json(run_id):
     if data is None:
         # Always return something (prevents "view did not return a valid response")
         return jsonify({"error": "Run not found", "path": path}), 404
-    return jsonify(data), 200
+    with timed("export_render"):
+        response = jsonify(data)
+    return response, 200
 
 @bp.get("/<run_id>/csv")
 def get_csv(run_id):
-    data, path = _load_run(run_id)
-    if data is None:
+    """
+    Stream the run as CSV with every story and test field.
+    ?columns=summary gives the compact Epic ID / Story / Test Case layout.
+    Epics are read from the run file one at a time and the run is not added
+    to the store's cache, so memory stays flat however large the run is.
+    """
+    store = get_run_store()
+    epics = store.iter_output_epics(run_id)
+    if epics is None:
+        path = store.path_for(run_id) or os.path.join(store.runs_dir, f"{run_id}.json")
         return jsonify({"error": "Run not found", "path": path}), 404
 
     # Defensive check: handle empty runs gracefully
-    output_section = (data or {}).get("output") or {}
-    epics = output_section.get("epics") or []
-    if not epics:
+    first = next(epics, None)
+    if first is None:
         return jsonify({
             "run_id": run_id,
             "message": "No epics found in this run — nothing to export.",
             "status": "empty"
         }), 200
 
-    csv_body = to_csv(output_section)
+    detailed = request.args.get("columns") != "summary"
     return Response(
-        csv_body,
+        iter_csv_epics(itertools.chain([first], epics), detailed=detailed),
         mimetype="text/csv",
         headers={"Content-Disposition": f"attachment; filename={run_id}.csv"},
     )
-
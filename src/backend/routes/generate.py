@@ -1,18 +1,257 @@
 # src/backend/routes/generate.py
 from __future__ import annotations
-from flask import Blueprint, request, jsonify
-import os, json, uuid, datetime
-from pathlib import Path
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json, uuid, datetime, hashlib
+from functools import partial
 
 try:
     # prefer package import
-    from src.ai_engine import generate_user_stories, using_live_model
+    from src.ai_engine import generate_user_stories, generate_user_stories_batch, generate_many, model_name, using_live_model
+    from src.config import Config
+    from src.backend.services.ai_client import iter_concurrently, run_concurrently
+    from src.backend.services.jobs import get_job_manager
+    from src.backend.services.runs import get_run_store
+    from src.dedupe import dedupe_stories
+    from src.usage import empty_usage, summarise as summarise_usage
+    from src.validators import validate_output
 except Exception:
     # fallback if run as script
-    from ai_engine import generate_user_stories, using_live_model  # type: ignore
+    from ai_engine import generate_user_stories, generate_user_stories_batch, generate_many, model_name, using_live_model  # type: ignore
+    from config import Config  # type: ignore
+    from backend.services.ai_client import iter_concurrently, run_concurrently  # type: ignore
+    from backend.services.jobs import get_job_manager  # type: ignore
+    from backend.services.runs import get_run_store  # type: ignore
+    from dedupe import dedupe_stories  # type: ignore
+    from usage import empty_usage, summarise as summarise_usage  # type: ignore
+    from validators import validate_output  # type: ignore
 
 bp = Blueprint("generate", __name__)
-RUNS_DIR = Path("runs_data")
+
+
+def _epic_args(indexed_epic: tuple[int, dict]) -> dict:
+    """Engine keyword arguments for one ``(position, epic)`` pair from the request."""
+    idx, e = indexed_epic
+    title = e.get("title") or f"Epic {idx}"
+    desc = e.get("description") or title
+    return {
+        "epic_text": desc,
+        "epic_title": title,
+        "epic_id": e.get("epic_id") or f"E{idx}",
+        "epic_description": desc,
+    }
+
+
+def _to_output_epic(args: dict, result: dict) -> dict:
+    # result already normalised to {Epic, UserStories, TestCases, ...}
+    epic = {
+        "epic_id": args["epic_id"],
+        "Epic": result.get("Epic") or args["epic_title"],
+        "description": result.get("description") or args["epic_description"],
+        "UserStories": result.get("UserStories") or [],
+        "TestCases": result.get("TestCases") or [],
+        "usage": result.get("usage"),
+    }
+    if result.get("fallback"):
+        epic["fallback"] = True  # mock output standing in for a failed live call
+    return epic
+
+
+def _generate_epic(indexed_epic: tuple[int, dict], use_cache: bool = True) -> dict:
+    """Run the engine for one ``(position, epic)`` pair from the request."""
+    args = _epic_args(indexed_epic)
+    result = generate_user_stories(**args, use_cache=use_cache)
+    return _to_output_epic(args, result)
+
+
+def epic_fingerprint(args: dict, model: str | None) -> str:
+    """Hash of the model and the epic text it sees; equal hashes mean the output can be reused."""
+    text = f"{model}\n{args['epic_title'].strip()}\n{args['epic_description'].strip()}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _previous_outputs(previous: dict) -> dict:
+    """``{fingerprint: output epic}`` for every epic the previous run really generated.
+
+    Mock output that stood in for a failed live call is left out, so those
+    epics go back to the model.
+    """
+    outputs = {e.get("epic_id"): e for e in (previous.get("output") or {}).get("epics") or []}
+    by_hash = {}
+    for item in enumerate(previous.get("epics") or [], start=1):
+        args = _epic_args(item)
+        out = outputs.get(args["epic_id"])
+        if out is not None and not out.get("fallback"):
+            by_hash.setdefault(epic_fingerprint(args, (out.get("usage") or {}).get("model")), out)
+    return by_hash
+
+
+def _plan_incremental(data: dict, items: list, mode: str):
+    """Split the request against ``previous_run_id`` into reused and to-generate epics.
+
+    Returns ``(reused, todo, incremental, error_response)`` where ``reused`` maps
+    an item's position to its carried-forward output epic and ``todo`` lists the
+    ``(position, epic)`` items that still need the model.
+    """
+    previous_run_id = data.get("previous_run_id")
+    if not previous_run_id:
+        return {}, items, None, None
+
+    previous = get_run_store().load(str(previous_run_id))
+    if not isinstance(previous, dict):
+        return {}, items, None, (jsonify({"error": "Unknown previous_run_id"}), 404)
+
+    # Mock output is never carried into a live run (or the other way round).
+    candidates = _previous_outputs(previous) if previous.get("mode") == mode else {}
+    model = model_name() if mode == "live" else "mock"  # as recorded in each epic's usage
+    reused, todo, reused_ids = {}, [], []
+    for position, item in enumerate(items):
+        args = _epic_args(item)
+        prior = candidates.get(epic_fingerprint(args, model))
+        if prior is None:
+            todo.append(item)
+            continue
+        prior_usage = prior.get("usage") or {}
+        reused[position] = {
+            **prior,
+            "epic_id": args["epic_id"],
+            "Epic": args["epic_title"],
+            "description": args["epic_description"],
+            "usage": {**empty_usage(prior_usage.get("model"), cached=True), "reused_from": previous_run_id},
+        }
+        reused_ids.append(args["epic_id"])
+
+    incremental = {
+        "previous_run_id": previous_run_id,
+        "reused": reused_ids,
+        "regenerated": [_epic_args(item)["epic_id"] for item in todo],
+    }
+    return reused, todo, incremental, None
+
+
+def _merge_incremental(items: list, reused: dict, generated: list) -> list:
+    """Put reused and freshly generated epics back in request order.
+
+    ``generated`` follows the order of the items that were sent to the model;
+    epics that failed to generate are simply missing from it.
+    """
+    if not reused:
+        return generated
+    pending = iter(generated)
+    upcoming = next(pending, None)
+    merged = []
+    for position, item in enumerate(items):
+        if position in reused:
+            merged.append(reused[position])
+        elif upcoming is not None and upcoming.get("epic_id") == _epic_args(item)["epic_id"]:
+            merged.append(upcoming)
+            upcoming = next(pending, None)
+    return merged
+
+
+def _generate_batch(indexed_epics: list, use_cache: bool = True) -> list:
+    """Run the engine for several epics with one batched model call."""
+    batch = [_epic_args(item) for item in indexed_epics]
+    results = generate_user_stories_batch(batch, use_cache=use_cache)
+    return [_to_output_epic(args, result) for args, result in zip(batch, results)]
+
+
+def _generate_async(indexed_epics: list, use_cache: bool = True) -> list:
+    """Run the engine for every epic on one asyncio loop (GENERATION_BACKEND=async)."""
+    batch = [_epic_args(item) for item in indexed_epics]
+    results = generate_many(batch, use_cache=use_cache)
+    return [_to_output_epic(args, result) for args, result in zip(batch, results)]
+
+
+def _batching(data: dict, todo: list, streaming: bool = False):
+    """``(generate_batch, batch_size)`` for the epics in ``todo``, or ``(None, 1)``.
+
+    A ``batch_size`` above 1 packs that many epics into each model call. With
+    GENERATION_BACKEND=async every epic goes into one batch run on an asyncio
+    loop; the stream endpoint keeps to threads so each epic is still sent as
+    soon as it is ready.
+    """
+    use_cache = bool(data.get("use_cache", True))
+    batch_size = data.get("batch_size") or Config.GENERATION_BATCH_SIZE
+    if batch_size > 1:
+        return partial(_generate_batch, use_cache=use_cache), batch_size
+    if Config.GENERATION_BACKEND == "async" and not streaming:
+        return partial(_generate_async, use_cache=use_cache), max(1, len(todo))
+    return None, 1
+
+
+def _finalise_run(
+    run_id: str,
+    project_name: str,
+    mode: str,
+    data: dict,
+    epics_in: list,
+    output_epics: list,
+    incremental: dict | None = None,
+) -> str:
+    """Validate the generated epics, write the run JSON and return its id."""
+    dedupe_report = None
+    if data.get("dedupe_stories", Config.STORY_DEDUPE_ENABLED):
+        # Stories repeated across epics are folded into their first occurrence.
+        output_epics, result = dedupe_stories(output_epics, data.get("dedupe_threshold"))
+        dedupe_report = result.to_dict()
+
+    schema_passed, schema_errors = validate_output(output_epics, collect_all=True)
+
+    run_json = {
+        "run_id": run_id,
+        "project_name": project_name,
+        "generated_at": datetime.datetime.utcnow().isoformat() + "Z",
+        "mode": mode,
+        "constraints": data.get("constraints"),
+        "epics": epics_in,
+        "output": {"epics": output_epics},
+        "validation": {"schema_passed": schema_passed, "errors": schema_errors},
+        "usage": summarise_usage(e.get("usage") for e in output_epics),
+    }
+    if incremental is not None:
+        run_json["incremental"] = incremental
+    if dedupe_report is not None:
+        run_json["dedupe"] = dedupe_report
+
+    # Written in the background; the run is readable from the store at once.
+    get_run_store().save(run_json)
+    return run_id
+
+def _read_request():
+    """Parse and check the JSON body shared by the generate endpoints.
+
+    Returns ``(data, project_name, epics_in, error_response)``.
+    """
+    data = request.get_json(silent=True) or {}
+    project_name = (data.get("project_name") or "AI Jira Project").strip()
+    epics_in = data.get("epics") or []
+
+    if not isinstance(epics_in, list) or not epics_in:
+        return data, project_name, epics_in, (jsonify({"error": "No epics provided"}), 400)
+
+    if len(epics_in) > Config.MAX_EPICS_PER_REQUEST:
+        return data, project_name, epics_in, (jsonify({
+            "error": "Too many epics",
+            "message": f"At most {Config.MAX_EPICS_PER_REQUEST} epics per request",
+        }), 400)
+
+    threshold = data.get("dedupe_threshold")
+    if threshold is not None and (
+        isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 < threshold <= 1
+    ):
+        return data, project_name, epics_in, (jsonify({
+            "error": "Invalid dedupe_threshold",
+            "message": "dedupe_threshold must be a number in (0, 1]",
+        }), 400)
+
+    batch_size = data.get("batch_size")
+    if batch_size is not None and (isinstance(batch_size, bool) or not isinstance(batch_size, int) or batch_size < 1):
+        return data, project_name, epics_in, (jsonify({
+            "error": "Invalid batch_size",
+            "message": "batch_size must be a positive integer",
+        }), 400)
+
+    return data, project_name, epics_in, None
 
 @bp.post("")
 def generate():
@@ -23,59 +262,65 @@ def generate():
         "epics": [
           {"epic_id":"E1","title":"X","description":"..."},
           ...
-        ]
+        ],
+        "use_cache": true,           # optional, false bypasses the response cache
+        "async": false,              # optional, true returns 202 + job id (or ?async=1)
+        "batch_size": 1,             # optional, >1 packs that many epics per model call (also async/stream)
+        "previous_run_id": "...",    # optional, reuse unchanged epics from that run
+        "dedupe_stories": false,     # optional, merge near-duplicate stories across epics
+        "dedupe_threshold": 0.8      # optional, similarity at which stories merge
       }
     """
-    data = request.get_json(silent=True) or {}
-    project_name = (data.get("project_name") or "AI Jira Project").strip()
-    epics_in = data.get("epics") or []
-
-    if not isinstance(epics_in, list) or not epics_in:
-        return jsonify({"error": "No epics provided"}), 400
+    data, project_name, epics_in, error = _read_request()
+    if error is not None:
+        return error
 
     run_id = str(uuid.uuid4())
     mode = "live" if using_live_model() else "mock"
+    # "use_cache": false forces fresh model calls for this request.
+    generate_one = partial(_generate_epic, use_cache=bool(data.get("use_cache", True)))
+    items = list(enumerate(epics_in, start=1))
+    # Epics whose title and description match the previous run are copied
+    # forward; only the new or edited ones go to the model.
+    reused, todo, incremental, error = _plan_incremental(data, items, mode)
+    if error is not None:
+        return error
+
+    generate_batch, batch_size = _batching(data, todo)
 
-    # Build output.epics by calling the engine once per epic
-    output_epics = []
-    for idx, e in enumerate(epics_in, start=1):
-        epic_id = e.get("epic_id") or f"E{idx}"
-        title = e.get("title") or f"Epic {idx}"
-        desc = e.get("description") or title
-
-        result = generate_user_stories(
-            epic_text=desc,
-            epic_title=title,
-            epic_id=epic_id,
-            epic_description=desc,
+    if todo and (data.get("async") or request.args.get("async") == "1"):
+        # Hand the epics to the background workers and return immediately.
+        job = get_job_manager().submit(
+            todo,
+            generate_one,
+            lambda generated: _finalise_run(
+                run_id, project_name, mode, data, epics_in,
+                _merge_incremental(items, reused, generated), incremental,
+            ),
+            generate_batch=generate_batch,
+            batch_size=batch_size,
         )
+        return jsonify({
+            "status": "accepted",
+            "job_id": job.job_id,
+            "run_id": run_id,
+            "message": f"Generating {len(todo)} epic(s) in the background",
+            "links": {"job": f"/api/jobs/{job.job_id}"},
+        }), 202
 
-        # result already normalised to {Epic, UserStories, TestCases, ...}
-        output_epics.append({
-            "epic_id": epic_id,
-            "Epic": result.get("Epic") or title,
-            "description": result.get("description") or desc,
-            "UserStories": result.get("UserStories") or [],
-            "TestCases": result.get("TestCases") or [],
-        })
+    # Build output.epics by fanning the engine calls out over a bounded pool;
+    # run_concurrently keeps the results in input order. With a batch size
+    # above 1, each pool task sends several epics in a single model call.
+    if generate_batch is None:
+        generated = run_concurrently(generate_one, todo)
+    else:
+        batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+        generated = [epic for batch in run_concurrently(generate_batch, batches) for epic in batch]
+    output_epics = _merge_incremental(items, reused, generated)
 
-    run_json = {
-        "run_id": run_id,
-        "project_name": project_name,
-        "generated_at": datetime.datetime.utcnow().isoformat() + "Z",
-        "mode": mode,
-        "constraints": data.get("constraints"),
-        "epics": epics_in,
-        "output": {"epics": output_epics},
-        "validation": {"schema_passed": True},  # you can wire your validator here
-    }
+    _finalise_run(run_id, project_name, mode, data, epics_in, output_epics, incremental)
 
-    RUNS_DIR.mkdir(parents=True, exist_ok=True)
-    out_path = RUNS_DIR / f"{run_id}.json"
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(run_json, f, indent=2)
-
-    return jsonify({
+    body = {
         "status": "success",
         "run_id": run_id,
         "message": f"Generated {len(output_epics)} epic(s)",
@@ -83,4 +328,98 @@ def generate():
             "json": f"/api/runs/{run_id}/json",
             "csv":  f"/api/runs/{run_id}/csv",
         }
-    }), 200
+    }
+    if incremental is not None:
+        body["incremental"] = incremental
+    return jsonify(body), 200
+
+
+@bp.post("/stream")
+def generate_stream():
+    """
+    Same payload as ``POST /api/generate``, but each epic is sent as soon as
+    it is generated (completion order, with its input ``index``), followed by
+    a summary event carrying the ``run_id``. ``index`` is the 0-based position
+    in the request's ``epics``; epics without an id default to ``E{index + 1}``.
+    The summary ``status`` is ``success``, ``partial`` (some epics sent an
+    ``error`` event) or ``failed`` (none succeeded: no run is saved).
+
+    Newline-delimited JSON by default; server-sent events with ``?format=sse``
+    or ``Accept: text/event-stream``. With a ``batch_size`` above 1 the epics
+    of a batch arrive together; GENERATION_BACKEND=async does not apply here.
+    """
+    data, project_name, epics_in, error = _read_request()
+    if error is not None:
+        return error
+
+    use_sse = request.args.get("format") == "sse" or (
+        request.accept_mimetypes.best == "text/event-stream"
+    )
+    run_id = str(uuid.uuid4())
+    mode = "live" if using_live_model() else "mock"
+    generate_one = partial(_generate_epic, use_cache=bool(data.get("use_cache", True)))
+    items = list(enumerate(epics_in, start=1))
+    reused, todo, incremental, error = _plan_incremental(data, items, mode)
+    if error is not None:
+        return error
+    # iter_concurrently reports positions within ``groups``; map them back.
+    todo_positions = [position for position in range(len(items)) if position not in reused]
+    generate_batch, batch_size = _batching(data, todo, streaming=True)
+    groups = [todo_positions[i:i + batch_size] for i in range(0, len(todo_positions), batch_size)]
+
+    def _generate_group(positions: list) -> list:
+        group = [items[position] for position in positions]
+        if generate_batch is None:
+            return [generate_one(group[0])]
+        return generate_batch(group)
+
+    def _encode(event: str, payload: dict) -> str:
+        body = json.dumps(payload, ensure_ascii=False)
+        if use_sse:
+            return f"event: {event}\ndata: {body}\n\n"
+        return json.dumps({"type": event, **payload}, ensure_ascii=False) + "\n"
+
+    def _events():
+        results = [None] * len(items)
+        failed = 0
+        for index, epic in reused.items():
+            results[index] = epic
+            yield _encode("epic", {"index": index, "epic": epic, "reused": True})
+
+        for group_index, generated, exc in iter_concurrently(_generate_group, groups):
+            positions = groups[group_index]
+            if exc is not None:
+                failed += len(positions)
+                for index in positions:
+                    yield _encode("error", {
+                        "index": index,
+                        "epic_id": items[index][1].get("epic_id") or f"E{index + 1}",
+                        "message": str(exc),
+                    })
+                continue
+            for index, result in zip(positions, generated):
+                results[index] = result
+                yield _encode("epic", {"index": index, "epic": result})
+
+        output_epics = [r for r in results if r is not None]
+        if not output_epics:
+            # Like the job path: an empty run is not worth saving.
+            yield _encode("summary", {"status": "failed", "run_id": None, "message": "All epics failed"})
+            return
+        _finalise_run(run_id, project_name, mode, data, epics_in, output_epics, incremental)
+        message = f"Generated {len(output_epics)} epic(s)"
+        yield _encode("summary", {
+            "status": "partial" if failed else "success",
+            "run_id": run_id,
+            "message": f"{message}, {failed} failed" if failed else message,
+            "links": {
+                "json": f"/api/runs/{run_id}/json",
+                "csv":  f"/api/runs/{run_id}/csv",
+            },
+        })
+
+    return Response(
+        stream_with_context(_events()),
+        mimetype="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,11 +1,57 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify
 import time
 
+from src import metrics
+from src.backend.services.chat_sessions import get_chat_sessions
+from src.backend.services.runs import get_run_store
+from src.circuit_breaker import get_circuit_breaker
+from src.rate_limiter import get_rate_limiter
+from src.response_cache import get_response_cache
+from src.usage import get_usage_tracker
+
 bp = Blueprint("health", __name__)
 _start = time.time()
 
 @bp.get("/health")
 def health():
     uptime = round(time.time() - _start, 2)
-    return jsonify({"status": "ok", "uptime_sec": uptime})
+    cache = get_response_cache()
+    limiter = get_rate_limiter()
+    breaker = get_circuit_breaker()
+    runs = get_run_store().stats()
+    return jsonify({
+        # Degraded while generated runs are held in memory because writing them failed.
+        "status": "degraded" if runs["failed_runs"] else "ok",
+        "uptime_sec": uptime,
+        "response_cache": cache.stats() if cache is not None else {"enabled": False},
+        "rate_limiter": limiter.stats() if limiter is not None else {"enabled": False},
+        "model_circuit": breaker.stats() if breaker is not None else {"enabled": False},
+        "usage": get_usage_tracker().snapshot(),
+        "chat_sessions": get_chat_sessions().stats(),
+        "run_store": runs,
+    })
+
 
+@bp.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition: stage/request histograms plus cache, limiter and circuit gauges."""
+    cache = get_response_cache()
+    limiter = get_rate_limiter()
+    breaker = get_circuit_breaker()
+    lines = [metrics.render().rstrip("\n")]
+    lines += [
+        f"# HELP {metrics.PREFIX}_uptime_seconds Seconds since the app started.",
+        f"# TYPE {metrics.PREFIX}_uptime_seconds gauge",
+        f"{metrics.PREFIX}_uptime_seconds {round(time.time() - _start, 2)}",
+    ]
+    if cache is not None:
+        lines += metrics.gauge_lines(f"{metrics.PREFIX}_response_cache", "Response cache counters.", cache.stats())
+    if limiter is not None:
+        lines += metrics.gauge_lines(f"{metrics.PREFIX}_rate_limiter", "OpenAI rate limiter state.", limiter.stats())
+    if breaker is not None:
+        stats = breaker.stats()
+        stats["open"] = 1 if stats["state"] == "open" else 0
+        lines += metrics.gauge_lines(f"{metrics.PREFIX}_model_circuit", "Live model circuit breaker.", stats)
+    lines += metrics.gauge_lines(f"{metrics.PREFIX}_chat_sessions", "Server-side chat sessions.", get_chat_sessions().stats())
+    lines += metrics.gauge_lines(f"{metrics.PREFIX}_run_store", "Run store write queue and failures.", get_run_store().stats())
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
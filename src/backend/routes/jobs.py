@@ -0,0 +1,13 @@
+from flask import Blueprint, jsonify
+
+from src.backend.services.jobs import get_job_manager
+
+bp = Blueprint("jobs", __name__)
+
+
+@bp.get("/<job_id>")  # GET /api/jobs/<job_id>
+def get_job(job_id: str):
+    job = get_job_manager().snapshot(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "job_id": job_id}), 404
+    return jsonify(job), 200
@@ -1,19 +1,14 @@
 from __future__ import annotations
-from flask import Blueprint, abort, render_template
-import json
-from pathlib import Path
+from flask import Blueprint, abort, render_template, request
 
-bp = Blueprint("ui", __name__, template_folder="../templates")
+from src.backend.services.run_catalog import get_run_catalog
+from src.backend.services.runs import get_run_store
 
-RUNS_DIR = Path("runs_data")
+bp = Blueprint("ui", __name__, template_folder="../templates")
 
 
 def _load_run(run_id: str):
-    path = RUNS_DIR / f"{run_id}.json"
-    if not path.exists():
-        return None
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_run_store().load(run_id)
     
 
 def _adapt_for_results_template(run_json: dict):
@@ -66,9 +61,9 @@ def _adapt_for_results_template(run_json: dict):
             }
         )
 
+    # Copy rather than mutate: run_json may be the run store's cached instance.
     adapted = dict(run_json)
-    adapted.setdefault("output", {})
-    adapted["output"]["epics"] = epics
+    adapted["output"] = {**(out if isinstance(out, dict) else {}), "epics": epics}
     adapted.setdefault("mode", run_json.get("mode") or run_json.get("output", {}).get("mode"))
     return adapted
 
@@ -84,21 +79,16 @@ def chat_page():
 
 @bp.get("/runs")
 def runs():
-    RUNS_DIR.mkdir(exist_ok=True)
-    runs = []
-    for f in sorted(RUNS_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
-        try:
-            with f.open("r", encoding="utf-8") as fh:
-                data = json.load(fh)
-            runs.append({
-                "run_id": data.get("run_id"),
-                "project_name": data.get("project_name"),
-                "generated_at": data.get("generated_at"),
-                "mode": data.get("mode"),
-            })
-        except Exception:
-            pass
-    return render_template("runs_list.html", runs=runs)
+    try:
+        runs, next_cursor = get_run_catalog().list_runs(
+            limit=max(1, min(request.args.get("limit", 50, type=int), 200)),
+            cursor=request.args.get("cursor"),
+            project=request.args.get("project"),
+            mode=request.args.get("mode"),
+        )
+    except ValueError:
+        abort(400)
+    return render_template("runs_list.html", runs=runs, next_cursor=next_cursor)
 
 @bp.get("/runs/<run_id>")
 def run_detail(run_id: str):
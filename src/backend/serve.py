@@ -0,0 +1,200 @@
+"""Production entry point for the Flask app.
+
+    python -m src.backend.serve [--workers N] [--threads N] [--port N]
+
+With gunicorn installed this runs ``SERVE_WORKERS`` pre-forked worker
+processes (default 1) with ``SERVE_THREADS`` request threads each.
+Background jobs, chat sessions, queued run writes and the OpenAI rate
+limiter/circuit breaker live in process memory (``PROCESS_LOCAL_STATE``),
+so with more than one worker a job or chat session is only found on the
+worker that created it, a fresh run can 404 on another worker until its
+write lands, and the OpenAI quota is enforced once per worker. Scale with
+threads; only raise ``SERVE_WORKERS`` behind sticky sessions and with the
+quota limits divided by the worker count. The app is imported
+once in the master (``preload_app``), and the compiled schema validators
+are built there so every worker shares them. The model client, response
+cache and run-store writer are created in each worker right after the
+fork, before it takes traffic, because connection pools and threads do
+not survive a fork.
+
+On SIGTERM, workers stop accepting connections, finish in-flight requests,
+wait for background generation jobs, and flush queued run writes. They
+get up to ``SERVE_GRACEFUL_TIMEOUT_SEC`` to do this.
+
+Without gunicorn (e.g. on Windows) it falls back to a single-process
+threaded server. It warms up and drains the same way.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:  # Support package imports as well as running the file directly
+    from src.config import Config
+except ImportError:  # pragma: no cover - defensive fallback for script usage
+    from config import Config  # type: ignore
+
+
+# Kept in one process's memory; every extra worker has its own, separate copy.
+PROCESS_LOCAL_STATE = (
+    "background jobs (GET /api/jobs/<id>)",
+    "chat sessions (session_id)",
+    "queued run writes (GET /api/runs/<id> right after generating)",
+    "the OpenAI rate limiter and circuit breaker",
+)
+
+
+def default_workers() -> int:
+    """One worker unless ``SERVE_WORKERS`` asks for more (see ``PROCESS_LOCAL_STATE``)."""
+    return Config.SERVE_WORKERS or 1
+
+
+def multi_worker_warning(workers: int) -> Optional[str]:
+    """What stops working across workers, or None for a single worker."""
+    if workers <= 1:
+        return None
+    return (
+        f"Running {workers} workers: each keeps its own " + ", ".join(PROCESS_LOCAL_STATE)
+        + ". Requests for them only succeed on the worker that created them, and the OpenAI "
+        "quota is applied per worker. Use sticky sessions and divide OPENAI_RPM_LIMIT/"
+        "OPENAI_TPM_LIMIT by the worker count, or serve one worker with more threads."
+    )
+
+
+def warm_up(per_process: bool = True) -> Dict[str, float]:
+    """Build the expensive objects now instead of on the first request.
+
+    The compiled validators are plain data and safe to build before a
+    fork. ``per_process`` adds the pieces that own threads or connection
+    pools (model client, response cache, run store writer), which every
+    worker must create for itself. Returns the seconds each step took.
+    """
+    from src import ai_engine, validators
+    from src.backend.services.runs import get_run_store
+    from src.response_cache import get_response_cache
+
+    steps: Dict[str, Any] = {"validators": validators.get_validator}
+    if per_process:
+        steps.update({
+            "model_client": ai_engine._initialise_client,
+            "response_cache": get_response_cache,
+            "run_store": get_run_store,
+        })
+    timings: Dict[str, float] = {}
+    for name, step in steps.items():
+        started = time.perf_counter()
+        step()
+        timings[name] = round(time.perf_counter() - started, 4)
+    logging.info("Warm-up (pid %s): %s", os.getpid(), timings)
+    return timings
+
+
+def drain(timeout: Optional[float] = None) -> None:
+    """Let background generation jobs finish and flush queued run writes."""
+    from src.backend.services.jobs import get_job_manager
+    from src.backend.services.runs import get_run_store
+
+    get_job_manager().shutdown(wait=True)
+    get_run_store().flush(timeout)
+    logging.info("Drained background jobs and run writes (pid %s)", os.getpid())
+
+
+def gunicorn_options(
+    host: str,
+    port: int,
+    workers: int,
+    threads: int,
+) -> Dict[str, Any]:
+    """gunicorn settings, including the hooks that warm and drain each worker."""
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "timeout": Config.SERVE_TIMEOUT_SEC,
+        "graceful_timeout": Config.SERVE_GRACEFUL_TIMEOUT_SEC,
+        "keepalive": 5,
+        "accesslog": "-",
+        "post_fork": lambda server, worker: warm_up(),
+        "worker_exit": lambda server, worker: drain(Config.SERVE_GRACEFUL_TIMEOUT_SEC),
+    }
+
+
+def _run_gunicorn(app, options: Dict[str, Any]) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class _Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    _Application().run()
+
+
+def _run_threaded(app, host: str, port: int) -> None:
+    """Single-process fallback: werkzeug's threaded server plus the same warm-up and drain."""
+    from werkzeug.serving import make_server
+
+    warm_up()
+    server = make_server(host, port, app, threaded=True)
+    # Wait for request threads on shutdown instead of abandoning them.
+    server.daemon_threads = False
+    server.block_on_close = True
+
+    def _stop(signum, frame):
+        logging.info("Received signal %s, draining", signum)
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logging.warning("gunicorn is not installed; serving from one threaded process on %s:%s", host, port)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        drain(Config.SERVE_GRACEFUL_TIMEOUT_SEC)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the app with preloaded, warmed workers.")
+    parser.add_argument("--host", default=Config.SERVE_HOST)
+    parser.add_argument("--port", type=int, default=Config.PORT)
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="worker processes (default 1; state is per process, see the module docstring)")
+    parser.add_argument("--threads", type=int, default=Config.SERVE_THREADS)
+    parser.add_argument("--no-gunicorn", action="store_true", help="use the single-process threaded server")
+    args = parser.parse_args(argv)
+
+    from src.backend.app import create_app
+
+    app = create_app()
+    try:
+        if args.no_gunicorn:
+            raise ImportError("disabled with --no-gunicorn")
+        import gunicorn  # noqa: F401
+    except ImportError:
+        _run_threaded(app, args.host, args.port)
+        return 0
+
+    warning = multi_worker_warning(args.workers)
+    if warning:
+        logging.warning(warning)
+    # Loaded once in the master and inherited by every worker; the rest is
+    # created per worker in post_fork.
+    warm_up(per_process=False)
+    _run_gunicorn(app, gunicorn_options(args.host, args.port, args.workers, args.threads))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
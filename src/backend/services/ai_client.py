@@ -4,14 +4,24 @@ from __future__ import annotations
 
 import datetime
 import uuid
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, TypeVar
 
 try:  # Support package imports as well as running the file directly
     from src.backend.models.schemas import GenerateRequest
+    from src.config import Config
     from src import ai_engine
+    from src.usage import summarise as summarise_usage
+    from src.validators import validate_epics
 except ImportError:  # pragma: no cover - defensive fallback for script usage
     from backend.models.schemas import GenerateRequest  # type: ignore
+    from config import Config  # type: ignore
     import ai_engine  # type: ignore
+    from usage import summarise as summarise_usage  # type: ignore
+    from validators import validate_epics  # type: ignore
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def _epic_to_prompt(title: str, description: str | None) -> str:
@@ -21,30 +31,82 @@ def _epic_to_prompt(title: str, description: str | None) -> str:
     return title
 
 
+def run_concurrently(
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    max_workers: int | None = None,
+) -> List[R]:
+    """Apply ``fn`` to every item on a bounded thread pool.
+
+    Results come back in input order. The pool never grows past
+    ``Config.GENERATION_CONCURRENCY`` (or ``max_workers`` when given), and a
+    single item is run inline so small requests skip the pool entirely.
+    """
+
+    if not items:
+        return []
+    workers = max(1, min(max_workers or Config.GENERATION_CONCURRENCY, len(items)))
+    if workers == 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="epic-gen") as pool:
+        return list(pool.map(fn, items))
+
+
+def iter_concurrently(
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    max_workers: int | None = None,
+) -> Iterator[Tuple[int, R | None, Exception | None]]:
+    """Like :func:`run_concurrently`, but yield ``(index, result, error)`` as
+    each item finishes instead of waiting for the slowest one.
+
+    Closing the iterator early cancels work that has not started yet.
+    """
+
+    if not items:
+        return
+    workers = max(1, min(max_workers or Config.GENERATION_CONCURRENCY, len(items)))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="epic-stream")
+    try:
+        futures = {pool.submit(fn, item): index for index, item in enumerate(items)}
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], (None if error else future.result()), error
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 def generate_from_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Validate the request payload, call the AI engine, and aggregate results."""
 
     req = GenerateRequest(**payload)
 
-    generated = []
-    for epic in req.epics:
+    def _generate(epic) -> Dict[str, Any]:
         epic_text = _epic_to_prompt(epic.title, epic.description)
-        ai_output = ai_engine.generate_user_stories(
+        return ai_engine.generate_user_stories(
             epic_text,
             epic_title=epic.title,
             epic_id=epic.epic_id,
             epic_description=epic.description,
         )
 
-        if not ai_engine.validate_output(ai_output):
-            # Log a warning but continue so the request succeeds with as much data
-            # as possible. Schema validation errors will be reported in the run.
-            print(f"⚠️ Validation failed for epic: {epic.title}")
+    generated = run_concurrently(_generate, req.epics)
 
-        generated.append(ai_output)
+    final_output, dedupe_report = ai_engine.post_process_with_report(
+        generated,
+        dedupe_stories=req.dedupe_stories,
+        threshold=req.dedupe_threshold,
+    )
 
-    final_output = ai_engine.post_process(generated)
-    validation_passed = ai_engine.validate_output(final_output)
+    # One validation pass over the whole batch; errors are grouped per epic.
+    epic_errors = validate_epics(final_output)
+    for epic_data, errors in zip(final_output, epic_errors):
+        if errors:
+            # Log a warning but continue so the request succeeds with as much data
+            # as possible. Schema validation errors will be reported in the run.
+            print(f"⚠️ Validation failed for epic: {epic_data.get('Epic')}")
+    errors = [err for errors in epic_errors for err in errors]
+    validation_passed = not errors
 
     run_record = {
         "run_id": str(uuid.uuid4()),
@@ -54,7 +116,10 @@ def generate_from_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         "epics": [epic.dict() for epic in req.epics],
         "constraints": req.constraints.dict(exclude_none=True) if req.constraints else None,
         "output": {"epics": final_output},
-        "validation": {"schema_passed": validation_passed},
+        "validation": {"schema_passed": validation_passed, "errors": errors},
+        "usage": summarise_usage(epic.get("usage") for epic in final_output),
     }
+    if dedupe_report is not None:
+        run_record["dedupe"] = dedupe_report
 
     return run_record
@@ -0,0 +1,121 @@
+"""Server-side chat sessions for ``/api/chat``.
+
+Each session keeps its own :class:`EpicChatAgent`, so the browser only
+sends a session id and the new message instead of the whole conversation.
+Sessions are evicted least-recently-used first once ``max_sessions`` is
+reached, expire after ``ttl_sec`` of inactivity, and keep at most
+``max_turns`` user/assistant exchanges.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:  # Support package imports as well as running the file directly
+    from src.chat_agent import EpicChatAgent
+    from src.config import Config
+except ImportError:  # pragma: no cover - defensive fallback for script usage
+    from chat_agent import EpicChatAgent  # type: ignore
+    from config import Config  # type: ignore
+
+
+@dataclass
+class ChatSession:
+    session_id: str
+    agent: EpicChatAgent
+    last_used: float
+    # Messages in one session are answered one at a time, in order.
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ChatSessionStore:
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_sec: float = 3600.0,
+        max_turns: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_sec = ttl_sec
+        self.max_turns = max_turns
+        self._clock = clock
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._expired = 0
+
+    def get(self, session_id: Optional[str]) -> Optional[ChatSession]:
+        """The live session with this id (marking it recently used), or None."""
+        if not session_id:
+            return None
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id: Optional[str] = None) -> Tuple[ChatSession, bool]:
+        """``(session, created)``; unknown or expired ids start a fresh session."""
+        session = self.get(session_id)
+        if session is not None:
+            return session, False
+        now = self._clock()
+        session = ChatSession(session_id=uuid.uuid4().hex, agent=EpicChatAgent(), last_used=now)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._evicted += 1
+        return session, True
+
+    def trim(self, session: ChatSession) -> None:
+        session.agent.trim_history(self.max_turns)
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(self._clock())
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "evicted": self._evicted,
+                "expired": self._expired,
+            }
+
+    def _expire(self, now: float) -> None:
+        # Oldest first, so stop at the first session that is still fresh.
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used < self.ttl_sec:
+                break
+            self._sessions.popitem(last=False)
+            self._expired += 1
+
+
+_sessions: Optional[ChatSessionStore] = None
+_sessions_lock = threading.Lock()
+
+
+def get_chat_sessions() -> ChatSessionStore:
+    global _sessions
+    if _sessions is None:
+        with _sessions_lock:
+            if _sessions is None:
+                _sessions = ChatSessionStore(
+                    max_sessions=Config.CHAT_SESSION_MAX,
+                    ttl_sec=Config.CHAT_SESSION_TTL_SEC,
+                    max_turns=Config.CHAT_MAX_TURNS,
+                )
+    return _sessions
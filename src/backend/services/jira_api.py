@@ -1,34 +1,97 @@
 # src/backend/services/jira_api.py
 from __future__ import annotations
 import os
-import requests
-from requests.auth import HTTPBasicAuth
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.config import Config
+
+EPIC_JQL = 'project = "{project_key}" AND issuetype = Epic ORDER BY created DESC'
+
 
 class JiraAPI:
     """
     Thin wrapper over Jira Cloud REST API using basic auth (email + API token).
     Only read scopes are needed for listing projects/issues.
+
+    All calls share one pooled ``requests.Session`` (keep-alive, so no
+    handshake per call). GET responses are cached per path + query (for
+    searches that means per JQL) for ``cache_ttl`` seconds; after that the
+    cached ETag is sent back so an unchanged result costs a 304.
     """
 
     def __init__(self,
                  base_url: Optional[str] = None,
                  email: Optional[str] = None,
-                 api_token: Optional[str] = None) -> None:
+                 api_token: Optional[str] = None,
+                 *,
+                 pool_size: int = 10,
+                 cache_ttl: float = 60.0,
+                 cache_size: int = 128,
+                 timeout: Optional[float] = None) -> None:
         self.base_url = (base_url or os.getenv("JIRA_BASE_URL", "")).rstrip("/")
         self.email = email or os.getenv("JIRA_EMAIL", "")
         self.api_token = api_token or os.getenv("JIRA_API_TOKEN", "")
         if not (self.base_url and self.email and self.api_token):
             raise RuntimeError("Jira credentials missing: set JIRA_BASE_URL, JIRA_EMAIL, JIRA_API_TOKEN")
+        # requests is only imported once a Jira client is actually built.
+        import requests
+        from requests.adapters import HTTPAdapter
+        from requests.auth import HTTPBasicAuth
+        from urllib3.util.retry import Retry
+
         self.auth = HTTPBasicAuth(self.email, self.api_token)
         self.headers = {"Accept": "application/json"}
+        self.timeout = timeout or Config.REQUEST_TIMEOUT_SEC
+        self.pool_size = pool_size
+
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        self.session.headers.update(self.headers)
+        retry = Retry(total=Config.RETRY_COUNT, backoff_factor=0.3,
+                      status_forcelist=(429, 502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Tuple, Tuple[float, Optional[str], Any]] = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     # -------- Utilities --------
     def _get(self, path: str, **params) -> Dict[str, Any] | List[Any]:
         url = f"{self.base_url}{path}"
-        resp = requests.get(url, headers=self.headers, auth=self.auth, params=params or None, timeout=20)
-        resp.raise_for_status()
-        return resp.json()
+        key = (path, tuple(sorted(params.items())))
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[2]
+
+        headers = {"If-None-Match": cached[1]} if cached is not None and cached[1] else None
+        resp = self.session.get(url, params=params or None, headers=headers, timeout=self.timeout)
+        if resp.status_code == 304 and cached is not None:
+            data, etag = cached[2], cached[1]
+        else:
+            resp.raise_for_status()
+            data, etag = resp.json(), resp.headers.get("ETag")
+
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), etag, data)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        self.session.close()
 
     # -------- Endpoints you actually need --------
     def list_projects(self) -> List[Dict[str, Any]]:
@@ -43,20 +106,72 @@ class JiraAPI:
             return data
         return []
 
-    def search_issues(self, jql: str, max_results: int = 50) -> Dict[str, Any]:
-        return self._get("/rest/api/3/search", jql=jql, maxResults=max_results)
+    def search_issues(self, jql: str, max_results: int = 50, start_at: int = 0) -> Dict[str, Any]:
+        return self._get("/rest/api/3/search", jql=jql, maxResults=max_results, startAt=start_at)
 
-    def list_epics_for_project(self, project_key: str) -> List[Dict[str, Any]]:
-        # JQL: type = Epic in that project
-        data = self.search_issues(f'project = "{project_key}" AND issuetype = Epic ORDER BY created DESC',
-                                  max_results=100)
-        issues = data.get("issues", [])
-        epics = []
+    def iter_epics(self, project_key: str, page_size: int = 100,
+                   limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every epic in the project, newest first. The first page tells
+        us the total; the remaining pages are then fetched concurrently over
+        the session's connection pool and yielded in order.
+        """
+        jql = EPIC_JQL.format(project_key=project_key)
+        if limit is not None:
+            page_size = max(1, min(page_size, limit))
+        first = self.search_issues(jql, max_results=page_size, start_at=0)
+        issues = first.get("issues", []) or []
+        total = int(first.get("total", len(issues)) or 0)
+        if limit is not None:
+            total = min(total, limit)
+
+        emitted = 0
         for it in issues:
-            fields = it.get("fields", {}) if isinstance(it, dict) else {}
-            epics.append({
-                "epic_id": it.get("key"),
-                "title": fields.get("summary", ""),
-                "description": fields.get("description") if fields.get("description") else "",
-            })
-        return epics
+            if emitted >= total:
+                return
+            emitted += 1
+            yield self._to_epic(it)
+
+        # Jira may cap maxResults below what we asked for; page by what it returned.
+        step = len(issues) or page_size
+        starts = list(range(step, total, step))
+        if not starts:
+            return
+        workers = max(1, min(self.pool_size, len(starts)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jira-page") as pool:
+            pages = pool.map(lambda start: self.search_issues(jql, max_results=step, start_at=start), starts)
+            for page in pages:
+                for it in page.get("issues", []) or []:
+                    if emitted >= total:
+                        return
+                    emitted += 1
+                    yield self._to_epic(it)
+
+    def list_epics_for_project(self, project_key: str) -> List[Dict[str, Any]]:
+        return list(self.iter_epics(project_key))
+
+    def search_epics(self, project_key: str, max_results: int = 25) -> List[Dict[str, Any]]:
+        return list(self.iter_epics(project_key, limit=max_results))
+
+    @staticmethod
+    def _to_epic(it: Dict[str, Any]) -> Dict[str, Any]:
+        fields = it.get("fields", {}) if isinstance(it, dict) else {}
+        return {
+            "epic_id": it.get("key"),
+            "title": fields.get("summary", ""),
+            "description": fields.get("description") if fields.get("description") else "",
+        }
+
+
+_client: Optional[JiraAPI] = None
+_client_lock = threading.Lock()
+
+
+def get_jira_client() -> JiraAPI:
+    """Shared client so the connection pool and cache survive across requests."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = JiraAPI()
+    return _client
@@ -0,0 +1,181 @@
+"""In-process background jobs for multi-epic generation."""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:  # Support package imports as well as running the file directly
+    from src.config import Config
+except ImportError:  # pragma: no cover - defensive fallback for script usage
+    from config import Config  # type: ignore
+
+
+def _now() -> str:
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+@dataclass
+class Job:
+    job_id: str
+    epics: List[Dict[str, Any]]
+    status: str = "queued"  # queued | running | succeeded | failed
+    created_at: str = field(default_factory=_now)
+    finished_at: Optional[str] = None
+    run_id: Optional[str] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        done = sum(1 for e in self.epics if e["status"] in ("succeeded", "failed"))
+        failed = sum(1 for e in self.epics if e["status"] == "failed")
+        out: Dict[str, Any] = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "progress": {"total": len(self.epics), "completed": done, "failed": failed},
+            "epics": [dict(e) for e in self.epics],
+            "run_id": self.run_id,
+            "error": self.error,
+        }
+        if self.run_id:
+            out["links"] = {
+                "run": f"/runs/{self.run_id}",
+                "json": f"/api/runs/{self.run_id}/json",
+                "csv": f"/api/runs/{self.run_id}/csv",
+            }
+        return out
+
+
+class JobManager:
+    """
+    Runs each job's epics on a shared, bounded thread pool.
+
+    No thread waits on a job as a whole: every epic reports back through a
+    future callback, and whichever worker finishes the last epic calls the
+    job's ``finalise`` hook (which persists the run and returns its id).
+    With ``generate_batch``, each pool task generates ``batch_size`` epics
+    at once and they succeed or fail together.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, retention: Optional[int] = None) -> None:
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or Config.JOB_WORKERS,
+            thread_name_prefix="gen-job",
+        )
+        self._retention = retention or Config.JOB_RETENTION
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        items: Sequence[Tuple[int, Dict[str, Any]]],
+        generate_one: Callable[[Tuple[int, Dict[str, Any]]], Dict[str, Any]],
+        finalise: Callable[[List[Dict[str, Any]]], str],
+        generate_batch: Optional[Callable[[List[Tuple[int, Dict[str, Any]]]], List[Dict[str, Any]]]] = None,
+        batch_size: int = 1,
+    ) -> Job:
+        job = Job(
+            job_id=str(uuid.uuid4()),
+            epics=[
+                {
+                    "epic_id": epic.get("epic_id") or f"E{idx}",
+                    "title": epic.get("title") or f"Epic {idx}",
+                    "status": "queued",
+                    "error": None,
+                }
+                for idx, epic in items
+            ],
+        )
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        remaining = [len(items)]
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+
+        def _run(positions: List[int]) -> None:
+            with self._lock:
+                job.status = "running"
+                for position in positions:
+                    job.epics[position]["status"] = "running"
+            try:
+                if generate_batch is None:
+                    outputs = [generate_one(items[positions[0]])]
+                else:
+                    outputs = generate_batch([items[position] for position in positions])
+                for position, output in zip(positions, outputs):
+                    results[position] = output
+                state, error = "succeeded", None
+            except Exception as exc:  # keep going with the other epics
+                ids = ", ".join(job.epics[position]["epic_id"] for position in positions)
+                logging.exception("Job %s: epic %s failed", job.job_id, ids)
+                state, error = "failed", str(exc)
+            with self._lock:
+                for position in positions:
+                    job.epics[position]["status"] = state
+                    job.epics[position]["error"] = error
+                remaining[0] -= len(positions)
+                last = remaining[0] == 0
+            if last:
+                self._finish(job, [r for r in results if r is not None], finalise)
+
+        size = max(1, batch_size) if generate_batch is not None else 1
+        for start in range(0, len(items), size):
+            self._pool.submit(_run, list(range(start, min(start + size, len(items)))))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def snapshot(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    # -------- Internals --------
+    def _finish(self, job: Job, outputs: List[Dict[str, Any]], finalise: Callable[[List[Dict[str, Any]]], str]) -> None:
+        try:
+            if not outputs:
+                raise RuntimeError("All epics failed")
+            run_id = finalise(outputs)
+            status, error = "succeeded", None
+        except Exception as exc:
+            logging.exception("Job %s failed to finalise", job.job_id)
+            run_id, status, error = None, "failed", str(exc)
+        with self._lock:
+            job.run_id = run_id
+            job.status = status
+            job.error = error
+            job.finished_at = _now()
+
+    def _evict_finished(self) -> None:
+        """Forget the oldest finished jobs once more than ``retention`` are held."""
+        excess = len(self._jobs) - self._retention
+        if excess <= 0:
+            return
+        for job_id in [k for k, j in self._jobs.items() if j.finished_at][:excess]:
+            del self._jobs[job_id]
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager()
+    return _manager
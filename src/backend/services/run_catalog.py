@@ -0,0 +1,243 @@
+"""SQLite-backed catalogue of run metadata for listing pages and APIs.
+
+The run JSON files in the runs directory stay the source of truth; the
+catalogue only indexes the handful of fields the listings need, so pages
+no longer open and parse every run file. It is updated whenever a run is
+written and can be rebuilt from the directory at any time.
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:  # Support package imports as well as running the file directly
+    from src.config import Config
+except ImportError:  # pragma: no cover - defensive fallback for script usage
+    from config import Config  # type: ignore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id       TEXT PRIMARY KEY,
+    project_name TEXT,
+    generated_at TEXT,
+    mode         TEXT,
+    epic_count   INTEGER,
+    sort_key     REAL NOT NULL,
+    file_size    INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_by_recency ON runs (sort_key DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS runs_by_project ON runs (project_name, sort_key DESC);
+CREATE INDEX IF NOT EXISTS runs_by_mode ON runs (mode, sort_key DESC);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _encode_cursor(sort_key: float, run_id: str) -> str:
+    raw = json.dumps([sort_key, run_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        sort_key, run_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(sort_key), str(run_id)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _metadata(run: Dict[str, Any]) -> Dict[str, Any]:
+    output = run.get("output") or {}
+    epics = output.get("epics") if isinstance(output, dict) else None
+    if not isinstance(epics, list):
+        epics = run.get("epics") or []
+    return {
+        "run_id": run.get("run_id"),
+        "project_name": run.get("project_name"),
+        "generated_at": run.get("generated_at"),
+        "mode": run.get("mode"),
+        "epic_count": len(epics) if isinstance(epics, list) else 0,
+    }
+
+
+class RunCatalog:
+    def __init__(self, runs_dir: str, db_path: Optional[str] = None) -> None:
+        self.runs_dir = runs_dir
+        self.db_path = db_path or os.path.join(runs_dir, "catalog.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+            if "file_size" not in columns:  # catalogues created before file_size was tracked
+                self._conn.execute("ALTER TABLE runs ADD COLUMN file_size INTEGER")
+
+    # -------- Writes --------
+    def record(self, run: Dict[str, Any], path: Optional[str] = None) -> None:
+        """Insert or update one run; ``path`` (its JSON file) sets the sort order.
+
+        The file's mtime and size are kept so ``sync`` can tell when it changes.
+        """
+        meta = _metadata(run)
+        if not meta["run_id"]:
+            return
+        path = path or os.path.join(self.runs_dir, f"{meta['run_id']}.json")
+        try:
+            st = os.stat(path)
+            meta["sort_key"], meta["file_size"] = st.st_mtime, st.st_size
+        except OSError:
+            meta["sort_key"], meta["file_size"] = time.time(), None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, project_name, generated_at, mode, epic_count, sort_key, file_size) "
+                "VALUES (:run_id, :project_name, :generated_at, :mode, :epic_count, :sort_key, :file_size)",
+                meta,
+            )
+
+    def remove(self, run_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def sync(self) -> int:
+        """
+        Bring the catalogue in line with the runs directory. Only files the
+        catalogue has not seen, or whose mtime or size changed since they were
+        indexed, are parsed. Returns the number of changes.
+        """
+        if not os.path.isdir(self.runs_dir):
+            return 0
+        on_disk = {}
+        for name in sorted(os.listdir(self.runs_dir)):
+            for suffix in (".json", ".json.gz"):
+                if name.endswith(suffix) and not name.startswith("."):
+                    on_disk[name[: -len(suffix)]] = os.path.join(self.runs_dir, name)
+        with self._lock:
+            known = {row[0]: (row[1], row[2]) for row in self._conn.execute("SELECT run_id, sort_key, file_size FROM runs")}
+
+        changes = 0
+        for run_id in known.keys() - on_disk.keys():
+            self.remove(run_id)
+            changes += 1
+        for run_id, path in on_disk.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if known.get(run_id) == (st.st_mtime, st.st_size):
+                continue
+            try:
+                opener = gzip.open if path.endswith(".gz") else open
+                with opener(path, "rt", encoding="utf-8") as f:
+                    run = json.load(f)
+            except Exception as exc:
+                logging.warning("Skipping unreadable run file %s: %s", path, exc)
+                continue
+            if isinstance(run, dict):
+                run.setdefault("run_id", run_id)
+                self.record(run, path)
+                changes += 1
+
+        self._set_meta("dir_mtime", self._dir_mtime())
+        return changes
+
+    def rebuild(self) -> int:
+        """Drop everything and re-index the runs directory from scratch."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM runs")
+        return self.sync()
+
+    # -------- Reads --------
+    def list_runs(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        project: Optional[str] = None,
+        mode: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Newest-first page of runs. Returns ``(runs, next_cursor)``; pass the
+        cursor back to fetch the following page (None means no more pages).
+        """
+        limit = max(1, limit)
+        self._sync_if_changed()
+        where, params = [], []
+        if project:
+            where.append("project_name = ?")
+            params.append(project)
+        if mode:
+            where.append("mode = ?")
+            params.append(mode)
+        if cursor:
+            sort_key, run_id = _decode_cursor(cursor)
+            where.append("(sort_key < ? OR (sort_key = ? AND run_id < ?))")
+            params.extend([sort_key, sort_key, run_id])
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY sort_key DESC, run_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = [dict(r) for r in self._conn.execute(sql, params)]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1]["sort_key"], rows[-1]["run_id"])
+        for row in rows:
+            row.pop("sort_key", None)
+            row.pop("file_size", None)
+        return rows, next_cursor
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -------- Internals --------
+    def _dir_mtime(self) -> str:
+        try:
+            return str(os.stat(self.runs_dir).st_mtime_ns)
+        except OSError:
+            return ""
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _sync_if_changed(self) -> None:
+        # Adding or deleting a file bumps the directory mtime, so one stat()
+        # tells us whether files were written behind the catalogue's back.
+        if self._get_meta("dir_mtime") != self._dir_mtime():
+            self.sync()
+
+
+_catalog: Optional[RunCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_run_catalog() -> RunCatalog:
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = RunCatalog(Config.EXPORT_DIR, Config.RUN_CATALOG_PATH or None)
+    return _catalog
+
+
+if __name__ == "__main__":
+    catalog = get_run_catalog()
+    print(f"Re-indexed {catalog.rebuild()} run(s) from {catalog.runs_dir} into {catalog.db_path}")
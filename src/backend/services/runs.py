@@ -1,16 +1,373 @@
-import json, os
-OUT_DIR = os.getenv("EXPORT_DIR", "./runs_data")
-os.makedirs(OUT_DIR, exist_ok=True)
+"""Run persistence shared by the generate, export, UI and job code paths.
+
+``RunStore`` is the one place run JSON is written and read:
+
+- writes are compact JSON, optionally gzipped, written to a temp file in
+  the runs directory and renamed into place, so readers never see a
+  half-written run;
+- with write-behind on, ``save`` returns once the run is queued: a single
+  background writer persists it (and records it in the run catalogue)
+  while the run is already readable from memory. A run whose write fails
+  stays in memory, is retried by the next ``flush`` and is counted in
+  ``stats`` (shown by ``/health``);
+- recently read runs stay in a bounded LRU, keyed by file mtime, so
+  repeated JSON/detail views do not re-parse the file;
+- ``iter_output_epics`` hands exports the run's epics one at a time
+  straight from the file, without parsing the whole run or caching it.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+try:  # Support package imports as well as running the file directly
+    from src.backend.services.run_catalog import RunCatalog, get_run_catalog
+    from src.config import Config
+    from src.metrics import timed
+except ImportError:  # pragma: no cover - defensive fallback for script usage
+    from backend.services.run_catalog import RunCatalog, get_run_catalog  # type: ignore
+    from config import Config  # type: ignore
+    from metrics import timed  # type: ignore
+
+RUN_SUFFIXES = (".json.gz", ".json")
+
+
+def read_run_file(path: str) -> Any:
+    """Parse a run file written by any version of the store (plain or gzipped)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+_decoder = json.JSONDecoder()
+
+
+def iter_run_epics(path: str, keys: Tuple[str, ...] = ("epics", "stories"), chunk_size: int = 65536) -> Iterator[Any]:
+    """Yield the items of ``output.<key>`` (the first of ``keys`` present) one at a time.
+
+    Only one item and the read buffer are held at once; values before
+    ``output`` are decoded and discarded, and reading stops at the end of the
+    list. Raises ``ValueError`` on malformed JSON.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            # Grow the reads with the buffer so a large value is not re-parsed too often.
+            data = f.read(max(chunk_size, len(buf) - pos))
+            buf, pos = buf[pos:] + data, 0
+            eof = not data
+            return bool(data)
+
+        def peek() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    raise ValueError(f"Unexpected end of run file {path}")
+
+        def take(char: str) -> None:
+            nonlocal pos
+            if peek() != char:
+                raise ValueError(f"Expected {char!r} at offset {pos} of {path}")
+            pos += 1
+
+        def value() -> Any:
+            nonlocal pos
+            peek()
+            while True:
+                try:
+                    obj, end = _decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if fill():
+                        continue
+                    raise ValueError(f"Malformed JSON in run file {path}") from None
+                # A number may continue past the end of the buffer.
+                if end == len(buf) and fill():
+                    continue
+                pos = end
+                return obj
+
+        def members() -> Iterator[str]:
+            """Keys of the object that starts at the cursor; the caller consumes each value."""
+            take("{")
+            if peek() == "}":
+                take("}")
+                return
+            while True:
+                key = value()
+                take(":")
+                yield key
+                if peek() == ",":
+                    take(",")
+                    continue
+                take("}")
+                return
+
+        for key in members():
+            if key != "output" or peek() != "{":
+                value()
+                continue
+            for name in members():
+                if name not in keys or peek() != "[":
+                    value()
+                    continue
+                take("[")
+                if peek() == "]":
+                    return
+                while True:
+                    yield value()
+                    if peek() == ",":
+                        take(",")
+                        continue
+                    take("]")
+                    return
+            return
+
+
+class RunStore:
+    def __init__(
+        self,
+        runs_dir: str,
+        *,
+        compress: bool = False,
+        write_behind: bool = True,
+        cache_size: int = 64,
+        catalog: Optional[RunCatalog] = None,
+    ) -> None:
+        self.runs_dir = os.path.abspath(str(runs_dir))
+        self.compress = compress
+        self.write_behind = write_behind
+        self.cache_size = max(1, cache_size)
+        self._catalog = catalog
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._failed: Dict[str, str] = {}  # run_id -> error of its last failed write
+        self._write_errors = 0
+        self._futures: Set[Future] = set()
+        # One writer keeps writes of the same run in submission order.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="run-writer") if write_behind else None
+        os.makedirs(self.runs_dir, exist_ok=True)
+
+    @property
+    def catalog(self) -> RunCatalog:
+        return self._catalog if self._catalog is not None else get_run_catalog()
+
+    # -------- Writes --------
+    def save(self, run: Dict[str, Any]) -> str:
+        """Persist ``run`` (keyed by its ``run_id``) and return the path it is written to."""
+        run_id = str(run["run_id"])
+        path = self._path(run_id, self.compress)
+        if self._writer is None:
+            self._write(run_id, run, path)
+            return path
+        with self._lock:
+            self._pending[run_id] = run
+            future = self._submit(run_id, run, path)
+        future.add_done_callback(self._forget_future)
+        return path
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Retry failed writes, then block until every queued write has finished."""
+        with self._lock:
+            retries = [
+                self._submit(run_id, self._pending[run_id], self._path(run_id, self.compress))
+                for run_id in list(self._failed)
+            ] if self._writer is not None else []
+            futures = list(self._futures)
+        for future in retries:
+            future.add_done_callback(self._forget_future)
+        wait(futures, timeout=timeout)
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None  # later saves are written synchronously
+        with self._lock:
+            lost = sorted(self._failed)
+        if lost:
+            logging.error("Run store closed with %s unsaved run(s): %s", len(lost), ", ".join(lost))
+
+    def stats(self) -> Dict[str, Any]:
+        """Queued writes, runs whose last write failed (kept in memory) and the error count."""
+        with self._lock:
+            return {
+                "write_behind": self._writer is not None,
+                "queued_writes": len(self._pending) - len(self._failed),
+                "failed_runs": len(self._failed),
+                "write_errors": self._write_errors,
+                "last_error": next(reversed(self._failed.values()), None),
+            }
+
+    # -------- Reads --------
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """The run as a dict (shared with the cache, so treat it as read-only), or None."""
+        with self._lock:
+            pending = self._pending.get(run_id)
+        if pending is not None:
+            return pending
+
+        path = self.path_for(run_id)
+        if path is None:
+            return None
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._cache.get(run_id)
+            if cached is not None and cached[0] == mtime:
+                self._cache.move_to_end(run_id)
+                return cached[1]
+
+        with timed("run_load"):
+            data = read_run_file(path)
+        if isinstance(data, dict):
+            self._remember(run_id, mtime, data)
+        return data
+
+    def iter_output_epics(self, run_id: str) -> Optional[Iterator[Any]]:
+        """The run's output epics one at a time (for exports), or None if the run does not exist.
+
+        Runs still in memory (queued, or already cached) are served from it;
+        otherwise the file is streamed and nothing is added to the cache.
+        """
+        with self._lock:
+            run = self._pending.get(run_id)
+        path = None
+        if run is None:
+            path = self.path_for(run_id)
+            if path is None:
+                return None
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                return None
+            with self._lock:
+                cached = self._cache.get(run_id)
+            if cached is not None and cached[0] == mtime:
+                run = cached[1]
+        if run is None:
+            return iter_run_epics(path)
+        output = run.get("output") if isinstance(run, dict) else None
+        output = output if isinstance(output, dict) else {}
+        epics = output.get("epics")
+        return iter(epics if isinstance(epics, list) else output.get("stories") or [])
+
+    def path_for(self, run_id: str) -> Optional[str]:
+        """Path of the stored run file, or None if the run does not exist."""
+        if not run_id or os.sep in run_id or (os.altsep and os.altsep in run_id) or run_id.startswith("."):
+            return None
+        for suffix in RUN_SUFFIXES:
+            path = os.path.join(self.runs_dir, run_id + suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def exists(self, run_id: str) -> bool:
+        with self._lock:
+            if run_id in self._pending:
+                return True
+        return self.path_for(run_id) is not None
+
+    # -------- Internals --------
+    def _path(self, run_id: str, compress: bool) -> str:
+        return os.path.join(self.runs_dir, run_id + (".json.gz" if compress else ".json"))
+
+    def _write(self, run_id: str, run: Dict[str, Any], path: str) -> None:
+        try:
+            with timed("run_persistence"):
+                payload = json.dumps(run, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                if self.compress:
+                    payload = gzip.compress(payload, compresslevel=6)
+                fd, tmp = tempfile.mkstemp(prefix=f".{run_id}.", suffix=".tmp", dir=self.runs_dir)
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(payload)
+                    os.chmod(tmp, 0o644)  # mkstemp creates 0600 files
+                    os.replace(tmp, path)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.unlink(tmp)
+                    raise
+                # Drop the other encoding's file so a run never exists twice.
+                other = self._path(run_id, not self.compress)
+                if os.path.exists(other):
+                    os.unlink(other)
+                self._remember(run_id, os.path.getmtime(path), run)
+                self.catalog.record(run, path)
+        except Exception as exc:
+            logging.exception("Failed to persist run %s to %s", run_id, path)
+            with self._lock:
+                self._write_errors += 1
+                if self._pending.get(run_id) is run:
+                    # Still readable from memory; the next flush tries again.
+                    self._failed[run_id] = str(exc)
+            raise
+        with self._lock:
+            self._failed.pop(run_id, None)
+            if self._pending.get(run_id) is run:
+                del self._pending[run_id]
+
+    def _submit(self, run_id: str, run: Dict[str, Any], path: str) -> Future:
+        # Caller holds the lock and adds _forget_future once it is released.
+        future = self._writer.submit(self._write, run_id, run, path)
+        self._futures.add(future)
+        return future
+
+    def _forget_future(self, future: Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
+
+    def _remember(self, run_id: str, mtime: float, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[run_id] = (mtime, data)
+            self._cache.move_to_end(run_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+_store: Optional[RunStore] = None
+_store_lock = threading.Lock()
+
+
+def get_run_store() -> RunStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RunStore(
+                    Config.EXPORT_DIR,
+                    compress=Config.RUN_STORE_GZIP,
+                    write_behind=Config.RUN_STORE_WRITE_BEHIND,
+                    cache_size=Config.RUN_STORE_CACHE_SIZE,
+                )
+                atexit.register(_store.close)
+    return _store
+
 
 def store(run):
-    path = os.path.join(OUT_DIR, f"{run['run_id']}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(run, f, indent=2)
-    return path
+    """Persist a run and return its path (kept for existing callers)."""
+    return get_run_store().save(run)
+
 
 def get(run_id):
-    path = os.path.join(OUT_DIR, f"{run_id}.json")
-    if not os.path.exists(path):
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_run_store().load(run_id)
@@ -0,0 +1,202 @@
+# ---------------------------------------------------------
+# bulk_generate.py
+# Resumable bulk generation over a JSONL file of epics.
+#
+#   python -m src.bulk_generate epics.jsonl out/bulk_output.jsonl --workers 8
+#
+# Each input line is one epic ({"epic_id"|"request_id"|"id", "title",
+# "description"|"body"}). Results are appended to the output JSONL as they
+# complete and the epic id is recorded in a checkpoint file, so a re-run
+# skips everything that already finished.
+# ---------------------------------------------------------
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+
+try:
+    from src.ai_engine import generate_user_stories
+except ImportError:  # pragma: no cover - fallback when run as script
+    from ai_engine import generate_user_stories  # type: ignore
+
+
+def iter_epics(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line_number, epic) lazily; blank and malformed lines are skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning("Skipping malformed JSON on line %s of %s", line_no, path)
+                continue
+            if not isinstance(raw, dict):
+                continue
+            title = str(raw.get("title") or "").strip()
+            description = str(raw.get("description") or raw.get("body") or "").strip()
+            yield line_no, {
+                "epic_id": str(raw.get("epic_id") or raw.get("request_id") or raw.get("id") or f"line-{line_no}"),
+                "title": title or description[:60] or f"Epic {line_no}",
+                "description": description or title,
+            }
+
+
+def load_checkpoint(checkpoint_path: str, output_path: str) -> Set[str]:
+    """
+    Ids of epics that already finished. The output is written before the
+    checkpoint, so at most the last output line can be missing from the
+    checkpoint; it is recovered here. A half-written last line is trimmed.
+    """
+    done: Set[str] = set()
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            done.update(line.strip() for line in f if line.strip())
+
+    if os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            f.seek(end - 1)
+            if f.read(1) != b"\n":
+                # Crash mid-write: drop the partial line so the file stays valid JSONL.
+                end = _last_line_start(f, end)
+                f.truncate(end)
+            if end:
+                start = _last_line_start(f, end - 1)
+                f.seek(start)
+                try:
+                    epic_id = json.loads(f.read(end - start).decode("utf-8")).get("epic_id")
+                except (ValueError, UnicodeDecodeError, AttributeError):
+                    epic_id = None
+                if epic_id:
+                    done.add(str(epic_id))
+    return done
+
+
+def _last_line_start(f, end: int, block: int = 65536) -> int:
+    """Offset just after the last newline before ``end`` (0 if there is none)."""
+    pos = end
+    while pos > 0:
+        step = min(block, pos)
+        pos -= step
+        f.seek(pos)
+        nl = f.read(step).rfind(b"\n")
+        if nl != -1:
+            return pos + nl + 1
+    return 0
+
+
+def run_bulk(
+    input_path: str,
+    output_path: str,
+    *,
+    workers: int = 4,
+    checkpoint_path: Optional[str] = None,
+    use_cache: bool = True,
+    limit: Optional[int] = None,
+    generate: Optional[Callable[..., Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Generate every epic in ``input_path`` not yet in the checkpoint.
+
+    Epics whose result is mock ``fallback`` output (the live call failed)
+    count as failed and are neither written nor checkpointed.
+    """
+    generate = generate or generate_user_stories
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    done = load_checkpoint(checkpoint_path, output_path)
+    summary = {"skipped": 0, "generated": 0, "failed": 0}
+    started = time.perf_counter()
+
+    def _work(line_no: int, epic: Dict[str, Any]) -> Dict[str, Any]:
+        result = generate(
+            epic["description"],
+            epic["title"],
+            epic_id=epic["epic_id"],
+            epic_description=epic["description"],
+            use_cache=use_cache,
+        )
+        return {"line": line_no, **result, "epic_id": epic["epic_id"]}
+
+    max_in_flight = max(1, workers) * 2  # bounded so huge inputs never sit in memory
+    in_flight: Dict[Future, str] = {}
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as ckpt, \
+            ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bulk-gen") as pool:
+
+        def _drain(block_until: int) -> None:
+            while len(in_flight) > block_until:
+                finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    epic_id = in_flight.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as exc:
+                        summary["failed"] += 1
+                        logging.error("Epic %s failed: %s", epic_id, exc)
+                        continue
+                    if record.get("fallback"):
+                        # Mock output standing in for a failed live call: leave
+                        # the epic out of the checkpoint so a re-run retries it.
+                        summary["failed"] += 1
+                        logging.error("Epic %s failed: live model call fell back to mock output", epic_id)
+                        continue
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    ckpt.write(epic_id + "\n")
+                    ckpt.flush()
+                    done.add(epic_id)
+                    summary["generated"] += 1
+                    if summary["generated"] % 50 == 0:
+                        print(f" {summary['generated']} epic(s) written to {output_path}", file=sys.stderr)
+
+        submitted = 0
+        for line_no, epic in iter_epics(input_path):
+            if epic["epic_id"] in done or epic["epic_id"] in in_flight.values():
+                summary["skipped"] += 1
+                continue
+            if limit is not None and submitted >= limit:
+                break
+            in_flight[pool.submit(_work, line_no, epic)] = epic["epic_id"]
+            submitted += 1
+            _drain(max_in_flight - 1)
+        _drain(0)
+
+    summary["elapsed_sec"] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Resumable bulk generation over a JSONL file of epics.")
+    parser.add_argument("input", help="JSONL file, one epic per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=4, help="parallel generations (default 4)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default <output>.checkpoint)")
+    parser.add_argument("--limit", type=int, help="stop after submitting this many new epics")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    summary = run_bulk(
+        args.input,
+        args.output,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        use_cache=not args.no_cache,
+        limit=args.limit,
+    )
+    print(f" Bulk generation finished: {summary['generated']} generated, "
+          f"{summary['skipped']} skipped, {summary['failed']} failed in {summary['elapsed_sec']}s.")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,13 @@
 # src/chat_agent.py
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 try:
     from src import ai_engine
 except ImportError:
     import ai_engine  # type: ignore
 
-print("Loaded chat_agent from:", __file__)
-
 @dataclass
 class ChatMessage:
     role: str
@@ -28,12 +26,31 @@ class ChatMessage:
         )
 
 
+def _error_result(user_text: str, exc: Optional[Exception]) -> Dict[str, Any]:
+    return {
+        "Epic": user_text,
+        "epic_id": None,
+        "description": user_text,
+        "UserStories": [],
+        "TestCases": [],
+        "error": str(exc) if exc is not None else "No result from the generator",
+    }
+
+
 class EpicChatAgent:
     def __init__(self, history: Optional[List[ChatMessage]] = None) -> None:
         self.history: List[ChatMessage] = history or []
 
-    def serialise_history(self) -> List[Dict[str, Any]]:
-        return [m.to_dict() for m in self.history]
+    def serialise_history(self, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The conversation as dicts; ``last`` limits it to the most recent messages."""
+        messages = self.history if last is None else self.history[-last:] if last > 0 else []
+        return [m.to_dict() for m in messages]
+
+    def trim_history(self, max_turns: int) -> None:
+        """Keep only the last ``max_turns`` user/assistant exchanges."""
+        keep = max(0, max_turns) * 2
+        if len(self.history) > keep:
+            del self.history[:len(self.history) - keep]
 
     def respond(self, user_text: str) -> ChatMessage:
         self.history.append(ChatMessage(role="user", content=user_text))
@@ -46,17 +63,39 @@ class EpicChatAgent:
                 epic_description=user_text,
             )
         except Exception as exc:
-            result = {
-                "Epic": user_text,
-                "epic_id": None,
-                "description": user_text,
-                "UserStories": [],
-                "TestCases": [],
-                "error": str(exc),
-            }
+            result = _error_result(user_text, exc)
+
+        return self._reply(user_text, result)
 
-        # add inside EpicChatAgent.respond(), right after you get `result`:
+    def respond_stream(self, user_text: str) -> Iterator[Dict[str, Any]]:
+        """Like :meth:`respond`, but yields the engine's ``delta``/``story``
+        events while the reply is generated and ends with
+        ``{"type": "reply", "reply": ChatMessage}``.
+
+        The user turn joins the history only together with its reply, so a
+        client that disconnects mid-stream leaves the history unchanged."""
+        result: Optional[Dict[str, Any]] = None
+        events = ai_engine.stream_user_stories(
+            user_text,
+            user_text,
+            epic_id=None,
+            epic_description=user_text,
+        )
+        try:
+            for event in events:
+                if event["type"] == "result":
+                    result = event["result"]
+                else:
+                    yield event
+        except Exception as exc:
+            result = _error_result(user_text, exc)
+        finally:
+            events.close()  # releases the model stream when we are closed early
+
+        self.history.append(ChatMessage(role="user", content=user_text))
+        yield {"type": "reply", "reply": self._reply(user_text, result or _error_result(user_text, None))}
 
+    def _reply(self, user_text: str, result: Dict[str, Any]) -> ChatMessage:
         stories = result.get("UserStories") or []
         if not stories:
             # deterministic fallback so the table is not empty
@@ -0,0 +1,140 @@
+# ---------------------------------------------------------
+# circuit_breaker.py
+# Circuit breaker around the live model.
+#
+#   closed    -> calls go through; consecutive failures are counted
+#   open      -> calls are refused at once (callers use the mock fallback)
+#   half_open -> after the cooldown one probe call is let through; success
+#                closes the circuit, failure opens it for another cooldown,
+#                and an outcome that counts neither way (e.g. a 429) must
+#                hand the probe back with release_probe()
+# ---------------------------------------------------------
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    from src.config import Config
+except ImportError:  # pragma: no cover - fallback when run as script
+    from config import Config  # type: ignore
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the model while the circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown_sec: float = 30.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_sec = cooldown_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._stats = {"opened": 0, "short_circuited": 0, "failures": 0, "successes": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow_request(self) -> bool:
+        """True if a call may go to the model now (at most one probe while half-open)."""
+        return self._admit()[0]
+
+    def check(self) -> bool:
+        """Raise :class:`CircuitOpenError` unless a call may go through.
+
+        Returns True when the caller holds the half-open probe; it must then
+        end in :meth:`record_success`, :meth:`record_failure` or
+        :meth:`release_probe`.
+        """
+        allowed, probe = self._admit()
+        if not allowed:
+            raise CircuitOpenError("Live model circuit is open; using fallback")
+        return probe
+
+    def release_probe(self) -> None:
+        """Give back the half-open probe without counting an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._stats["successes"] += 1
+            self._failures = 0
+            self._probe_in_flight = False
+            self._state = CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            state = self._current_state()
+            if state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != OPEN:
+                    self._stats["opened"] += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            out: Dict[str, Any] = {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown_sec": self.cooldown_sec,
+                **self._stats,
+            }
+            if state == OPEN:
+                out["retry_in_sec"] = round(max(0.0, self._opened_at + self.cooldown_sec - self._clock()), 2)
+            return out
+
+    def _admit(self) -> Tuple[bool, bool]:
+        """(allowed, holds_probe) for one caller."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True, False
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True, True
+            self._stats["short_circuited"] += 1
+            return False, False
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown_sec:
+            self._state = HALF_OPEN
+        return self._state
+
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """Return the process-wide breaker for the live model, or None when disabled."""
+    global _breaker
+    if not Config.CIRCUIT_BREAKER_ENABLED:
+        return None
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_COOLDOWN_SEC)
+    return _breaker
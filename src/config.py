@@ -1,5 +1,8 @@
 import os
 from dotenv import load_dotenv
+
+# The one place .env is read; every other module imports Config (or this
+# module) instead of loading it again.
 load_dotenv()
 
 class Config:
@@ -7,6 +10,10 @@ class Config:
     PORT = int(os.getenv("PORT", 5000))
     DATA_SOURCE = os.getenv("DATA_SOURCE", "mock")   # mock | jira
     EXPORT_DIR = os.getenv("EXPORT_DIR", "./runs_data")
+    RUN_CATALOG_PATH = os.getenv("RUN_CATALOG_PATH", "")  # defaults to <EXPORT_DIR>/catalog.sqlite3
+    RUN_STORE_GZIP = os.getenv("RUN_STORE_GZIP", "false").lower() == "true"  # write <run_id>.json.gz
+    RUN_STORE_WRITE_BEHIND = os.getenv("RUN_STORE_WRITE_BEHIND", "true").lower() == "true"
+    RUN_STORE_CACHE_SIZE = int(os.getenv("RUN_STORE_CACHE_SIZE", 64))  # runs kept parsed in memory
 
     # Jira (only used if DATA_SOURCE=jira)
     JIRA_BASE_URL = os.getenv("JIRA_BASE_URL")
@@ -15,5 +22,51 @@ class Config:
     JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
 
     MAX_EPICS_PER_REQUEST = int(os.getenv("MAX_EPICS_PER_REQUEST", 10))
+    GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", 4))  # parallel model calls per request
+    GENERATION_BACKEND = os.getenv("GENERATION_BACKEND", "threads")  # threads | async
+    ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", 64))  # in-flight calls on the async backend
+    GENERATION_BATCH_SIZE = int(os.getenv("GENERATION_BATCH_SIZE", 1))  # epics per model call (1 = no batching)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))         # background workers for async generation jobs
+    JOB_RETENTION = int(os.getenv("JOB_RETENTION", 200))   # finished jobs kept for polling
     REQUEST_TIMEOUT_SEC = int(os.getenv("REQUEST_TIMEOUT_SEC", 20))
     RETRY_COUNT = int(os.getenv("RETRY_COUNT", 2))
+
+    # Response cache for live model calls (memory LRU + disk store)
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "./.cache/responses")
+    RESPONSE_CACHE_TTL_SEC = int(os.getenv("RESPONSE_CACHE_TTL_SEC", 7 * 24 * 3600))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 256))
+    RESPONSE_CACHE_MAX_DISK_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_DISK_ENTRIES", 5000))
+
+    # Shared OpenAI rate limiter (quota per minute; learned from response headers when present)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    OPENAI_RPM_LIMIT = float(os.getenv("OPENAI_RPM_LIMIT", 500))
+    OPENAI_TPM_LIMIT = float(os.getenv("OPENAI_TPM_LIMIT", 200000))
+    RATE_LIMIT_HEADROOM = float(os.getenv("RATE_LIMIT_HEADROOM", 0.9))  # aim just under the quota
+    RATE_LIMIT_COMPLETION_ESTIMATE = int(os.getenv("RATE_LIMIT_COMPLETION_ESTIMATE", 1500))  # tokens per reply
+
+    # Token usage / cost accounting
+    MODEL_PRICES_JSON = os.getenv("MODEL_PRICES_JSON", "")  # {"model": [usd_per_1m_input, usd_per_1m_output]}
+    USAGE_WINDOW_SEC = int(os.getenv("USAGE_WINDOW_SEC", 3600))  # rolling window on /health
+
+    # Circuit breaker around the live model (open -> straight to the mock fallback)
+    CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))  # consecutive failed calls
+    CIRCUIT_COOLDOWN_SEC = float(os.getenv("CIRCUIT_COOLDOWN_SEC", 30))  # before a half-open probe
+
+    # Server-side chat sessions (the client only sends its session id and the new message)
+    CHAT_SESSION_MAX = int(os.getenv("CHAT_SESSION_MAX", 1000))        # sessions kept in memory (LRU)
+    CHAT_SESSION_TTL_SEC = int(os.getenv("CHAT_SESSION_TTL_SEC", 3600))  # idle time before a session expires
+    CHAT_MAX_TURNS = int(os.getenv("CHAT_MAX_TURNS", 20))              # user/assistant pairs retained per session
+
+    # Near-duplicate user story detection (MinHash/LSH, src/dedupe.py)
+    STORY_DEDUPE_ENABLED = os.getenv("STORY_DEDUPE_ENABLED", "false").lower() == "true"
+    STORY_DEDUPE_THRESHOLD = float(os.getenv("STORY_DEDUPE_THRESHOLD", 0.8))  # shingle Jaccard to merge at
+    STORY_DEDUPE_NUM_PERM = int(os.getenv("STORY_DEDUPE_NUM_PERM", 64))       # MinHash signature length
+
+    # Production server (python -m src.backend.serve)
+    SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+    SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", 1))           # worker processes; jobs/sessions/limits are per process
+    SERVE_THREADS = int(os.getenv("SERVE_THREADS", 8))           # request threads per worker
+    SERVE_TIMEOUT_SEC = int(os.getenv("SERVE_TIMEOUT_SEC", 120))  # a silent worker is restarted after this
+    SERVE_GRACEFUL_TIMEOUT_SEC = int(os.getenv("SERVE_GRACEFUL_TIMEOUT_SEC", 60))  # drain window on SIGTERM
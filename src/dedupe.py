@@ -0,0 +1,327 @@
+# ---------------------------------------------------------
+# dedupe.py
+# Near-duplicate user story detection across all epics of a run.
+#
+# Each story's text (title, description, Given/When/Then) is cut into
+# word shingles and summarised by a MinHash signature. Locality-sensitive
+# hashing (signature bands -> buckets) proposes candidate pairs, so the
+# cost grows with the number of stories rather than the number of pairs;
+# candidates are then confirmed with their exact shingle Jaccard.
+#
+# Stories are taken in run order: a story that matches an earlier kept
+# story at or above the threshold is merged into it, otherwise it is kept.
+# Test cases are only dropped with a merged story when they name it (a
+# story reference or the story's title); model output does not pair the
+# two lists by position, so every other test case is kept.
+# ---------------------------------------------------------
+from __future__ import annotations
+
+import itertools
+import logging
+import random
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    from src.config import Config
+    from src.metrics import timed
+except ImportError:  # pragma: no cover - fallback when run as script
+    from config import Config  # type: ignore
+    from metrics import timed  # type: ignore
+
+_MASK_64 = (1 << 64) - 1
+_MAX_HASH = (1 << 32) - 1
+_BAND_MULTIPLIER = 0x100000001B3  # FNV-1a 64-bit prime
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def story_text(story: Dict[str, Any]) -> str:
+    ac = story.get("acceptance_criteria") or {}
+    parts = [story.get("title"), story.get("description")]
+    if isinstance(ac, dict):
+        parts += [ac.get("Given"), ac.get("When"), ac.get("Then")]
+    return " ".join(str(p) for p in parts if p)
+
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """32-bit hashes of the lower-cased word ``size``-grams of ``text``."""
+    # crc32 per word, then the (process-independent) hash of int tuples, so
+    # signatures and decisions are the same on every run.
+    ids = [zlib.crc32(word.encode("utf-8")) for word in _WORD_RE.findall(text.lower())]
+    if not ids:
+        return set()
+    if len(ids) < size:
+        return {hash(tuple(ids)) & _MAX_HASH}
+    return {hash(gram) & _MAX_HASH for gram in zip(*(ids[k:] for k in range(size)))}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) with ``bands * rows <= num_perm`` whose S-curve midpoint is nearest ``threshold``."""
+    best = (num_perm, 1)
+    best_gap = float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        gap = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best
+
+
+class MinHasher:
+    """MinHash signatures from ``num_perm`` multiply-shift hash functions.
+
+    ``h(x) = ((a*x + b) mod 2**64) >> 32`` with random odd ``a``: no modulo,
+    so numpy evaluates it over every shingle of the run in one pass per
+    hash function, and plain Python gives the same values.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.a = [rng.getrandbits(64) | 1 for _ in range(num_perm)]
+        self.b = [rng.getrandbits(64) for _ in range(num_perm)]
+
+    def signatures(self, shingle_sets: Sequence[Set[int]]) -> List[Tuple[int, ...]]:
+        """One signature per set (empty sets get an empty tuple)."""
+        np = _numpy()
+        if np is None:
+            return [self._signature_python(s) for s in shingle_sets]
+        nonempty, minima = self._minima(np, shingle_sets)
+        out: List[Tuple[int, ...]] = [() for _ in shingle_sets]
+        for index, signature in zip(nonempty, minima.T.tolist()):
+            out[index] = tuple(signature)
+        return out
+
+    def band_keys(self, shingle_sets: Sequence[Set[int]], bands: int, rows: int) -> List[Optional[List[int]]]:
+        """Per set, one 64-bit key per LSH band (None for empty sets).
+
+        Equal keys mean equal signature rows in that band (up to 64-bit
+        hash collisions, which the exact Jaccard check filters out).
+        """
+        np = _numpy()
+        if np is None:
+            return [_band_keys_python(self._signature_python(s), bands, rows) for s in shingle_sets]
+        nonempty, minima = self._minima(np, shingle_sets)
+        grouped = minima[:bands * rows].reshape(bands, rows, -1)
+        keys = np.zeros((bands, len(nonempty)), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for row in range(rows):
+                keys = keys * np.uint64(_BAND_MULTIPLIER) + grouped[:, row, :]
+        out: List[Optional[List[int]]] = [None] * len(shingle_sets)
+        for index, story_keys in zip(nonempty, keys.T.tolist()):
+            out[index] = story_keys
+        return out
+
+    def _minima(self, np, shingle_sets: Sequence[Set[int]]):
+        """(indices of non-empty sets, num_perm x len(indices) array of minimum hashes)."""
+        lengths = [len(s) for s in shingle_sets]
+        nonempty = [i for i, n in enumerate(lengths) if n]
+        minima = np.empty((self.num_perm, len(nonempty)), dtype=np.uint64)
+        if not nonempty:
+            return nonempty, minima
+        values = np.fromiter(itertools.chain.from_iterable(shingle_sets), dtype=np.uint64, count=sum(lengths))
+        # Each set's shingles are one contiguous slice of ``values``.
+        starts = np.cumsum([0] + [lengths[i] for i in nonempty][:-1], dtype=np.int64)
+        shift = np.uint64(32)
+        with np.errstate(over="ignore"):  # the mod 2**64 wrap-around is intended
+            for row, (a, b) in enumerate(zip(self.a, self.b)):
+                hashed = (values * np.uint64(a) + np.uint64(b)) >> shift
+                minima[row] = np.minimum.reduceat(hashed, starts)
+        return nonempty, minima
+
+    def _signature_python(self, values: Set[int]) -> Tuple[int, ...]:
+        if not values:
+            return ()
+        return tuple(
+            min(((a * v + b) & _MASK_64) >> 32 for v in values)
+            for a, b in zip(self.a, self.b)
+        )
+
+
+def _band_keys_python(signature: Tuple[int, ...], bands: int, rows: int) -> Optional[List[int]]:
+    if not signature:
+        return None
+    keys = []
+    for band in range(bands):
+        key = 0
+        for value in signature[band * rows:(band + 1) * rows]:
+            key = (key * _BAND_MULTIPLIER + value) & _MASK_64
+        keys.append(key)
+    return keys
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover - numpy ships with pandas, but stay usable without it
+        return None
+    return numpy
+
+
+@dataclass
+class DedupeResult:
+    threshold: float
+    decisions: List[Dict[str, Any]] = field(default_factory=list)
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def merged(self) -> List[Dict[str, Any]]:
+        return [d for d in self.decisions if d["action"] == "merge"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"threshold": self.threshold, "decisions": self.decisions, "stats": self.stats}
+
+
+def _ref(epics: Sequence[Dict[str, Any]], epic_index: int, story_index: int) -> Dict[str, Any]:
+    epic = epics[epic_index]
+    story = (epic.get("UserStories") or [])[story_index]
+    return {
+        "epic_index": epic_index,
+        "epic_id": epic.get("epic_id"),
+        "story_index": story_index,
+        "title": story.get("title") if isinstance(story, dict) else None,
+    }
+
+
+def find_duplicates(
+    epics: Sequence[Dict[str, Any]],
+    threshold: Optional[float] = None,
+    *,
+    num_perm: Optional[int] = None,
+    shingle_size: int = 3,
+    seed: int = 1,
+) -> DedupeResult:
+    """Merge/keep decisions for every story that has a near-duplicate.
+
+    A ``merge`` decision names the kept story it folds ``into`` and their
+    Jaccard similarity; the kept story gets a ``keep`` decision listing how
+    many stories merged into it. Stories without duplicates get no decision.
+    """
+    threshold = Config.STORY_DEDUPE_THRESHOLD if threshold is None else float(threshold)
+    num_perm = num_perm or Config.STORY_DEDUPE_NUM_PERM
+    started = time.perf_counter()
+
+    refs: List[Tuple[int, int]] = []
+    sets: List[Set[int]] = []
+    for e_idx, epic in enumerate(epics):
+        for s_idx, story in enumerate(epic.get("UserStories") or []):
+            if isinstance(story, dict):
+                refs.append((e_idx, s_idx))
+                sets.append(shingles(story_text(story), shingle_size))
+
+    bands, rows = lsh_params(threshold, num_perm)
+    all_keys = MinHasher(num_perm, seed).band_keys(sets, bands, rows)
+    buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+    merged_into: Dict[int, Tuple[int, float]] = {}
+    absorbed: Dict[int, int] = {}
+    candidates_checked = 0
+
+    for i, keys in enumerate(all_keys):
+        if keys is None:
+            continue
+        candidates: Set[int] = set()
+        for band, key in enumerate(keys):
+            candidates.update(buckets[band].get(key, ()))
+        best, best_sim = -1, 0.0
+        for j in sorted(candidates):
+            candidates_checked += 1
+            sim = jaccard(sets[i], sets[j])
+            if sim >= threshold and sim > best_sim:
+                best, best_sim = j, sim
+        if best >= 0:
+            merged_into[i] = (best, best_sim)
+            absorbed[best] = absorbed.get(best, 0) + 1
+            continue
+        # Only kept stories are indexed, so every merge targets a kept story.
+        for band, key in enumerate(keys):
+            buckets[band].setdefault(key, []).append(i)
+
+    result = DedupeResult(threshold=threshold)
+    for i, (e_idx, s_idx) in enumerate(refs):
+        if i in absorbed:
+            result.decisions.append({"action": "keep", **_ref(epics, e_idx, s_idx), "merged": absorbed[i]})
+        elif i in merged_into:
+            j, sim = merged_into[i]
+            result.decisions.append({
+                "action": "merge",
+                **_ref(epics, e_idx, s_idx),
+                "into": _ref(epics, *refs[j]),
+                "similarity": round(sim, 4),
+            })
+    result.stats = {
+        "stories": len(refs),
+        "merged": len(merged_into),
+        "kept": len(refs) - len(merged_into),
+        "candidate_pairs": candidates_checked,
+        "num_perm": num_perm,
+        "bands": bands,
+        "rows": rows,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+    return result
+
+
+# Test case fields that may name the story a test case belongs to.
+_STORY_REF_KEYS = ("story", "story_id", "story_title", "user_story", "title")
+
+
+def _story_names(story: Any) -> Set[str]:
+    if not isinstance(story, dict):
+        return set()
+    return {str(v).strip().casefold() for v in (story.get("id"), story.get("title")) if v}
+
+
+def _test_refs(test: Any) -> Set[str]:
+    if not isinstance(test, dict):
+        return set()
+    return {str(test[key]).strip().casefold() for key in _STORY_REF_KEYS if test.get(key)}
+
+
+def apply_decisions(epics: Iterable[Dict[str, Any]], result: DedupeResult) -> List[Dict[str, Any]]:
+    """Copies of ``epics`` without the stories the result merges away (inputs are not modified).
+
+    A test case goes with a merged story only if it names that story and no
+    story the epic keeps; all other test cases stay.
+    """
+    drop: Dict[int, Set[int]] = {}
+    for decision in result.merged:
+        drop.setdefault(decision["epic_index"], set()).add(decision["story_index"])
+    out = []
+    for e_idx, epic in enumerate(epics):
+        gone = drop.get(e_idx)
+        if not gone:
+            out.append(epic)
+            continue
+        all_stories = epic.get("UserStories") or []
+        stories = [s for s_idx, s in enumerate(all_stories) if s_idx not in gone]
+        merged_names = set().union(*(_story_names(all_stories[s_idx]) for s_idx in gone if s_idx < len(all_stories)))
+        kept_names = set().union(*(_story_names(s) for s in stories))
+        tests = [
+            t for t in epic.get("TestCases") or []
+            if not (_test_refs(t) & merged_names) or _test_refs(t) & kept_names
+        ]
+        out.append({**epic, "UserStories": stories, "TestCases": tests})
+    return out
+
+
+def dedupe_stories(
+    epics: Sequence[Dict[str, Any]],
+    threshold: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], DedupeResult]:
+    """Find near-duplicate stories and drop the merged ones; returns ``(epics, result)``."""
+    with timed("story_dedupe"):
+        result = find_duplicates(epics, threshold)
+        cleaned = apply_decisions(epics, result)
+    if result.merged:
+        logging.info("Story dedupe merged %s of %s stories (threshold %.2f)",
+                     result.stats["merged"], result.stats["stories"], result.threshold)
+    return cleaned, result
@@ -1,14 +1,35 @@
 # ---------------------------------------------------------
 # evaluation.py
+# Quality metrics for generated output.
+#
+#   python -m src.evaluation                       # score out/sample_output.json
+#   python -m src.evaluation --corpus runs_data --out out/corpus_eval.csv
+#
+# Corpus mode scores every run in a runs directory (plain or gzipped)
+# in a process pool: compute_metrics plus schema validity per run and,
+# with --epics, per epic. Rows are written as they arrive, with at most a
+# few runs in flight per worker, so memory stays flat however many runs
+# there are. Aggregates by project and mode go to a second file.
 # ---------------------------------------------------------
+import argparse
+import csv
 import json
 import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
 
 try:
-    from src.validators import validate_output
+    from src.backend.services.runs import RUN_SUFFIXES, read_run_file
+    from src.config import Config
+    from src.validators import validate_epics, validate_output
     from src.heuristics import compute_metrics
 except ImportError:  # pragma: no cover - fallback when run as script
-    from validators import validate_output  # type: ignore
+    from backend.services.runs import RUN_SUFFIXES, read_run_file  # type: ignore
+    from config import Config  # type: ignore
+    from validators import validate_epics, validate_output  # type: ignore
     from heuristics import compute_metrics  # type: ignore
 
 def load_output(path):
@@ -67,5 +88,301 @@ def run_evaluation():
             print(" -", e)
 
 
+# ---------------------------------------------------------
+# Corpus evaluation over a runs directory
+# ---------------------------------------------------------
+def _column(metric_name):
+    """"Story Count Completeness" -> "story_count_completeness"."""
+    return re.sub(r"[^a-z0-9]+", "_", metric_name.lower()).strip("_")
+
+
+METRIC_COLUMNS = [_column(name) for name in compute_metrics([])]
+RUN_COLUMNS = [
+    "run_id", "project_name", "mode", "generated_at", "path", "format",
+    "epics", "stories", "test_cases", "schema_passed", "schema_errors",
+    *METRIC_COLUMNS, "error",
+]
+EPIC_COLUMNS = [
+    "run_id", "project_name", "mode", "epic_index", "epic_id",
+    "stories", "test_cases", "schema_passed", "schema_errors", *METRIC_COLUMNS,
+]
+AGGREGATE_COLUMNS = [
+    "project_name", "mode", "runs", "unreadable", "epics", "stories", "test_cases",
+    "run_schema_pass_rate", "epic_schema_pass_rate", *(f"mean_{c}" for c in METRIC_COLUMNS),
+]
+ALL = "ALL"
+
+
+def iter_run_paths(runs_dir):
+    """Run files in ``runs_dir`` in name order (temp and hidden files skipped)."""
+    with os.scandir(runs_dir) as entries:
+        names = sorted(e.name for e in entries if e.is_file() and not e.name.startswith("."))
+    for name in names:
+        if name.endswith(RUN_SUFFIXES):
+            yield os.path.join(runs_dir, name)
+
+
+def _run_epics(run):
+    """(format, epics) of a stored run.
+
+    Older runs kept ``output.stories`` with plain story titles and test ids;
+    those are shaped like current epics so they score on the same scale
+    (they have no acceptance criteria and fail the schema).
+    """
+    output = run.get("output") or {}
+    epics = output.get("epics") if isinstance(output, dict) else None
+    if isinstance(epics, list):
+        return "epics", [e for e in epics if isinstance(e, dict)]
+    legacy = output.get("stories") if isinstance(output, dict) else None
+    if not isinstance(legacy, list):
+        return "empty", []
+    adapted = []
+    for epic in legacy:
+        if not isinstance(epic, dict):
+            continue
+        adapted.append({
+            "epic_id": epic.get("epic_id"),
+            "UserStories": [s if isinstance(s, dict) else {"title": str(s)} for s in epic.get("stories") or []],
+            "TestCases": [t if isinstance(t, dict) else {"id": str(t)} for t in epic.get("test_cases") or []],
+        })
+    return "legacy", adapted
+
+
+def _metric_columns(epics):
+    return {_column(name): round(value, 2) for name, value in compute_metrics(epics).items()}
+
+
+def evaluate_run(path, with_epics=False):
+    """Score one run file; returns ``(run_row, epic_rows)``.
+
+    Runs in the worker processes, so it only takes and returns plain data.
+    An unreadable file gives a row with ``error`` set instead of raising.
+    """
+    run_id = os.path.basename(path)
+    for suffix in RUN_SUFFIXES:
+        if run_id.endswith(suffix):
+            run_id = run_id[: -len(suffix)]
+            break
+    row = {"run_id": run_id, "path": path}
+    try:
+        run = read_run_file(path)
+        if not isinstance(run, dict):
+            raise ValueError("run is not a JSON object")
+    except Exception as exc:
+        row.update(project_name="unknown", mode="unknown", error=str(exc)[:200])
+        return row, []
+
+    fmt, epics = _run_epics(run)
+    per_epic_errors = validate_epics(epics) if epics else []
+    row.update({
+        "run_id": run.get("run_id") or run_id,
+        "project_name": run.get("project_name") or "unknown",
+        "mode": run.get("mode") or "unknown",
+        "generated_at": run.get("generated_at"),
+        "format": fmt,
+        "epics": len(epics),
+        "stories": sum(len(e.get("UserStories") or []) for e in epics),
+        "test_cases": sum(len(e.get("TestCases") or []) for e in epics),
+        "schema_passed": bool(epics) and not any(per_epic_errors),
+        "schema_errors": sum(len(errors) for errors in per_epic_errors),
+        **_metric_columns(epics),
+    })
+    if not with_epics:
+        return row, []
+    epic_rows = []
+    for index, (epic, errors) in enumerate(zip(epics, per_epic_errors)):
+        epic_rows.append({
+            "run_id": row["run_id"],
+            "project_name": row["project_name"],
+            "mode": row["mode"],
+            "epic_index": index,
+            "epic_id": epic.get("epic_id"),
+            "stories": len(epic.get("UserStories") or []),
+            "test_cases": len(epic.get("TestCases") or []),
+            "schema_passed": not errors,
+            "schema_errors": len(errors),
+            **_metric_columns([epic]),
+        })
+    return row, epic_rows
+
+
+class _RowWriter:
+    """Append rows to a CSV (by ``.csv`` extension) or JSONL file."""
+
+    def __init__(self, path, columns):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._csv = None
+        if path.lower().endswith(".csv"):
+            self._csv = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, row):
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class _Aggregates:
+    """Running totals per (project, mode), plus an ALL/ALL row for the corpus."""
+
+    def __init__(self):
+        self._groups = {}
+
+    def add(self, run_row, epic_passes):
+        for key in ((run_row["project_name"], run_row["mode"]), (ALL, ALL)):
+            group = self._groups.setdefault(key, {
+                "runs": 0, "unreadable": 0, "epics": 0, "stories": 0, "test_cases": 0,
+                "runs_passed": 0, "epics_checked": 0, "epics_passed": 0,
+                "metrics": dict.fromkeys(METRIC_COLUMNS, 0.0),
+            })
+            group["runs"] += 1
+            if run_row.get("error"):
+                group["unreadable"] += 1
+                continue
+            for field in ("epics", "stories", "test_cases"):
+                group[field] += run_row[field]
+            group["runs_passed"] += 1 if run_row["schema_passed"] else 0
+            if epic_passes is not None:
+                group["epics_checked"] += len(epic_passes)
+                group["epics_passed"] += sum(epic_passes)
+            for column in METRIC_COLUMNS:
+                group["metrics"][column] += run_row[column]
+
+    def rows(self):
+        out = []
+        for (project, mode), group in sorted(self._groups.items(), key=lambda kv: (kv[0] == (ALL, ALL), kv[0])):
+            scored = group["runs"] - group["unreadable"]
+            row = {
+                "project_name": project,
+                "mode": mode,
+                **{k: group[k] for k in ("runs", "unreadable", "epics", "stories", "test_cases")},
+                "run_schema_pass_rate": round(100.0 * group["runs_passed"] / scored, 2) if scored else None,
+                "epic_schema_pass_rate": (
+                    round(100.0 * group["epics_passed"] / group["epics_checked"], 2) if group["epics_checked"] else None
+                ),
+            }
+            for column in METRIC_COLUMNS:
+                row[f"mean_{column}"] = round(group["metrics"][column] / scored, 2) if scored else None
+            out.append(row)
+        return out
+
+
+def _aggregates_path(out_path):
+    root, ext = os.path.splitext(out_path)
+    return f"{root}.aggregates{ext or '.jsonl'}"
+
+
+def evaluate_corpus(
+    runs_dir,
+    out_path,
+    *,
+    epics_path=None,
+    aggregates_path=None,
+    workers=None,
+    max_in_flight=None,
+):
+    """Score every run in ``runs_dir`` and write run rows to ``out_path``.
+
+    Per-epic rows go to ``epics_path`` when given; aggregates by project
+    and mode go to ``aggregates_path`` (default ``<out>.aggregates.<ext>``).
+    ``workers=0`` scores in this process. Returns a summary dict.
+    """
+    aggregates_path = aggregates_path or _aggregates_path(out_path)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    max_in_flight = max_in_flight or max(1, workers) * 4
+    score = partial(evaluate_run, with_epics=True)
+    aggregates = _Aggregates()
+    started = time.perf_counter()
+
+    run_writer = _RowWriter(out_path, RUN_COLUMNS)
+    epic_writer = _RowWriter(epics_path, EPIC_COLUMNS) if epics_path else None
+
+    def _record(result):
+        run_row, epic_rows = result
+        run_writer.write(run_row)
+        if epic_writer is not None:
+            for epic_row in epic_rows:
+                epic_writer.write(epic_row)
+        aggregates.add(run_row, None if run_row.get("error") else [r["schema_passed"] for r in epic_rows])
+
+    try:
+        if workers <= 0:
+            for path in iter_run_paths(runs_dir):
+                _record(score(path))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = set()
+                for path in iter_run_paths(runs_dir):
+                    in_flight.add(pool.submit(score, path))
+                    while len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            _record(future.result())
+                for future in wait(in_flight).done:
+                    _record(future.result())
+    finally:
+        run_writer.close()
+        if epic_writer is not None:
+            epic_writer.close()
+
+    aggregate_rows = aggregates.rows()
+    aggregate_writer = _RowWriter(aggregates_path, AGGREGATE_COLUMNS)
+    try:
+        for row in aggregate_rows:
+            aggregate_writer.write(row)
+    finally:
+        aggregate_writer.close()
+
+    overall = aggregate_rows[-1] if aggregate_rows else {"runs": 0, "unreadable": 0}
+    return {
+        "runs": overall["runs"],
+        "unreadable": overall["unreadable"],
+        "groups": len(aggregate_rows) - 1 if aggregate_rows else 0,
+        "out": out_path,
+        "epics_out": epics_path,
+        "aggregates_out": aggregates_path,
+        "overall": overall,
+        "elapsed_sec": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score generated output against the schema and quality heuristics.")
+    parser.add_argument("--corpus", nargs="?", const=Config.EXPORT_DIR, metavar="RUNS_DIR",
+                        help=f"score every run in RUNS_DIR (default {Config.EXPORT_DIR}) instead of the sample output")
+    parser.add_argument("--out", default=os.path.join("out", "corpus_eval.csv"),
+                        help="run rows, .csv or .jsonl (default out/corpus_eval.csv)")
+    parser.add_argument("--epics", help="also write one row per epic to this .csv/.jsonl file")
+    parser.add_argument("--aggregates", help="aggregates by project and mode (default <out>.aggregates.<ext>)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count, 0 = no pool)")
+    args = parser.parse_args(argv)
+
+    if args.corpus is None:
+        run_evaluation()
+        return 0
+
+    summary = evaluate_corpus(
+        args.corpus,
+        args.out,
+        epics_path=args.epics,
+        aggregates_path=args.aggregates,
+        workers=args.workers,
+    )
+    overall = summary["overall"]
+    print(f" Evaluated {summary['runs']} run(s) in {summary['groups']} project/mode group(s) "
+          f"in {summary['elapsed_sec']}s ({summary['unreadable']} unreadable).")
+    if summary["runs"] > summary["unreadable"]:
+        print(f" Schema pass rate: {overall['run_schema_pass_rate']}% of runs, "
+              f"{overall['epic_schema_pass_rate']}% of epics; mean consistency "
+              f"{overall['mean_overall_consistency_score']}%.")
+    print(f" Rows: {summary['out']}  Aggregates: {summary['aggregates_out']}")
+    return 0
+
+
 if __name__ == "__main__":
-    run_evaluation()
+    sys.exit(main())
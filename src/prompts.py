@@ -10,3 +10,14 @@ USER_PROMPT_TEMPLATE = (
     "and Story Points (1–13). Each test case must include ID, Objective, Expected Result.\n"
     "Return valid JSON with keys 'UserStories' and 'TestCases'."
 )
+
+# Batched variant: several epics in one request, answered per epic_id.
+BATCH_USER_PROMPT_TEMPLATE = (
+    "Given the following epics, each prefixed with its epic_id in brackets:\n"
+    "{epics}\n"
+    "For every epic, generate user stories and test cases in Agile format.\n"
+    "Each story must include Title, Description, Acceptance Criteria (Given/When/Then), "
+    "and Story Points (1–13). Each test case must include ID, Objective, Expected Result.\n"
+    "Return valid JSON with a single key 'Epics' mapping each epic_id to an object "
+    "with keys 'UserStories' and 'TestCases'."
+)
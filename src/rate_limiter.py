@@ -0,0 +1,245 @@
+# ---------------------------------------------------------
+# rate_limiter.py
+# Process-wide token-bucket limiter for OpenAI calls.
+#
+# Two buckets (requests/min and tokens/min) are shared by every thread
+# and coroutine that talks to the model. Callers reserve capacity before
+# each call and wait their turn instead of firing and collecting 429s.
+# The provider's x-ratelimit-* and retry-after headers tune the rate on
+# the fly: limits learned from headers become the ceiling, a 429 halves
+# the current rate and pauses everyone until retry-after, and successful
+# calls creep the rate back up towards the ceiling.
+# ---------------------------------------------------------
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+try:
+    from src.config import Config
+except ImportError:  # pragma: no cover - fallback when run as script
+    from config import Config  # type: ignore
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset/retry values such as ``"20ms"``, ``"1.5s"``, ``"6m0s"`` or ``"2"``."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _UNIT_SECONDS[unit] for n, unit in parts)
+
+
+def estimate_tokens(prompt: str, completion_tokens: Optional[int] = None) -> int:
+    """Rough token cost of one call: ~4 characters per prompt token plus the expected completion."""
+    if completion_tokens is None:
+        completion_tokens = Config.RATE_LIMIT_COMPLETION_ESTIMATE
+    return max(1, len(prompt) // 4 + completion_tokens)
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled at ``rate`` per second up to ``capacity``.
+
+    ``reserve`` may drive the balance negative: the caller is told how long
+    to wait, and later callers queue behind it, so waiting threads are
+    released in order rather than all retrying at once.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: float, now: float) -> None:
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self._last = now
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._last)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._last = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def clamp(self, available: float, now: float) -> None:
+        """Never believe we have more left than the provider says we do."""
+        self._refill(now)
+        self.tokens = min(self.tokens, available)
+
+
+class RateLimiter:
+    """Shared request + token limiter; see the module header for the policy."""
+
+    def __init__(
+        self,
+        requests_per_min: float,
+        tokens_per_min: float,
+        *,
+        headroom: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.headroom = headroom
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        now = clock()
+        # Ceilings are what we aim for; the bucket rates move between a floor and them.
+        self._ceiling = {"requests": requests_per_min * headroom / 60.0, "tokens": tokens_per_min * headroom / 60.0}
+        # Bursts are capped at six seconds' worth of quota.
+        self._buckets = {
+            kind: TokenBucket(rate, max(1.0, rate * 6.0), now) for kind, rate in self._ceiling.items()
+        }
+        self._paused_until = 0.0
+        self._stats: Dict[str, float] = {
+            "acquired": 0,
+            "waited": 0,
+            "wait_time_sec": 0.0,
+            "max_wait_sec": 0.0,
+            "rate_limited": 0,
+        }
+
+    # -------- Reserving capacity --------
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = self._clock()
+            wait = max(
+                self._paused_until - now,
+                self._buckets["requests"].reserve(1, now),
+                self._buckets["tokens"].reserve(tokens, now),
+                0.0,
+            )
+            self._stats["acquired"] += 1
+            if wait > 0:
+                self._stats["waited"] += 1
+                self._stats["wait_time_sec"] += wait
+                self._stats["max_wait_sec"] = max(self._stats["max_wait_sec"], wait)
+            return wait
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Block until one request and ``tokens`` tokens are available; returns seconds waited."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 1) -> float:
+        """Coroutine form of :meth:`acquire` for the asyncio generation path."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the real usage of a call is known."""
+        if actual is None:
+            return
+        with self._lock:
+            now = self._clock()
+            diff = estimated - actual
+            if diff > 0:
+                self._buckets["tokens"].refund(diff, now)
+            elif diff < 0:
+                self._buckets["tokens"].reserve(-diff, now)
+
+    # -------- Feedback from the provider --------
+    def observe(self, headers: Optional[Mapping[str, Any]]) -> None:
+        """Learn limits and remaining capacity from a successful response and recover the rate."""
+        with self._lock:
+            now = self._clock()
+            for kind in ("requests", "tokens"):
+                bucket = self._buckets[kind]
+                limit = _header_float(headers, f"x-ratelimit-limit-{kind}")
+                if limit:
+                    self._ceiling[kind] = limit * self.headroom / 60.0
+                    bucket.capacity = max(1.0, self._ceiling[kind] * 6.0)
+                remaining = _header_float(headers, f"x-ratelimit-remaining-{kind}")
+                if remaining is not None:
+                    bucket.clamp(remaining * self.headroom, now)
+                # Additive increase: ~20 clean calls to climb from a halved rate back to the ceiling.
+                bucket.rate = min(self._ceiling[kind], bucket.rate + self._ceiling[kind] / 20.0)
+
+    def on_rate_limited(self, headers: Optional[Mapping[str, Any]] = None) -> float:
+        """Record a 429: halve the rate and pause every caller until retry-after. Returns the pause."""
+        retry_after = None
+        if headers is not None:
+            ms = _header_float(headers, "retry-after-ms")
+            retry_after = ms / 1000.0 if ms is not None else parse_duration(_header(headers, "retry-after"))
+            if retry_after is None:
+                resets = [parse_duration(_header(headers, f"x-ratelimit-reset-{k}")) for k in ("requests", "tokens")]
+                retry_after = max((r for r in resets if r is not None), default=None)
+        if retry_after is None:
+            retry_after = 1.0
+        with self._lock:
+            now = self._clock()
+            self._stats["rate_limited"] += 1
+            self._paused_until = max(self._paused_until, now + retry_after)
+            for kind, bucket in self._buckets.items():
+                bucket.rate = max(self._ceiling[kind] / 20.0, bucket.rate / 2.0)
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["wait_time_sec"] = round(out["wait_time_sec"], 3)
+            out["max_wait_sec"] = round(out["max_wait_sec"], 3)
+            out["requests_per_min"] = round(self._buckets["requests"].rate * 60.0, 1)
+            out["tokens_per_min"] = round(self._buckets["tokens"].rate * 60.0, 1)
+            out["paused_for_sec"] = round(max(0.0, self._paused_until - self._clock()), 3)
+        return out
+
+
+def _header(headers: Optional[Mapping[str, Any]], name: str) -> Optional[str]:
+    if headers is None:
+        return None
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.title())
+    return value
+
+
+def _header_float(headers: Optional[Mapping[str, Any]], name: str) -> Optional[float]:
+    value = _header(headers, name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Return the process-wide limiter, or None when rate limiting is disabled."""
+    global _limiter
+    if not Config.RATE_LIMIT_ENABLED:
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(
+                    Config.OPENAI_RPM_LIMIT,
+                    Config.OPENAI_TPM_LIMIT,
+                    headroom=Config.RATE_LIMIT_HEADROOM,
+                )
+    return _limiter
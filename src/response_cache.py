@@ -0,0 +1,221 @@
+# ---------------------------------------------------------
+# response_cache.py
+# Content-addressed cache for model responses: an in-memory LRU
+# in front of an on-disk JSON store.
+# ---------------------------------------------------------
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from src.config import Config
+except ImportError:  # pragma: no cover - fallback when run as script
+    from config import Config  # type: ignore
+
+
+def make_key(*, model: str, prompt_template: str, system_prompt: str, temperature: float, epic_text: str) -> str:
+    """Hash everything that influences the model output into a stable key."""
+    material = json.dumps(
+        {
+            "model": model,
+            "prompt_template": prompt_template,
+            "system_prompt": system_prompt,
+            "temperature": temperature,
+            "epic_text": epic_text,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache: memory (LRU, bounded by entry count) backed by disk
+    (one JSON file per key, bounded by file count). Both tiers honour the TTL.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str],
+        *,
+        max_entries: int = 256,
+        max_disk_entries: int = 5000,
+        ttl_sec: float = 7 * 24 * 3600,
+    ) -> None:
+        self.directory = directory
+        self.max_entries = max(1, max_entries)
+        self.max_disk_entries = max(1, max_disk_entries)
+        self.ttl_sec = ttl_sec
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._disk_count: Optional[int] = None  # counted lazily on first write
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    # -------- Public API --------
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self._fresh(stored_at, now):
+                    self._memory.move_to_end(key)
+                    self._counters["hits"] += 1
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self._counters["expired"] += 1
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is not None and self._fresh(entry[0], now):
+                self._remember(key, entry)
+                self._counters["hits"] += 1
+                self._counters["disk_hits"] += 1
+                return entry[1]
+            if entry is not None:
+                self._counters["expired"] += 1
+            self._counters["misses"] += 1
+        if entry is not None:
+            self._remove_disk(key)
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._disk_count = None
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for path in self._disk_files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["memory_entries"] = len(self._memory)
+            out["disk_entries"] = self._disk_count
+        return out
+
+    # -------- Memory tier --------
+    def _fresh(self, stored_at: float, now: float) -> bool:
+        return self.ttl_sec <= 0 or now - stored_at < self.ttl_sec
+
+    def _remember(self, key: str, entry: Tuple[float, Dict[str, Any]]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    # -------- Disk tier --------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory or "", key[:2], f"{key}.json")
+
+    def _disk_files(self):
+        for root, _dirs, files in os.walk(self.directory or ""):
+            for name in files:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                doc = json.load(f)
+            return float(doc["stored_at"]), doc["value"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _remove_disk(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_count:
+                self._disk_count -= 1
+
+    def _write_disk(self, key: str, entry: Tuple[float, Dict[str, Any]]) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existed = os.path.exists(path)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": entry[0], "value": entry[1]}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logging.warning("Response cache write failed for %s: %s", key, exc)
+            return
+
+        with self._lock:
+            if self._disk_count is None:
+                self._disk_count = sum(1 for _ in self._disk_files())
+            elif not existed:
+                self._disk_count += 1
+            over = self._disk_count > self.max_disk_entries
+        if over:
+            self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        """Drop the oldest files until the store is back to 90% of its limit."""
+        files = []
+        for path in self._disk_files():
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        files.sort()
+        target = int(self.max_disk_entries * 0.9)
+        removed = 0
+        for _mtime, path in files[: max(0, len(files) - target)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._disk_count = len(files) - removed
+            self._counters["evictions"] += removed
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _cache
+    if not Config.RESPONSE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    Config.RESPONSE_CACHE_DIR,
+                    max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+                    max_disk_entries=Config.RESPONSE_CACHE_MAX_DISK_ENTRIES,
+                    ttl_sec=Config.RESPONSE_CACHE_TTL_SEC,
+                )
+    return _cache
@@ -0,0 +1,209 @@
+# ---------------------------------------------------------
+# usage.py
+# Token usage and cost accounting for model calls.
+#
+# Every completion's ``response.usage`` is recorded three ways:
+#   - on the epic result (``"usage"``), so runs and chat replies carry it
+#   - in a process-wide rolling window for dashboards (/health, /metrics)
+#   - as token/cost counters in the /metrics exposition
+# Costs are estimates from a per-model price table (USD per 1M tokens).
+# ---------------------------------------------------------
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+try:
+    from src import metrics
+    from src.config import Config
+except ImportError:  # pragma: no cover - fallback when run as script
+    import metrics  # type: ignore
+    from config import Config  # type: ignore
+
+# USD per 1M (input, output) tokens. Longest matching prefix wins, so dated
+# snapshots such as "gpt-4o-mini-2024-07-18" use their family's price.
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+TOKENS = metrics.REGISTRY.register(metrics.Counter(
+    f"{metrics.PREFIX}_model_tokens_total",
+    "Model tokens used, by model and kind (prompt/completion).",
+    ("model", "kind"),
+))
+COST = metrics.REGISTRY.register(metrics.Counter(
+    f"{metrics.PREFIX}_model_cost_usd_total",
+    "Estimated model spend in USD, by model.",
+    ("model",),
+))
+
+
+def price_table() -> Dict[str, Tuple[float, float]]:
+    """Default prices overlaid with ``MODEL_PRICES_JSON`` ({"model": [input, output], ...})."""
+    prices = dict(DEFAULT_PRICES)
+    if Config.MODEL_PRICES_JSON:
+        try:
+            for model, pair in json.loads(Config.MODEL_PRICES_JSON).items():
+                prices[str(model)] = (float(pair[0]), float(pair[1]))
+        except (ValueError, TypeError, IndexError, AttributeError) as exc:
+            logging.warning("Ignoring malformed MODEL_PRICES_JSON: %s", exc)
+    return prices
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """USD estimate for one call, or None if the model has no price."""
+    if not model:
+        return None
+    prices = price_table()
+    match = max((name for name in prices if model.startswith(name)), key=len, default=None)
+    if match is None:
+        return None
+    per_input, per_output = prices[match]
+    return round((prompt_tokens * per_input + completion_tokens * per_output) / 1_000_000, 6)
+
+
+def empty_usage(model: Optional[str] = None, *, cached: bool = False) -> Dict[str, Any]:
+    """Usage of a result that cost no tokens (mock output or a cache hit)."""
+    return {
+        "model": model or "mock",
+        "calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "cost_usd": 0.0,
+        "cached": cached,
+    }
+
+
+def record_response(usage: Optional[Dict[str, Any]], response: Any, model: str) -> None:
+    """Add one completion's ``response.usage`` to ``usage`` (in place) and the global tally."""
+    raw = getattr(response, "usage", None)
+    prompt = int(getattr(raw, "prompt_tokens", 0) or 0)
+    completion = int(getattr(raw, "completion_tokens", 0) or 0)
+    cost = estimate_cost(model, prompt, completion)
+    get_usage_tracker().record(model, prompt, completion, cost)
+    if usage is None:
+        return
+    usage["model"] = model
+    usage["calls"] = usage.get("calls", 0) + 1
+    usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + prompt
+    usage["completion_tokens"] = usage.get("completion_tokens", 0) + completion
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    if cost is not None:
+        usage["cost_usd"] = round((usage.get("cost_usd") or 0.0) + cost, 6)
+    else:
+        usage.setdefault("cost_usd", None)
+    usage.setdefault("cached", False)
+
+
+def split_usage(usage: Dict[str, Any], parts: int) -> list:
+    """Share one batched call's usage across ``parts`` epics (remainders go to the first).
+
+    The call itself is counted once, on the first share, so run totals
+    still add up to the number of model calls made.
+    """
+    parts = max(1, parts)
+    calls = int(usage.get("calls", 0) or 0)
+    shares = []
+    for i in range(parts):
+        share = dict(usage)
+        share["calls"] = calls if i == 0 else 0
+        for key in ("prompt_tokens", "completion_tokens"):
+            total = int(usage.get(key, 0) or 0)
+            share[key] = total // parts + (1 if i < total % parts else 0)
+        share["total_tokens"] = share["prompt_tokens"] + share["completion_tokens"]
+        if usage.get("cost_usd") is not None:
+            share["cost_usd"] = round(usage["cost_usd"] / parts, 6)
+        share["batched_with"] = parts
+        shares.append(share)
+    return shares
+
+
+def summarise(usages: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Roll per-epic usage up into run totals, with a breakdown by model."""
+    total = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+             "cost_usd": 0.0, "cached_epics": 0, "epics": 0}
+    by_model: Dict[str, Dict[str, Any]] = {}
+    for usage in usages:
+        if not usage:
+            continue
+        total["epics"] += 1
+        total["cached_epics"] += 1 if usage.get("cached") else 0
+        model = by_model.setdefault(usage.get("model") or "unknown",
+                                    {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+        for key in ("calls", "prompt_tokens", "completion_tokens"):
+            value = int(usage.get(key, 0) or 0)
+            total[key] += value
+            model[key] += value
+        total["cost_usd"] += usage.get("cost_usd") or 0.0
+        model["cost_usd"] = round(model["cost_usd"] + (usage.get("cost_usd") or 0.0), 6)
+    total["total_tokens"] = total["prompt_tokens"] + total["completion_tokens"]
+    total["cost_usd"] = round(total["cost_usd"], 6)
+    total["by_model"] = by_model
+    return total
+
+
+class UsageTracker:
+    """Lifetime totals plus a sliding window (default one hour) of recent calls."""
+
+    def __init__(self, window_sec: float = 3600.0, clock=time.time) -> None:
+        self.window_sec = window_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._recent: Deque[Tuple[float, str, int, int, float]] = deque()
+        self._lifetime = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int, cost: Optional[float]) -> None:
+        TOKENS.inc(model, "prompt", amount=prompt_tokens)
+        TOKENS.inc(model, "completion", amount=completion_tokens)
+        if cost:
+            COST.inc(model, amount=cost)
+        now = self._clock()
+        with self._lock:
+            self._recent.append((now, model, prompt_tokens, completion_tokens, cost or 0.0))
+            self._lifetime["calls"] += 1
+            self._lifetime["prompt_tokens"] += prompt_tokens
+            self._lifetime["completion_tokens"] += completion_tokens
+            self._lifetime["cost_usd"] += cost or 0.0
+            self._expire(now)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(self._clock())
+            window = {"calls": len(self._recent), "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+            for _, _, prompt, completion, cost in self._recent:
+                window["prompt_tokens"] += prompt
+                window["completion_tokens"] += completion
+                window["cost_usd"] += cost
+            lifetime = dict(self._lifetime)
+        window["cost_usd"] = round(window["cost_usd"], 6)
+        lifetime["cost_usd"] = round(lifetime["cost_usd"], 6)
+        return {"window_sec": self.window_sec, "window": window, "lifetime": lifetime}
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window_sec
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+
+
+_tracker: Optional[UsageTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = UsageTracker(Config.USAGE_WINDOW_SEC)
+    return _tracker
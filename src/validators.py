@@ -4,7 +4,21 @@
 # ---------------------------------------------------------
 import json
 import os
-from jsonschema import validate, ValidationError, RefResolver
+import re
+import threading
+
+try:
+    from src.metrics import timed_function
+except ImportError:  # pragma: no cover - fallback when run as script
+    from metrics import timed_function  # type: ignore
+
+SCHEMA_FILES = ("output.schema.json", "story.schema.json", "test.schema.json")
+
+# Process-wide compiled validator, keyed by the schema files' mtimes.
+_compiled = None  # (mtimes, validator)
+_compiled_lock = threading.Lock()
+
+_REQUIRED_RE = re.compile(r"^'(?P<field>.+)' is a required property$")
 
 def load_schemas():
     """
@@ -38,6 +52,8 @@ def load_schemas():
         f"file:///{test_path.replace(os.sep, '/')}": test_schema,
     }
 
+    from jsonschema import RefResolver  # imported on first use; slow to load
+
     resolver = RefResolver(
         base_uri=f"file:///{base_dir.replace(os.sep, '/')}/",
         referrer=output_schema,
@@ -47,22 +63,92 @@ def load_schemas():
     return output_schema, resolver
 
 
-def validate_output(json_data):
+def _schema_mtimes():
+    base_dir = os.path.dirname(__file__)
+    return tuple(os.stat(os.path.join(base_dir, name)).st_mtime_ns for name in SCHEMA_FILES)
+
+
+def get_validator():
+    """
+    Return the compiled validator for output.schema.json.
+    Built once per process and rebuilt only when a schema file's mtime changes.
+    """
+    global _compiled
+    try:
+        mtimes = _schema_mtimes()
+    except FileNotFoundError:
+        mtimes = None  # let load_schemas() raise its friendlier error
+
+    compiled = _compiled
+    if compiled is not None and compiled[0] == mtimes:
+        return compiled[1]
+
+    with _compiled_lock:
+        if _compiled is not None and _compiled[0] == mtimes:
+            return _compiled[1]
+        from jsonschema.validators import validator_for
+
+        schema, resolver = load_schemas()
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        validator = cls(schema, resolver=resolver)
+        _compiled = (mtimes, validator)
+        return validator
+
+
+def _format_error(e):
+    match = _REQUIRED_RE.match(e.message) if e.validator == "required" else None
+    detail = f"missing field '{match.group('field')}'" if match else e.message
+    return f"Schema validation failed at {list(e.path)}: {detail}"
+
+
+@timed_function("schema_validation")
+def validate_output(json_data, collect_all=False):
     """
     Validate AI-generated JSON output against output.schema.json.
+    A single epic (dict) is validated as a one-element list.
+    With collect_all=True every error for every epic is reported in one pass;
+    otherwise only the most relevant error is returned.
     Returns (is_valid, errors)
     """
+    if isinstance(json_data, dict):
+        json_data = [json_data]
     try:
-        schema, resolver = load_schemas()
-        validate(instance=json_data, schema=schema, resolver=resolver)
-        return True, []
-    except ValidationError as e:
-        msg = f"Schema validation failed at {list(e.path)}: {e.message}"
-        return False, [msg]
+        validator = get_validator()
+        if collect_all:
+            found = sorted(validator.iter_errors(json_data), key=lambda e: list(map(str, e.path)))
+        else:
+            from jsonschema.exceptions import best_match
+
+            error = best_match(validator.iter_errors(json_data))
+            found = [error] if error is not None else []
+        return not found, [_format_error(e) for e in found]
     except Exception as e:
         msg = f"Unexpected error during validation: {str(e)}"
         return False, [msg]
-    
+
+
+def validate_epics(epics):
+    """
+    Validate a list of epics in one pass.
+    Returns a list with the error messages for each epic (empty when valid).
+    """
+    epics = list(epics)
+    per_epic = [[] for _ in epics]
+    try:
+        validator = get_validator()
+        for e in validator.iter_errors(epics):
+            if e.path and isinstance(e.path[0], int):
+                per_epic[e.path[0]].append(_format_error(e))
+            else:
+                for errors in per_epic:
+                    errors.append(_format_error(e))
+    except Exception as e:
+        msg = f"Unexpected error during validation: {str(e)}"
+        for errors in per_epic:
+            errors.append(msg)
+    return per_epic
+
 # ---------------------------------------------------------
 # Debug / Manual Test Mode
 # ---------------------------------------------------------
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the generation, validation and export hot paths.
+
+Run with:
+    python test/benchmarks/run_benchmarks.py                      # print results
+    python test/benchmarks/run_benchmarks.py --save baseline.json # record a baseline
+    python test/benchmarks/run_benchmarks.py --compare test/benchmarks/baselines/local.json
+
+Each benchmark runs on synthetic payloads at several scales (total user
+stories across all epics). Results report ops/sec (one op = processing
+the whole payload once) and the peak memory of a single op. With
+--compare, any benchmark whose ops/sec fell by more than --threshold
+against the baseline is reported and the exit code is 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src import ai_engine, dedupe, heuristics, validators  # noqa: E402
+
+DEFAULT_SCALES = (10, 100, 1_000, 10_000)
+STORIES_PER_EPIC = 10
+
+
+# ---------- Synthetic payloads ----------
+def make_raw_epic(epic_no: int, stories: int) -> Dict[str, Any]:
+    """One epic in the model's raw reply shape."""
+    return {
+        "Epic": f"Epic {epic_no}",
+        "UserStories": [
+            {
+                "title": f"As a shopper I can complete step {s} of epic {epic_no}",
+                "description": "Shoppers need a quick, reliable way to finish this step without support calls.",
+                "acceptance_criteria": {
+                    "Given": f"the shopper is on step {s}",
+                    "When": "they submit valid details",
+                    "Then": "the next step is shown and the data is saved",
+                },
+                "story_points": (s % 8) + 1,
+            }
+            for s in range(1, stories + 1)
+        ],
+        "TestCases": [
+            {
+                "id": f"TC-{epic_no:04d}-{s:03d}",
+                "objective": f"Verify step {s} of epic {epic_no}",
+                "preconditions": "Shopper is signed in",
+                "test_steps": ["Open the page", "Enter valid details", "Submit"],
+                "expected_result": "Next step is shown",
+            }
+            for s in range(1, stories + 1)
+        ],
+    }
+
+
+def make_payload(total_stories: int) -> Dict[str, Any]:
+    """Everything the benchmarks need for one scale, built once up front."""
+    epic_count = max(1, total_stories // STORIES_PER_EPIC)
+    per_epic = max(1, total_stories // epic_count)
+    raws = [make_raw_epic(i, per_epic) for i in range(1, epic_count + 1)]
+    epics = [
+        ai_engine._normalise_user_stories(raw, raw["Epic"], f"E{i}", f"Description of epic {i}")
+        for i, raw in enumerate(raws, start=1)
+    ]
+    run_json = {
+        "run_id": "bench",
+        "project_name": "Benchmark",
+        "mode": "mock",
+        "epics": [{"epic_id": e["epic_id"], "title": e["Epic"], "description": e["description"]} for e in epics],
+        "output": {"epics": epics},
+    }
+    return {
+        "raws": raws,
+        "replies": [json.dumps(raw) for raw in raws],
+        "epics": epics,
+        "run_json": run_json,
+    }
+
+
+# ---------- Benchmarks ----------
+def _benchmarks() -> Dict[str, Callable[[Dict[str, Any]], Callable[[], Any]]]:
+    """name -> factory(payload) returning a zero-argument op."""
+    benches: Dict[str, Callable[[Dict[str, Any]], Callable[[], Any]]] = {
+        "ai_engine._normalise_user_stories": lambda p: lambda: [
+            ai_engine._normalise_user_stories(raw, raw["Epic"], f"E{i}", None) for i, raw in enumerate(p["raws"])
+        ],
+        "ai_engine._safe_json_loads": lambda p: lambda: [ai_engine._safe_json_loads(text) for text in p["replies"]],
+        "validators.validate_output": lambda p: lambda: validators.validate_output(p["epics"], collect_all=True),
+        "heuristics.compute_metrics": lambda p: lambda: heuristics.compute_metrics(p["epics"]),
+        "dedupe.find_duplicates": lambda p: lambda: dedupe.find_duplicates(p["epics"]),
+    }
+    try:  # the Flask-side helpers need Flask installed
+        from src.backend.routes import exports, ui
+        from src.backend.services.adapter import adapt_ai_engine_epic
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        print(f"Skipping Flask-side benchmarks: {exc}", file=sys.stderr)
+        return benches
+    benches.update({
+        "exports.to_csv": lambda p: lambda: exports.to_csv(p["run_json"]["output"]),
+        "services.adapter.adapt_ai_engine_epic": lambda p: lambda: [adapt_ai_engine_epic(e) for e in p["epics"]],
+        "ui._adapt_for_results_template": lambda p: lambda: ui._adapt_for_results_template(
+            # The adapter mutates output.epics, so give it a fresh top level each op.
+            dict(p["run_json"], output=dict(p["run_json"]["output"]))
+        ),
+    })
+    return benches
+
+
+def time_op(op: Callable[[], Any], min_time: float = 0.2, max_iterations: int = 10_000) -> Tuple[float, int]:
+    """Run ``op`` until ``min_time`` has passed; returns (ops_per_sec, iterations)."""
+    op()  # warm-up (imports, compiled validator, caches)
+    iterations = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while iterations == 0 or (elapsed < min_time and iterations < max_iterations):
+        op()
+        iterations += 1
+        elapsed = time.perf_counter() - started
+    return iterations / elapsed, iterations
+
+
+def peak_memory(op: Callable[[], Any]) -> int:
+    """Peak bytes allocated by one run of ``op`` (tracemalloc, so Python objects only)."""
+    tracemalloc.start()
+    try:
+        op()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(scales=DEFAULT_SCALES, only: Optional[List[str]] = None, min_time: float = 0.2) -> Dict[str, Any]:
+    benches = _benchmarks()
+    results: List[Dict[str, Any]] = []
+    for scale in scales:
+        payload = make_payload(scale)
+        for name, factory in benches.items():
+            if only and not any(part in name for part in only):
+                continue
+            op = factory(payload)
+            ops_per_sec, iterations = time_op(op, min_time=min_time)
+            results.append({
+                "benchmark": name,
+                "stories": scale,
+                "ops_per_sec": round(ops_per_sec, 3),
+                "stories_per_sec": round(ops_per_sec * scale, 1),
+                "iterations": iterations,
+                "peak_memory_kb": round(peak_memory(op) / 1024, 1),
+            })
+            print(f"{name:<42} {scale:>6} stories  {ops_per_sec:>12.2f} ops/s  "
+                  f"{results[-1]['peak_memory_kb']:>10.1f} KiB", file=sys.stderr)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """Benchmarks whose ops/sec dropped more than ``threshold`` (0.2 = 20%) below the baseline."""
+    base = {(r["benchmark"], r["stories"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for row in current.get("results", []):
+        old = base.get((row["benchmark"], row["stories"]))
+        if not old or not old.get("ops_per_sec"):
+            continue
+        change = row["ops_per_sec"] / old["ops_per_sec"] - 1.0
+        if change < -threshold:
+            regressions.append({
+                "benchmark": row["benchmark"],
+                "stories": row["stories"],
+                "baseline_ops_per_sec": old["ops_per_sec"],
+                "ops_per_sec": row["ops_per_sec"],
+                "change_pct": round(change * 100, 1),
+            })
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the generation, validation and export hot paths.")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="comma-separated story counts (default 10,100,1000,10000)")
+    parser.add_argument("--only", action="append", help="run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to spend per benchmark and scale")
+    parser.add_argument("--save", help="write the results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing (default 0.2)")
+    args = parser.parse_args(argv)
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    current = run(scales, only=args.only, min_time=args.min_time)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(current, indent=2), encoding="utf-8")
+        print(f"Saved baseline to {args.save}", file=sys.stderr)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['benchmark']} @ {r['stories']} stories: "
+                  f"{r['baseline_ops_per_sec']} -> {r['ops_per_sec']} ops/s ({r['change_pct']}%)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    elif not args.save:
+        print(json.dumps(current, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Cold-start import budget for the engine and the chat CLI.
+
+Run with:
+    python test/benchmarks/startup_budget.py                   # check against the default budget
+    python test/benchmarks/startup_budget.py --budget-ms 150 --top 15
+
+Each module is imported in a fresh interpreter with ``-X importtime`` and
+no OpenAI key (mock mode), ``--repeat`` times; the fastest run counts, so
+a busy machine does not fail the check on noise. The check fails (exit
+code 1) when a module's cumulative import time is over the budget, or when
+a dependency that should load lazily (openai, jsonschema, requests) was
+imported at all.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_MODULES = ("src.ai_engine", "src.chat_agent")
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", 300))
+LAZY_DEPENDENCIES = ("openai", "jsonschema", "requests")
+
+# "import time:       self [us] |  cumulative | imported package"
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """One row per imported module: name, self/cumulative microseconds and nesting depth."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": (len(match.group(3)) - 1) // 2,
+            })
+    return rows
+
+
+def measure(module: str, python: str = sys.executable) -> Dict[str, Any]:
+    """Import ``module`` once in a fresh interpreter and summarise ``-X importtime``."""
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    env["OPENAI_API_KEY"] = ""  # keep a .env key from switching the import to live mode
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    index = next((i for i in range(len(rows) - 1, -1, -1) if rows[i]["module"] == module), None)
+    if index is None:
+        raise RuntimeError(f"no importtime entry for {module}")
+    # Children are printed (indented) just before their parent, so the
+    # module's own imports are the nested rows directly above it; earlier
+    # top-level rows belong to interpreter start-up (site, .pth files).
+    start = index
+    while start > 0 and rows[start - 1]["depth"] > 0:
+        start -= 1
+    subtree = rows[start:index]
+    imported = {r["module"].split(".")[0] for r in rows}
+    return {
+        "module": module,
+        "cumulative_ms": round(rows[index]["cumulative_us"] / 1000, 2),
+        "heaviest": sorted(subtree, key=lambda r: r["cumulative_us"], reverse=True)[:25],
+        "lazy_violations": [dep for dep in LAZY_DEPENDENCIES if dep in imported],
+    }
+
+
+def check(
+    modules=DEFAULT_MODULES,
+    budget_ms: float = DEFAULT_BUDGET_MS,
+    repeat: int = 3,
+) -> Dict[str, Any]:
+    results = []
+    for module in modules:
+        runs = [measure(module) for _ in range(max(1, repeat))]
+        best = min(runs, key=lambda r: r["cumulative_ms"])
+        best["over_budget"] = best["cumulative_ms"] > budget_ms
+        results.append(best)
+    return {
+        "budget_ms": budget_ms,
+        "results": results,
+        "passed": not any(r["over_budget"] or r["lazy_violations"] for r in results),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fail if cold-importing the engine exceeds a time budget.")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="maximum cumulative import time per module (default 300, or STARTUP_BUDGET_MS)")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per module; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports to list per module")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = check(args.modules, args.budget_ms, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    for result in report["results"]:
+        status = "OVER BUDGET" if result["over_budget"] else "ok"
+        print(f"{result['module']:<20} {result['cumulative_ms']:>8.1f} ms  (budget {args.budget_ms:.0f} ms)  {status}")
+        for row in result["heaviest"][:args.top]:
+            print(f"    {row['cumulative_us'] / 1000:>8.1f} ms  {row['module']}")
+        if result["lazy_violations"]:
+            print(f"    imported eagerly: {', '.join(result['lazy_violations'])}")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,16 +4,136 @@ Evaluation Runner for AI-Powered Jira Agent
 Run with: python test/evaluation_runner.py
 
 Consolidated version for single /test folder structure
+
+Load-test mode:
+    python test/integration/evaluation_runner.py --load --local --users 16 --rate 20 --duration 30
+    python test/integration/evaluation_runner.py --load --base-url http://localhost:5000/api \
+        --compare test/docs/load-baseline.json
+
+N virtual users share one pooled HTTP session. Scenarios (generate, then
+the run's JSON and CSV exports, then a chat message) start at --rate per
+second, or back to back with --rate 0. --local serves the app from this
+process in mock mode; --stub-latency-ms puts a fake model with that
+latency behind it instead, so the live code path (limiter, breaker,
+usage) is exercised without credentials. The report records
+p50/p95/p99 latency and throughput per endpoint; --compare exits with 1
+when p95 or throughput got more than --threshold worse than a saved report.
 """
 
+import argparse
+import math
+import queue
+import random
 import requests
 import json
 import jsonschema
+import logging
+import subprocess
+import tempfile
+import threading
 from pathlib import Path
+from types import SimpleNamespace
 import time
 import sys
 import os
 
+ROOT = Path(__file__).resolve().parents[2]
+LOAD_ENDPOINTS = ("generate", "json", "csv", "chat")
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile (q in 0..100) of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * q / 100.0
+    low = math.floor(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def compare_load_reports(current, baseline, threshold=0.2):
+    """Endpoints whose p95 rose, or whose throughput fell, by more than ``threshold``."""
+    regressions = []
+    for endpoint, row in current.get("endpoints", {}).items():
+        old = baseline.get("endpoints", {}).get(endpoint)
+        if not old:
+            continue
+        if old.get("p95_ms") and row.get("p95_ms") is not None:
+            change = row["p95_ms"] / old["p95_ms"] - 1.0
+            if change > threshold:
+                regressions.append({"endpoint": endpoint, "metric": "p95_ms", "baseline": old["p95_ms"],
+                                    "current": row["p95_ms"], "change_pct": round(change * 100, 1)})
+        if old.get("throughput_rps") and row.get("throughput_rps") is not None:
+            change = row["throughput_rps"] / old["throughput_rps"] - 1.0
+            if change < -threshold:
+                regressions.append({"endpoint": endpoint, "metric": "throughput_rps",
+                                    "baseline": old["throughput_rps"], "current": row["throughput_rps"],
+                                    "change_pct": round(change * 100, 1)})
+    return regressions
+
+
+class StubModelClient:
+    """Stands in for the OpenAI client: waits ``latency_sec``, then answers with mock stories."""
+
+    def __init__(self, latency_sec):
+        self.latency_sec = latency_sec
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        from src import ai_engine
+
+        prompt = str(kwargs.get("messages", [{}])[-1].get("content", ""))
+        time.sleep(self.latency_sec)
+        content = json.dumps(ai_engine._mock_user_stories(prompt[:200], None))
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+
+def start_local_server(stub_latency_ms=None, rate_limit=True):
+    """Serve the app from a background thread on a free port; returns ``(base_url, stop)``.
+
+    Runs go to a temporary directory and the response cache is off, so
+    every request does the full work and nothing is left in runs_data.
+    ``rate_limit=False`` lifts the model quota limiter, which otherwise
+    paces stub calls like real ones (OPENAI_TPM_LIMIT / OPENAI_RPM_LIMIT).
+    """
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from werkzeug.serving import make_server
+    from src import ai_engine
+    from src.backend.app import create_app
+    from src.backend.services.runs import get_run_store
+    from src.config import Config
+
+    runs_dir = tempfile.mkdtemp(prefix="load-runs-")
+    Config.EXPORT_DIR = runs_dir
+    Config.RESPONSE_CACHE_ENABLED = False
+    Config.RATE_LIMIT_ENABLED = Config.RATE_LIMIT_ENABLED and rate_limit
+    os.environ["OPENAI_API_KEY"] = ""
+    ai_engine._client = StubModelClient(stub_latency_ms / 1000.0) if stub_latency_ms is not None else None
+
+    app = create_app()
+    # Per-request access and engine logs would dominate the timings.
+    logging.getLogger().setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="load-server", daemon=True).start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+        get_run_store().flush()
+
+    return f"http://127.0.0.1:{server.server_port}/api", stop
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
 class TestEvaluator:
     
     def __init__(self, base_url="http://localhost:5000/api"):
@@ -350,6 +470,258 @@ class TestEvaluator:
         print(f"✅ Avg Time: {avg_e2e_time:.2f}s")
         print("=" * 50)
 
+    # ---------- Load test ----------
+    def load_payload(self):
+        """A /generate body built from the first test epic (or a small built-in one)."""
+        epics = self.load_test_epics()
+        epic = (epics[0].get("epic") or epics[0]) if epics else {}
+        return {
+            "project_name": "Load test",
+            "epics": [{
+                "epic_id": epic.get("id") or "LOAD-1",
+                "title": epic.get("title") or "E-commerce Checkout System",
+                "description": epic.get("description") or "Checkout with cart review, payment and confirmation.",
+            }],
+            "use_cache": False,
+        }
+
+    def run_load_test(self, users=8, rate=0.0, duration=30.0, iterations=None, endpoints=LOAD_ENDPOINTS,
+                      poisson=False, timeout=60, session=None):
+        """Drive ``users`` concurrent scenarios and return the latency/throughput report.
+
+        With ``rate`` > 0 scenarios arrive at that rate (evenly spaced, or
+        exponential gaps with ``poisson``) and queue for a free user; the
+        queueing delay is reported as ``arrival_lag_ms``. With ``rate`` 0
+        each user starts its next scenario as soon as the last one ends.
+        Stops after ``duration`` seconds or ``iterations`` scenarios.
+        """
+        users = max(1, users)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=users)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        payload = self.load_payload()
+        latencies = {name: [] for name in endpoints}
+        errors = {name: 0 for name in endpoints}
+        lags = []
+        lock = threading.Lock()
+        counter = {"started": 0, "finished": 0}
+
+        def _call(name, method, url, **kwargs):
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+                ok = response.status_code < 400
+            except requests.exceptions.RequestException:
+                response, ok = None, False
+            elapsed = time.perf_counter() - started
+            if name in latencies:
+                with lock:
+                    latencies[name].append(elapsed)
+                    errors[name] += 0 if ok else 1
+            return response if ok else None
+
+        seed_run = {}
+        if "generate" not in endpoints and ({"json", "csv"} & set(endpoints)):
+            # The export endpoints need a run to read.
+            response = session.post(f"{self.base_url}/generate", json=payload, timeout=timeout)
+            response.raise_for_status()
+            seed_run["run_id"] = response.json()["run_id"]
+
+        def _scenario(user):
+            run_id = seed_run.get("run_id")
+            if "generate" in endpoints:
+                response = _call("generate", "POST", f"{self.base_url}/generate", json=payload)
+                run_id = response.json().get("run_id") if response is not None else None
+            if run_id:
+                if "json" in endpoints:
+                    _call("json", "GET", f"{self.base_url}/runs/{run_id}/json")
+                if "csv" in endpoints:
+                    _call("csv", "GET", f"{self.base_url}/runs/{run_id}/csv")
+            if "chat" in endpoints:
+                message = f"Generate user stories for {payload['epics'][0]['title']} #{user['turns']}"
+                response = _call("chat", "POST", f"{self.base_url}/chat",
+                                 json={"message": message, "session_id": user.get("session_id")})
+                if response is not None:
+                    user["session_id"] = response.json().get("session_id")
+                user["turns"] += 1
+            with lock:
+                counter["finished"] += 1
+
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+
+        def _more():
+            with lock:
+                if iterations is not None and counter["started"] >= iterations:
+                    return False
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return False
+                counter["started"] += 1
+                return True
+
+        arrivals = queue.Queue()
+
+        def _open_loop_user():
+            user = {"turns": 0}
+            while True:
+                scheduled = arrivals.get()
+                if scheduled is None:
+                    return
+                with lock:
+                    lags.append(max(0.0, time.perf_counter() - scheduled))
+                _scenario(user)
+
+        def _closed_loop_user():
+            user = {"turns": 0}
+            while _more():
+                _scenario(user)
+
+        workers = [
+            threading.Thread(target=_open_loop_user if rate > 0 else _closed_loop_user, name=f"vu-{i}", daemon=True)
+            for i in range(users)
+        ]
+        for worker in workers:
+            worker.start()
+        if rate > 0:
+            rng = random.Random(0)
+            next_at = started
+            while _more():
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                arrivals.put(next_at)
+                next_at += rng.expovariate(rate) if poisson else 1.0 / rate
+            for _ in workers:
+                arrivals.put(None)
+        for worker in workers:
+            worker.join()
+        wall = time.perf_counter() - started
+
+        def _ms(value):
+            return round(value * 1000, 2) if value is not None else None
+
+        report_endpoints = {}
+        for name in endpoints:
+            values = sorted(latencies[name])
+            report_endpoints[name] = {
+                "requests": len(values),
+                "errors": errors[name],
+                "error_rate": round(errors[name] / len(values), 4) if values else None,
+                "mean_ms": _ms(sum(values) / len(values)) if values else None,
+                "p50_ms": _ms(percentile(values, 50)),
+                "p95_ms": _ms(percentile(values, 95)),
+                "p99_ms": _ms(percentile(values, 99)),
+                "max_ms": _ms(values[-1]) if values else None,
+                "throughput_rps": round(len(values) / wall, 2) if wall else None,
+            }
+        sorted_lags = sorted(lags)
+        return {
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "base_url": self.base_url,
+            "users": users,
+            "rate": rate,
+            "arrivals": "poisson" if poisson and rate > 0 else ("constant" if rate > 0 else "closed-loop"),
+            "duration_sec": duration,
+            "scenarios": counter["finished"],
+            "wall_sec": round(wall, 2),
+            "endpoints": report_endpoints,
+            "arrival_lag_ms": {
+                "p50": _ms(percentile(sorted_lags, 50)),
+                "p95": _ms(percentile(sorted_lags, 95)),
+                "p99": _ms(percentile(sorted_lags, 99)),
+            } if sorted_lags else None,
+        }
+
+    def print_load_report(self, report):
+        arrivals = report["arrivals"] + (f" at {report['rate']}/s" if report["rate"] else "")
+        print("\n" + "=" * 50)
+        print(f"LOAD TEST: {report['users']} users, {arrivals}, "
+              f"{report['scenarios']} scenarios in {report['wall_sec']}s")
+        print("=" * 50)
+        print(f"{'endpoint':<10}{'reqs':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+        for name, row in report["endpoints"].items():
+            print(f"{name:<10}{row['requests']:>7}{row['errors']:>8}{row['p50_ms'] or 0:>10.1f}"
+                  f"{row['p95_ms'] or 0:>10.1f}{row['p99_ms'] or 0:>10.1f}{row['throughput_rps'] or 0:>9.2f}")
+        if report["arrival_lag_ms"]:
+            print(f"Arrival lag p95: {report['arrival_lag_ms']['p95']} ms (high values mean all users were busy)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the running agent, or load-test it with --load.")
+    parser.add_argument("--base-url", default="http://localhost:5000/api")
+    parser.add_argument("--load", action="store_true", help="run the concurrent load test instead of the evaluation")
+    parser.add_argument("--local", action="store_true", help="serve the app from this process (mock mode)")
+    parser.add_argument("--stub-latency-ms", type=float,
+                        help="with --local, answer model calls from a stub with this latency instead of mock mode")
+    parser.add_argument("--no-rate-limit", action="store_true",
+                        help="with --local, do not pace model calls to the configured OpenAI quota")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users (default 8)")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="scenario arrivals per second (default 0: each user loops back to back)")
+    parser.add_argument("--poisson", action="store_true", help="exponential gaps between arrivals")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep starting scenarios")
+    parser.add_argument("--iterations", type=int, help="stop after this many scenarios")
+    parser.add_argument("--endpoints", default=",".join(LOAD_ENDPOINTS),
+                        help="comma-separated subset of generate,json,csv,chat")
+    parser.add_argument("--report", default="test/docs/load-report.json", help="where to save the JSON report")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if not args.load:
+        TestEvaluator(args.base_url).run_evaluation()
+        return 0
+
+    endpoints = tuple(e.strip() for e in args.endpoints.split(",") if e.strip())
+    unknown = set(endpoints) - set(LOAD_ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    stop = None
+    base_url = args.base_url
+    if args.local or args.stub_latency_ms is not None:
+        base_url, stop = start_local_server(args.stub_latency_ms, rate_limit=not args.no_rate_limit)
+    try:
+        report = TestEvaluator(base_url).run_load_test(
+            users=args.users,
+            rate=args.rate,
+            duration=args.duration,
+            iterations=args.iterations,
+            endpoints=endpoints,
+            poisson=args.poisson,
+        )
+    finally:
+        if stop is not None:
+            stop()
+    report["target"] = (
+        "local-stub" if args.stub_latency_ms is not None else "local-mock" if stop is not None else "remote"
+    )
+    if args.stub_latency_ms is not None:
+        report["stub_latency_ms"] = args.stub_latency_ms
+    if stop is not None:
+        report["rate_limited"] = not args.no_rate_limit
+
+    evaluator = TestEvaluator(base_url)
+    evaluator.print_load_report(report)
+    Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Load report saved to {args.report}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_load_reports(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {args.compare}:")
+            for r in regressions:
+                print(f"  - {r['endpoint']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['change_pct']:+.1f}%)")
+            return 1
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
 if __name__ == "__main__":
-    evaluator = TestEvaluator()
-    evaluator.run_evaluation()
+    sys.exit(main())
@@ -1,4 +1,9 @@
-import json, os, glob
+import asyncio, json, os, glob
+from types import SimpleNamespace
+
+from src import ai_engine
+from src.circuit_breaker import CircuitBreaker
+
 
 def test_output_file():
     # Find file automatically
@@ -12,3 +17,200 @@ def test_output_file():
     assert isinstance(data, list)
     assert "UserStories" in data[0]
     assert "TestCases" in data[0]
+
+
+def _fake_client(replies):
+    """OpenAI stand-in returning the queued JSON bodies, recording prompts."""
+    prompts = []
+
+    def create(**kwargs):
+        prompts.append(kwargs["messages"][-1]["content"])
+        body = replies.pop(0)
+        message = SimpleNamespace(content=json.dumps(body))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return client, prompts
+
+
+def _story(title):
+    return {"title": title, "description": "d", "story_points": 3,
+            "acceptance_criteria": {"Given": "g", "When": "w", "Then": "t"}}
+
+
+def test_batch_mode_splits_response_and_backfills_missing_epics(monkeypatch):
+    client, prompts = _fake_client([
+        {"Epics": {"E1": {"UserStories": [_story("Cart")], "TestCases": []},
+                   "E2": {"UserStories": [_story("Pay")], "TestCases": []}}},
+        {"UserStories": [_story("Receipt")], "TestCases": []},  # per-epic fallback for E3
+    ])
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: client)
+    monkeypatch.setattr(ai_engine, "get_response_cache", lambda: None)
+
+    epics = [
+        {"epic_text": f"text {i}", "epic_title": f"Epic {i}", "epic_id": f"E{i}", "epic_description": "x"}
+        for i in (1, 2, 3)
+    ]
+    results = ai_engine.generate_user_stories_batch(epics)
+
+    assert [r["epic_id"] for r in results] == ["E1", "E2", "E3"]
+    assert [r["UserStories"][0]["title"] for r in results] == ["Cart", "Pay", "Receipt"]
+    assert len(prompts) == 2
+    assert "[E1] text 1" in prompts[0] and "[E3] text 3" in prompts[0]
+
+
+def test_batch_mode_caches_each_epic(monkeypatch):
+    client, prompts = _fake_client([
+        {"Epics": {"E1": {"UserStories": [_story("Cart")], "TestCases": []},
+                   "E2": {"UserStories": [_story("Pay")], "TestCases": []}}},
+    ])
+    cache = {}
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: client)
+    monkeypatch.setattr(ai_engine, "get_response_cache",
+                        lambda: SimpleNamespace(get=cache.get, set=cache.__setitem__))
+
+    epics = [
+        {"epic_text": f"text {i}", "epic_title": f"Epic {i}", "epic_id": f"E{i}", "epic_description": "x"}
+        for i in (1, 2)
+    ]
+    ai_engine.generate_user_stories_batch(epics)
+    again = ai_engine.generate_user_stories(**epics[1])
+
+    assert len(prompts) == 1
+    assert again["UserStories"][0]["title"] == "Pay"
+    assert again["usage"]["cached"] is True
+
+
+def test_only_fallback_output_is_marked_as_fallback(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=60)
+    breaker.record_failure()  # open: live calls are refused straight away
+    client, _ = _fake_client([])
+    monkeypatch.setattr(ai_engine, "get_circuit_breaker", lambda: breaker)
+    monkeypatch.setattr(ai_engine, "get_response_cache", lambda: None)
+
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: client)
+    assert ai_engine.generate_user_stories("text", "Epic")["fallback"] is True
+
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: None)
+    assert "fallback" not in ai_engine.generate_user_stories("text", "Epic")
+
+
+class _FakeAsyncClient:
+    """AsyncOpenAI stand-in that records the peak number of in-flight calls."""
+
+    def __init__(self, **_kwargs):
+        self.active = 0
+        self.peak = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        prompt = kwargs["messages"][-1]["content"]
+        # Later epics answer first, so ordering has to come from gather().
+        await asyncio.sleep(0.05 if "Epic 1" in prompt else 0.01)
+        self.active -= 1
+        body = {"UserStories": [_story(prompt.split("Epic ")[-1][:1])], "TestCases": []}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(body)))])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_generate_many_async_keeps_order_and_bounds_concurrency(monkeypatch):
+    clients = []
+
+    def factory(**kwargs):
+        clients.append(_FakeAsyncClient(**kwargs))
+        return clients[-1]
+
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: object())
+    monkeypatch.setattr(ai_engine, "AsyncOpenAI", factory)
+    monkeypatch.setattr(ai_engine, "get_response_cache", lambda: None)
+
+    epics = [
+        {"epic_text": f"Epic {i}", "epic_title": f"Epic {i}", "epic_id": f"E{i}", "epic_description": "x"}
+        for i in range(1, 7)
+    ]
+    results = ai_engine.generate_many(epics, max_concurrency=2)
+
+    assert [r["epic_id"] for r in results] == [f"E{i}" for i in range(1, 7)]
+    assert [r["UserStories"][0]["title"] for r in results] == [str(i) for i in range(1, 7)]
+    assert clients[0].peak == 2
+
+
+def test_story_stream_parser_handles_any_chunking():
+    body = {"Epic": "Checkout", "UserStories": [_story("Pay {now}"), _story('Say "hi" [x]')], "TestCases": []}
+    text = json.dumps(body)
+
+    for size in (1, 7, len(text)):
+        parser = ai_engine.StoryStreamParser()
+        stories = [s for i in range(0, len(text), size) for s in parser.feed(text[i:i + size])]
+        assert [s["title"] for s in stories] == ["Pay {now}", 'Say "hi" [x]']
+
+
+def test_stream_user_stories_yields_stories_before_the_final_result(monkeypatch):
+    text = json.dumps({"UserStories": [_story("Cart"), _story("Pay")], "TestCases": []})
+    seen = {}
+
+    def create(**kwargs):
+        seen.update(kwargs)
+        pieces = [text[i:i + 5] for i in range(0, len(text), 5)]
+        for piece in pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=10, completion_tokens=20, total_tokens=30))
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: client)
+    monkeypatch.setattr(ai_engine, "get_response_cache", lambda: None)
+    monkeypatch.setattr(ai_engine, "get_rate_limiter", lambda: None)
+    monkeypatch.setattr(ai_engine, "get_circuit_breaker", lambda: None)
+
+    events = list(ai_engine.stream_user_stories("Checkout", "Checkout", epic_id="E1"))
+
+    assert seen["stream"] is True
+    assert "".join(e["text"] for e in events if e["type"] == "delta") == text
+    kinds = [e["type"] for e in events]
+    assert kinds.index("story") < kinds.index("result") == len(events) - 1
+    assert [e["story"]["title"] for e in events if e["type"] == "story"] == ["Cart", "Pay"]
+    result = events[-1]["result"]
+    assert result["epic_id"] == "E1"
+    assert result["usage"]["total_tokens"] == 30
+
+
+
+def test_closing_the_stream_early_releases_probe_limiter_and_stream(monkeypatch):
+    clock = {"now": 0.0}
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=5, clock=lambda: clock["now"])
+    breaker.record_failure()
+    clock["now"] = 10.0
+    settled = []
+    limiter = SimpleNamespace(acquire=lambda tokens: 0.0, settle=lambda est, actual: settled.append((est, actual)))
+
+    class FakeStream:
+        closed = False
+
+        def __iter__(self):
+            for piece in ('{"UserStories": [', '{"title": "x"}'):
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+
+        def close(self):
+            FakeStream.closed = True
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: FakeStream())))
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: client)
+    monkeypatch.setattr(ai_engine, "get_response_cache", lambda: None)
+    monkeypatch.setattr(ai_engine, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(ai_engine, "get_circuit_breaker", lambda: breaker)
+
+    events = ai_engine.stream_user_stories("Checkout", "Checkout", epic_id="E1")
+    assert next(events)["type"] == "delta"
+    events.close()  # the SSE client disconnected
+
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+    assert len(settled) == 1
+    assert FakeStream.closed
@@ -0,0 +1,40 @@
+"""Smoke tests for the benchmark suite and its regression check."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+_PATH = Path(__file__).resolve().parents[1] / "benchmarks" / "run_benchmarks.py"
+_spec = importlib.util.spec_from_file_location("run_benchmarks", _PATH)
+run_benchmarks = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(run_benchmarks)
+
+
+def test_payload_has_requested_story_count() -> None:
+    payload = run_benchmarks.make_payload(100)
+    assert sum(len(e["UserStories"]) for e in payload["epics"]) == 100
+    assert len(payload["replies"]) == len(payload["epics"])
+
+
+def test_run_reports_every_benchmark() -> None:
+    report = run_benchmarks.run([10], min_time=0.0)
+    names = {r["benchmark"] for r in report["results"]}
+    assert "validators.validate_output" in names
+    assert all(r["ops_per_sec"] > 0 and r["peak_memory_kb"] >= 0 for r in report["results"])
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold() -> None:
+    baseline = {"results": [
+        {"benchmark": "a", "stories": 10, "ops_per_sec": 100.0},
+        {"benchmark": "b", "stories": 10, "ops_per_sec": 100.0},
+    ]}
+    current = {"results": [
+        {"benchmark": "a", "stories": 10, "ops_per_sec": 85.0},   # within 20%
+        {"benchmark": "b", "stories": 10, "ops_per_sec": 50.0},   # regression
+        {"benchmark": "c", "stories": 10, "ops_per_sec": 1.0},    # no baseline
+    ]}
+
+    regressions = run_benchmarks.compare(current, baseline, threshold=0.2)
+
+    assert [(r["benchmark"], r["change_pct"]) for r in regressions] == [("b", -50.0)]
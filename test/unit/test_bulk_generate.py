@@ -0,0 +1,78 @@
+"""Tests for the resumable JSONL bulk generation CLI."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict
+
+from src import bulk_generate
+
+
+def _write_input(path, count: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"request_id": f"R{i}", "title": f"Epic {i}", "body": f"Body {i}"}) + "\n")
+
+
+def _fake_generate(calls: list):
+    def generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        calls.append(kwargs["epic_id"])
+        return {"Epic": epic_title, "description": epic_text, "UserStories": [], "TestCases": []}
+    return generate
+
+
+def _output_ids(path) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["epic_id"] for line in f]
+
+
+def test_generates_every_epic_and_skips_them_on_restart(tmp_path) -> None:
+    src, out = tmp_path / "epics.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, 7)
+    calls: list = []
+
+    first = bulk_generate.run_bulk(str(src), str(out), workers=3, generate=_fake_generate(calls))
+    second = bulk_generate.run_bulk(str(src), str(out), workers=3, generate=_fake_generate(calls))
+
+    assert first["generated"] == 7
+    assert second == {**second, "generated": 0, "skipped": 7}
+    assert sorted(_output_ids(out)) == sorted(f"R{i}" for i in range(7))
+    assert len(calls) == 7
+
+
+def test_fallback_output_is_a_failure_and_is_not_checkpointed(tmp_path, monkeypatch) -> None:
+    src, out = tmp_path / "epics.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, 3)
+
+    def generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        result = {"Epic": epic_title, "UserStories": [], "TestCases": []}
+        if kwargs["epic_id"] == "R1":
+            result["fallback"] = True  # e.g. the circuit was open
+        return result
+
+    monkeypatch.setattr(bulk_generate, "generate_user_stories", generate)
+
+    assert bulk_generate.main([str(src), str(out), "--workers", "2"]) == 1
+
+    assert sorted(_output_ids(out)) == ["R0", "R2"]
+    checkpoint = (tmp_path / "out.jsonl.checkpoint").read_text(encoding="utf-8").split()
+    assert sorted(checkpoint) == ["R0", "R2"]
+
+
+def test_resume_recovers_from_crash_between_output_and_checkpoint(tmp_path) -> None:
+    src, out = tmp_path / "epics.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, 4)
+    calls: list = []
+    bulk_generate.run_bulk(str(src), str(out), workers=1, limit=2, generate=_fake_generate(calls))
+
+    # Simulate a crash: last line's checkpoint entry lost, plus a half-written line.
+    ckpt = tmp_path / "out.jsonl.checkpoint"
+    ckpt.write_text(ckpt.read_text(encoding="utf-8").splitlines()[0] + "\n", encoding="utf-8")
+    with open(out, "a", encoding="utf-8") as f:
+        f.write('{"epic_id": "R2", "Epi')
+
+    summary = bulk_generate.run_bulk(str(src), str(out), workers=2, generate=_fake_generate(calls))
+
+    assert summary["generated"] == 2
+    assert sorted(_output_ids(out)) == ["R0", "R1", "R2", "R3"]
+    assert calls.count("R1") == 1
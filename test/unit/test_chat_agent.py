@@ -113,4 +113,27 @@ def test_empty_prompt_requests_input(agent: chat_agent.EpicChatAgent) -> None:
     assert response.content == "Please type a request so I can help you."
     # No new messages should have been stored besides the assistant reply.
     assert agent.history == []
-    assert chat_agent.ai_engine.generate_user_stories.called_with == (None, None)
\ No newline at end of file
+    assert chat_agent.ai_engine.generate_user_stories.called_with == (None, None)
+
+def test_disconnected_stream_leaves_history_unchanged(monkeypatch: pytest.MonkeyPatch) -> None:
+    closed = []
+
+    def fake_stream(*args: Any, **kwargs: Any):
+        try:
+            yield {"type": "delta", "text": "{"}
+            yield {"type": "result", "result": {"UserStories": []}}
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(chat_agent.ai_engine, "stream_user_stories", fake_stream)
+    agent = chat_agent.EpicChatAgent()
+
+    events = agent.respond_stream("Checkout")
+    assert next(events)["type"] == "delta"
+    events.close()  # the client went away
+
+    assert agent.history == []
+    assert closed == [True]
+
+    list(agent.respond_stream("Checkout"))
+    assert [m.role for m in agent.history] == ["user", "assistant"]
@@ -0,0 +1,116 @@
+"""Tests for server-side chat sessions behind ``/api/chat``."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict
+
+import pytest
+
+from src import chat_agent
+from src.backend.services.chat_sessions import ChatSessionStore
+
+try:  # Flask is optional during unit testing
+    from src.backend.app import create_app
+    from src.backend.routes import chat
+except ModuleNotFoundError:  # pragma: no cover - environment dependent
+    MISSING_FLASK = True
+else:
+    MISSING_FLASK = False
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def fake_engine(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        story = {"title": f"Story for {epic_title}", "description": "x" * 500}
+        return {"Epic": epic_title, "UserStories": [story], "TestCases": [{"id": "TC-01"}]}
+
+    monkeypatch.setattr(chat_agent.ai_engine, "generate_user_stories", fake_generate)
+    monkeypatch.setattr(chat_agent.ai_engine, "using_live_model", lambda: False)
+
+
+def test_evicts_least_recently_used_session() -> None:
+    store = ChatSessionStore(max_sessions=2, ttl_sec=60)
+    a, _ = store.get_or_create()
+    b, _ = store.get_or_create()
+    assert store.get(a.session_id) is a  # a is now the most recent
+
+    store.get_or_create()
+
+    assert store.get(b.session_id) is None
+    assert store.get(a.session_id) is a
+    assert store.stats()["evicted"] == 1
+
+
+def test_idle_sessions_expire_and_ids_start_fresh() -> None:
+    clock = _Clock()
+    store = ChatSessionStore(ttl_sec=10, clock=clock)
+    session, created = store.get_or_create()
+    assert created
+
+    clock.now += 10
+    again, created = store.get_or_create(session.session_id)
+
+    assert created and again.session_id != session.session_id
+    assert store.stats()["expired"] == 1
+
+
+def test_history_is_capped_at_max_turns() -> None:
+    store = ChatSessionStore(max_turns=2)
+    session, _ = store.get_or_create()
+    for i in range(5):
+        session.agent.respond(f"Epic {i}")
+        store.trim(session)
+
+    contents = [m.content for m in session.agent.history if m.role == "user"]
+    assert contents == ["Epic 3", "Epic 4"]
+    assert len(session.agent.serialise_history(last=1)) == 1
+
+
+@pytest.mark.skipif(MISSING_FLASK, reason="Flask is not installed")
+def test_client_sends_only_the_new_message(monkeypatch: pytest.MonkeyPatch) -> None:
+    store = ChatSessionStore(max_turns=3)
+    monkeypatch.setattr(chat, "get_chat_sessions", lambda: store)
+    client = create_app().test_client()
+
+    sizes = []
+    session_id = None
+    for i in range(6):
+        resp = client.post("/api/chat", json={"message": f"Epic {i}", "session_id": session_id})
+        assert resp.status_code == 200
+        body = resp.get_json()
+        session_id = body["session_id"]
+        sizes.append(len(resp.get_data()))
+        assert "history" not in body
+
+    # Same session throughout, bounded history, constant-size replies.
+    assert body["turns"] == 3
+    assert max(sizes) - min(sizes) < 16
+
+    history = client.get(f"/api/chat/sessions/{session_id}").get_json()["history"]
+    assert [m["content"] for m in history if m["role"] == "user"] == ["Epic 3", "Epic 4", "Epic 5"]
+
+    assert client.delete(f"/api/chat/sessions/{session_id}").status_code == 204
+    assert client.get(f"/api/chat/sessions/{session_id}").status_code == 404
+
+
+@pytest.mark.skipif(MISSING_FLASK, reason="Flask is not installed")
+def test_legacy_history_seeds_a_new_session(monkeypatch: pytest.MonkeyPatch) -> None:
+    store = ChatSessionStore()
+    monkeypatch.setattr(chat, "get_chat_sessions", lambda: store)
+    client = create_app().test_client()
+    history = [{"role": "user", "content": "Earlier"}, {"role": "assistant", "content": "Reply"}]
+
+    body = client.post("/api/chat", json={"message": "Next", "history": history}).get_json()
+
+    session = store.get(body["session_id"])
+    assert [m.content for m in session.agent.history][:2] == ["Earlier", "Reply"]
+    assert json.dumps(body).count("Earlier") == 0
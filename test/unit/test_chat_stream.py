@@ -0,0 +1,72 @@
+"""Tests for the streamed ``POST /api/chat/stream`` endpoint."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from src import ai_engine
+from src.backend.services.chat_sessions import ChatSessionStore
+
+try:  # Flask is optional during unit testing
+    from src.backend.app import create_app
+    from src.backend.routes import chat
+except ModuleNotFoundError:  # pragma: no cover - environment dependent
+    MISSING_FLASK = True
+else:
+    MISSING_FLASK = False
+
+pytestmark = pytest.mark.skipif(MISSING_FLASK, reason="Flask is not installed")
+
+
+@pytest.fixture()
+def client(monkeypatch: pytest.MonkeyPatch):
+    # Mock mode: the deterministic output is replayed through the streaming events.
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: None)
+    monkeypatch.setattr(ai_engine, "using_live_model", lambda: False)
+    store = ChatSessionStore()
+    monkeypatch.setattr(chat, "get_chat_sessions", lambda: store)
+    return create_app().test_client()
+
+
+def _events(text: str) -> List[Tuple[str, Dict[str, Any]]]:
+    events = []
+    for frame in text.strip().split("\n\n"):
+        name, data = frame.split("\n", 1)
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_mock_reply_streams_text_and_stories_then_final_payload(client) -> None:
+    resp = client.post("/api/chat/stream", json={"message": "E-commerce checkout"})
+
+    assert resp.mimetype == "text/event-stream"
+    events = _events(resp.get_data(as_text=True))
+    names = [name for name, _ in events]
+    assert names[0] == "delta"
+    assert names[-1] == "reply" and names.count("reply") == 1
+    assert names.index("story") < len(names) - 1
+
+    streamed = [data["story"]["title"] for name, data in events if name == "story"]
+    final = events[-1][1]
+    assert streamed == [s["title"] for s in final["reply"]["payload"]["UserStories"]]
+    assert final["validation"]["schema_passed"] is True
+    assert final["mode"] == "mock" and final["turns"] == 1
+
+
+def test_streamed_replies_share_the_session(client) -> None:
+    first = _events(client.post("/api/chat/stream", json={"message": "Checkout"}).get_data(as_text=True))
+    session_id = first[-1][1]["session_id"]
+
+    second = _events(client.post(
+        "/api/chat/stream", json={"message": "Login", "session_id": session_id},
+    ).get_data(as_text=True))
+
+    assert second[-1][1]["session_id"] == session_id
+    assert second[-1][1]["turns"] == 2
+
+
+def test_stream_requires_a_message(client) -> None:
+    assert client.post("/api/chat/stream", json={}).status_code == 400
@@ -0,0 +1,121 @@
+"""Tests for the live-model circuit breaker."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from src import ai_engine
+from src.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_opens_after_threshold_and_probes_once_after_cooldown() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_sec=10, clock=clock)
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    clock.now += 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()        # the single probe
+    assert not breaker.allow_request()    # everyone else still short-circuits
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["short_circuited"] == 2
+
+
+def test_failed_probe_reopens_for_another_cooldown() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=5, clock=clock)
+    breaker.record_failure()
+
+    clock.now += 5
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert breaker.stats()["retry_in_sec"] == 5.0
+    assert breaker.stats()["opened"] == 2
+
+
+def test_open_circuit_skips_the_model_and_its_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_sec=60)
+    calls = {"create": 0, "sleep": 0}
+
+    def create(**kwargs: Any) -> Any:
+        calls["create"] += 1
+        raise ConnectionError("provider down")
+
+    def sleep(seconds: float) -> None:
+        calls["sleep"] += 1
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: client)
+    monkeypatch.setattr(ai_engine, "get_response_cache", lambda: None)
+    monkeypatch.setattr(ai_engine, "get_rate_limiter", lambda: None)
+    monkeypatch.setattr(ai_engine, "get_circuit_breaker", lambda: breaker)
+    monkeypatch.setattr(ai_engine.time, "sleep", sleep)
+
+    results = [ai_engine.generate_user_stories(f"Epic {i}", f"Epic {i}", epic_id=f"E{i}") for i in range(10)]
+
+    # Two failed attempts open the circuit; every later epic goes straight to the mock.
+    assert calls == {"create": 2, "sleep": 2}
+    assert all(r["UserStories"] for r in results)
+    assert [r["epic_id"] for r in results] == [f"E{i}" for i in range(10)]
+
+
+def test_rate_limited_probe_is_released(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 6.0
+
+    class RateLimited(Exception):
+        status_code = 429
+
+    def create(**kwargs: Any) -> Any:
+        raise RateLimited("slow down")
+
+    limiter = SimpleNamespace(acquire=lambda tokens: 0.0, on_rate_limited=lambda headers: 0.0)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: client)
+    monkeypatch.setattr(ai_engine, "get_response_cache", lambda: None)
+    monkeypatch.setattr(ai_engine, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(ai_engine, "get_circuit_breaker", lambda: breaker)
+
+    result = ai_engine.generate_user_stories("Epic", "Epic", epic_id="E1")
+
+    # A 429 says nothing about the model's health: the circuit stays
+    # half-open and the next caller may probe again.
+    assert result["UserStories"]
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_check_reports_whether_the_caller_holds_the_probe() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=5, clock=clock)
+    assert breaker.check() is False
+    breaker.record_failure()
+    clock.now = 5.0
+
+    assert breaker.check() is True
+    breaker.release_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
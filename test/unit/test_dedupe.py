@@ -0,0 +1,136 @@
+"""Tests for near-duplicate story detection (MinHash/LSH)."""
+
+from __future__ import annotations
+
+import copy
+import random
+
+import pytest
+
+from src import ai_engine, dedupe
+
+
+def _story(title: str, description: str) -> dict:
+    return {
+        "title": title,
+        "description": description,
+        "acceptance_criteria": {"Given": "a signed-in user", "When": "they act", "Then": "it works"},
+        "story_points": 3,
+    }
+
+
+def _epics() -> list:
+    return [
+        {"epic_id": "E1", "Epic": "Checkout", "UserStories": [
+            _story("Pay by card", "As a shopper I want to pay by credit card so that I can finish my order quickly"),
+            _story("Apply coupon", "As a shopper I want to enter a discount code before paying"),
+        ], "TestCases": []},
+        {"epic_id": "E2", "Epic": "Payments", "UserStories": [
+            _story("Pay by card", "As a shopper I want to pay by credit card so I can finish my order quickly"),
+            _story("Refunds", "As support staff I want to refund a captured payment to the original card"),
+        ], "TestCases": []},
+    ]
+
+
+def test_near_duplicate_across_epics_is_merged_into_first() -> None:
+    result = dedupe.find_duplicates(_epics(), threshold=0.7)
+
+    assert result.stats["merged"] == 1
+    assert result.stats["kept"] == 3
+    keep, merge = result.decisions
+    assert (keep["action"], keep["epic_id"], keep["story_index"], keep["merged"]) == ("keep", "E1", 0, 1)
+    assert (merge["action"], merge["epic_id"], merge["story_index"]) == ("merge", "E2", 0)
+    assert merge["into"]["epic_id"] == "E1"
+    assert 0.7 <= merge["similarity"] < 1.0
+
+
+def test_threshold_is_respected() -> None:
+    epics = _epics()
+    similarity = dedupe.jaccard(
+        dedupe.shingles(dedupe.story_text(epics[0]["UserStories"][0])),
+        dedupe.shingles(dedupe.story_text(epics[1]["UserStories"][0])),
+    )
+
+    assert dedupe.find_duplicates(epics, threshold=min(1.0, similarity + 0.05)).decisions == []
+    assert dedupe.find_duplicates(epics, threshold=similarity).stats["merged"] == 1
+
+
+def test_apply_decisions_does_not_modify_input() -> None:
+    epics = _epics()
+    before = copy.deepcopy(epics)
+
+    cleaned, result = dedupe.dedupe_stories(epics, threshold=0.7)
+
+    assert epics == before
+    assert [len(e["UserStories"]) for e in cleaned] == [2, 1]
+    assert cleaned[1]["UserStories"][0]["title"] == "Refunds"
+    assert cleaned[0] is epics[0]  # untouched epics are passed through
+    assert result.to_dict()["stats"]["merged"] == 1
+
+
+def test_only_test_cases_naming_a_merged_story_are_dropped() -> None:
+    epics = _epics()
+    epics[1]["TestCases"] = [
+        {"id": "TC-1", "objective": "Refund reaches the card"},  # lists differ in length and order
+        {"id": "TC-2", "objective": "Card payment", "story_title": "Pay by card"},
+        {"id": "TC-3", "objective": "Partial refund"},
+    ]
+    epics[0]["TestCases"] = [{"id": "TC-9", "objective": "Card payment", "story": "Pay by card"}]
+
+    cleaned, _ = dedupe.dedupe_stories(epics, threshold=0.7)
+
+    assert [t["id"] for t in cleaned[1]["TestCases"]] == ["TC-1", "TC-3"]
+    assert [t["id"] for t in cleaned[0]["TestCases"]] == ["TC-9"]  # the kept story keeps its tests
+
+
+def test_unlinked_test_cases_are_all_kept() -> None:
+    epics = _epics()
+    epics[1]["TestCases"] = [{"id": f"TC-{i}", "objective": f"Check {i}"} for i in range(3)]
+
+    cleaned, result = dedupe.dedupe_stories(epics, threshold=0.7)
+
+    assert result.stats["merged"] == 1
+    assert len(cleaned[1]["UserStories"]) == 1
+    assert cleaned[1]["TestCases"] == epics[1]["TestCases"]
+
+
+def test_numpy_and_python_signatures_agree() -> None:
+    pytest.importorskip("numpy")
+    hasher = dedupe.MinHasher(num_perm=16, seed=3)
+    sets = [dedupe.shingles("one two three four five"), set(), dedupe.shingles("x")]
+
+    assert hasher.signatures(sets) == [hasher._signature_python(s) for s in sets]
+    assert hasher.band_keys(sets, 4, 4) == [
+        dedupe._band_keys_python(hasher._signature_python(s), 4, 4) for s in sets
+    ]
+
+
+def test_lsh_finds_injected_duplicates_among_many_stories() -> None:
+    rng = random.Random(7)
+    vocab = [f"word{i}" for i in range(500)]
+    epics = [
+        {"epic_id": f"E{e}", "UserStories": [
+            _story(f"Story {e}.{s}", " ".join(rng.choice(vocab) for _ in range(20))) for s in range(5)
+        ]}
+        for e in range(200)
+    ]
+    for k in range(10):
+        epics[100 + k]["UserStories"][2] = dict(epics[k]["UserStories"][0])
+
+    result = dedupe.find_duplicates(epics)
+
+    merged = {(d["epic_id"], d["into"]["epic_id"]) for d in result.merged}
+    assert merged == {(f"E{100 + k}", f"E{k}") for k in range(10)}
+    # LSH keeps the exact comparisons close to the number of real duplicates.
+    assert result.stats["candidate_pairs"] < 100
+
+
+def test_post_process_dedupe_is_opt_in(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ai_engine.Config, "STORY_DEDUPE_ENABLED", False)
+    cleaned, report = ai_engine.post_process_with_report(_epics())
+    assert report is None
+    assert [len(e["UserStories"]) for e in cleaned] == [2, 2]
+
+    cleaned, report = ai_engine.post_process_with_report(_epics(), dedupe_stories=True, threshold=0.7)
+    assert report["stats"]["merged"] == 1
+    assert [len(e["UserStories"]) for e in ai_engine.post_process(_epics(), dedupe_stories=True, threshold=0.7)] == [2, 1]
@@ -0,0 +1,79 @@
+"""Tests for corpus-wide evaluation over a runs directory."""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+
+import pytest
+
+from src import ai_engine, evaluation
+
+
+def _write_run(path, run, compress=False) -> None:
+    data = json.dumps(run).encode("utf-8")
+    if compress:
+        path.with_name(path.name + ".gz").write_bytes(gzip.compress(data))
+    else:
+        path.write_bytes(data)
+
+
+@pytest.fixture()
+def runs_dir(tmp_path):
+    runs = tmp_path / "runs"
+    runs.mkdir()
+    good = [ai_engine._mock_user_stories("Checkout flow", "Checkout")]
+    bad = [{"epic_id": "E1", "Epic": "Broken", "UserStories": [{"title": "No criteria"}], "TestCases": []}]
+    _write_run(runs / "a.json", {"run_id": "a", "project_name": "Shop", "mode": "mock", "output": {"epics": good}})
+    _write_run(runs / "b.json", {"run_id": "b", "project_name": "Shop", "mode": "mock",
+                                 "output": {"epics": good + bad}}, compress=True)
+    _write_run(runs / "c.json", {"run_id": "c", "project_name": "Bank", "mode": "live", "output": {"epics": good}})
+    # Older runs stored plain titles under output.stories.
+    _write_run(runs / "d.json", {"run_id": "d", "project_name": "Bank",
+                                 "output": {"stories": [{"epic_id": "E1", "stories": ["Pay"], "test_cases": ["TC1"]}]}})
+    (runs / "e.json").write_text("{not json", encoding="utf-8")
+    (runs / "catalog.sqlite3").write_bytes(b"")
+    (runs / ".f.json.tmp").write_text("{}", encoding="utf-8")
+    return runs
+
+
+def test_evaluate_run_scores_run_and_epics(runs_dir) -> None:
+    row, epic_rows = evaluation.evaluate_run(str(runs_dir / "b.json.gz"), with_epics=True)
+
+    assert (row["run_id"], row["project_name"], row["mode"], row["epics"]) == ("b", "Shop", "mock", 2)
+    assert row["schema_passed"] is False
+    assert [r["schema_passed"] for r in epic_rows] == [True, False]
+    assert set(evaluation.METRIC_COLUMNS) <= set(row)
+    assert epic_rows[0]["overall_consistency_score"] == 100.0
+
+
+def test_legacy_and_unreadable_runs_do_not_raise(runs_dir) -> None:
+    legacy, _ = evaluation.evaluate_run(str(runs_dir / "d.json"))
+    broken, _ = evaluation.evaluate_run(str(runs_dir / "e.json"))
+
+    assert (legacy["format"], legacy["mode"], legacy["stories"], legacy["schema_passed"]) == ("legacy", "unknown", 1, False)
+    assert broken["error"] and broken["run_id"] == "e"
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_evaluate_corpus_writes_rows_and_aggregates(runs_dir, tmp_path, workers: int) -> None:
+    out = tmp_path / "eval" / "runs.csv"
+    epics_out = tmp_path / "eval" / "epics.jsonl"
+
+    summary = evaluation.evaluate_corpus(str(runs_dir), str(out), epics_path=str(epics_out), workers=workers)
+
+    assert (summary["runs"], summary["unreadable"]) == (5, 1)
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert sorted(r["run_id"] for r in rows) == ["a", "b", "c", "d", "e"]
+    assert len(epics_out.read_text(encoding="utf-8").splitlines()) == 5
+
+    with open(summary["aggregates_out"], newline="", encoding="utf-8") as f:
+        groups = {(r["project_name"], r["mode"]): r for r in csv.DictReader(f)}
+    assert list(groups)[-1] == ("ALL", "ALL")
+    shop = groups[("Shop", "mock")]
+    assert (shop["runs"], shop["epics"], shop["run_schema_pass_rate"], shop["epic_schema_pass_rate"]) == (
+        "2", "3", "50.0", "66.67",
+    )
+    assert groups[("ALL", "ALL")]["unreadable"] == "1"
@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
+import csv
 from typing import Dict, Any
 
 import pytest
 
+from src import dedupe
+
 try:  # Flask is optional during unit testing
+    from src.backend.app import create_app
     from src.backend.routes import exports
+    from src.backend.services.run_catalog import RunCatalog
+    from src.backend.services.runs import RunStore
 except ModuleNotFoundError as exc:  # pragma: no cover - environment dependent
     exports = None  # type: ignore[assignment]
     MISSING_FLASK = True
@@ -63,4 +69,79 @@ def test_to_csv_includes_header_and_bom() -> None:
     assert csv_text.startswith("\ufeff")
     lines = csv_text.lstrip("\ufeff").splitlines()
     assert lines[0] == "Epic ID,Story,Test Case"
-    assert len(lines) == 3  # header + two rows
\ No newline at end of file
+    assert len(lines) == 3  # header + two rows
+
+def test_deduped_run_drops_only_the_linked_test_case() -> None:
+    def story(title: str, text: str) -> Dict[str, Any]:
+        return {"title": title, "description": text}
+
+    def case(tc_id: str, objective: str, **link: str) -> Dict[str, Any]:
+        return {"id": tc_id, "objective": objective, "expected_result": "ok", **link}
+
+    output = {"epics": [
+        {"epic_id": "E1", "UserStories": [story("Reset password", "As a user I want to reset my password by email link")],
+         "TestCases": [case("TC-1", "Reset by email")]},
+        {"epic_id": "E2", "UserStories": [
+            story("Reset password", "As a user I want to reset my password by email link"),
+            story("Close account", "As a user I want to delete my account and data"),
+        ], "TestCases": [case("TC-2", "Reset again", story="Reset password"), case("TC-3", "Account closed")]},
+    ]}
+
+    epics, result = dedupe.dedupe_stories(output["epics"], threshold=0.8)
+
+    assert result.stats["merged"] == 1
+    assert exports._get_flat_rows({"epics": epics}) == [
+        ["E1", "Reset password", "TC-1: Reset by email → ok"],
+        ["E2", "Close account", "TC-3: Account closed → ok"],
+    ]
+
+
+def test_csv_route_streams_the_run_file_without_caching_it(tmp_path, monkeypatch) -> None:
+    store = RunStore(str(tmp_path), write_behind=False, catalog=RunCatalog(str(tmp_path)))
+    store.save({"run_id": "r1", "output": _sample_output()})
+    store.save({"run_id": "empty", "output": {"epics": []}})
+    store = RunStore(str(tmp_path), write_behind=False, catalog=RunCatalog(str(tmp_path)))
+    monkeypatch.setattr(exports, "get_run_store", lambda: store)
+    client = create_app().test_client()
+
+    resp = client.get("/api/runs/r1/csv?columns=summary")
+
+    assert resp.mimetype == "text/csv"
+    assert resp.get_data(as_text=True).lstrip("\ufeff").splitlines() == [
+        "Epic ID,Story,Test Case",
+        "E-42,Review cart,TC-01: Cart shows all items → Line items and totals appear",
+        "E-42,Pay securely,TC-02: Payment succeeds → Confirmation page is displayed",
+    ]
+    assert store._cache == {}
+    assert client.get("/api/runs/empty/csv").get_json()["status"] == "empty"
+    assert client.get("/api/runs/missing/csv").status_code == 404
+
+
+def test_legacy_stories_shape_is_still_exported() -> None:
+    legacy = {"stories": [{"epic_id": "E1", "stories": ["Review cart"], "test_cases": ["TC01", "TC02"]}]}
+
+    rows = exports._get_flat_rows(legacy)
+
+    assert rows == [["E1", "Review cart", "TC01"], ["E1", "", "TC02"]]
+
+
+def test_iter_csv_streams_full_story_and_test_fields() -> None:
+    output = _sample_output()
+    output["epics"][0]["UserStories"][0].update({
+        "description": "As a shopper, I review my cart",
+        "acceptance_criteria": {"Given": "items", "When": "open cart", "Then": "totals shown"},
+        "story_points": 3,
+    })
+    output["epics"][0]["TestCases"][0]["test_steps"] = ["Open cart", "Check totals"]
+
+    chunks = list(exports.iter_csv(output))
+
+    assert len(chunks) == 3  # one chunk per line
+    header = chunks[0].lstrip("\ufeff").strip().split(",")
+    assert header == exports.DETAILED_HEADER
+    first = next(csv.reader([chunks[1]]))
+    assert first == [
+        "E-42", "Checkout", "Review cart", "As a shopper, I review my cart",
+        "items", "open cart", "totals shown", "3",
+        "TC-01", "Cart shows all items", "", "Open cart | Check totals", "Line items and totals appear",
+    ]
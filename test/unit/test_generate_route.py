@@ -0,0 +1,341 @@
+"""Tests for the multi-epic ``POST /api/generate`` endpoint."""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict
+
+import pytest
+
+try:  # Flask is optional during unit testing
+    from src.backend.app import create_app
+    from src.backend.routes import generate
+    from src.backend.services.run_catalog import RunCatalog
+    from src.backend.services.runs import RunStore
+    from src.usage import empty_usage
+except ModuleNotFoundError:  # pragma: no cover - environment dependent
+    MISSING_FLASK = True
+else:
+    MISSING_FLASK = False
+
+pytestmark = pytest.mark.skipif(MISSING_FLASK, reason="Flask is not installed")
+
+
+@pytest.fixture()
+def store(tmp_path):
+    # Synchronous writes so tests can read the run file as soon as a request returns.
+    return RunStore(str(tmp_path), write_behind=False, catalog=RunCatalog(str(tmp_path)))
+
+
+@pytest.fixture()
+def client(monkeypatch: pytest.MonkeyPatch, store):
+    monkeypatch.setattr(generate, "get_run_store", lambda: store)
+    monkeypatch.setattr(generate, "using_live_model", lambda: False)
+    return create_app().test_client()
+
+
+def _saved_run(store, run_id: str) -> Dict[str, Any]:
+    with open(store.path_for(run_id), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_generate_keeps_input_order_under_concurrency(
+    client, store, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fake_generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(random.uniform(0.01, 0.05))
+        with lock:
+            active["now"] -= 1
+        return {"Epic": epic_title, "UserStories": [], "TestCases": []}
+
+    monkeypatch.setattr(generate, "generate_user_stories", fake_generate)
+    monkeypatch.setattr(generate.Config, "GENERATION_CONCURRENCY", 3)
+
+    epics = [{"epic_id": f"E{i}", "title": f"Epic {i}"} for i in range(8)]
+    resp = client.post("/api/generate", json={"epics": epics})
+
+    assert resp.status_code == 200
+    run_id = resp.get_json()["run_id"]
+    run = _saved_run(store, run_id)
+    assert [e["epic_id"] for e in run["output"]["epics"]] == [f"E{i}" for i in range(8)]
+    assert 1 < active["peak"] <= 3
+
+
+def test_generate_rejects_more_than_max_epics(client, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(generate.Config, "MAX_EPICS_PER_REQUEST", 2)
+
+    resp = client.post("/api/generate", json={"epics": [{"title": "a"}, {"title": "b"}, {"title": "c"}]})
+
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "Too many epics"
+
+
+def test_async_generate_returns_job_and_reports_progress(
+    client, store, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    release = threading.Event()
+
+    def fake_generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        release.wait(timeout=5)
+        return {"Epic": epic_title, "UserStories": [], "TestCases": []}
+
+    monkeypatch.setattr(generate, "generate_user_stories", fake_generate)
+
+    epics = [{"epic_id": "E1", "title": "One"}, {"epic_id": "E2", "title": "Two"}]
+    resp = client.post("/api/generate", json={"epics": epics, "async": True})
+
+    assert resp.status_code == 202
+    body = resp.get_json()
+    job_url = body["links"]["job"]
+
+    pending = client.get(job_url).get_json()
+    assert pending["status"] in ("queued", "running")
+    assert pending["progress"] == {"total": 2, "completed": 0, "failed": 0}
+
+    release.set()
+    deadline = time.time() + 5
+    job = pending
+    while job["status"] not in ("succeeded", "failed") and time.time() < deadline:
+        time.sleep(0.01)
+        job = client.get(job_url).get_json()
+
+    assert job["status"] == "succeeded"
+    assert [e["status"] for e in job["epics"]] == ["succeeded", "succeeded"]
+    assert job["run_id"] == body["run_id"]
+    assert job["links"]["json"] == f"/api/runs/{body['run_id']}/json"
+    assert store.path_for(body["run_id"]) is not None
+
+
+def test_unknown_job_is_404(client) -> None:
+    assert client.get("/api/jobs/does-not-exist").status_code == 404
+
+
+def test_stream_emits_each_epic_then_summary(client, store, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        time.sleep(0.05 if epic_title == "Slow" else 0)
+        return {"Epic": epic_title, "UserStories": [], "TestCases": []}
+
+    monkeypatch.setattr(generate, "generate_user_stories", fake_generate)
+    epics = [{"epic_id": "E1", "title": "Slow"}, {"epic_id": "E2", "title": "Fast"}]
+
+    resp = client.post("/api/generate/stream", json={"epics": epics})
+
+    assert resp.mimetype == "application/x-ndjson"
+    events = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [e["type"] for e in events] == ["epic", "epic", "summary"]
+    assert events[0]["epic"]["epic_id"] == "E2"  # fastest epic first
+    assert sorted(e["index"] for e in events[:2]) == [0, 1]
+
+    run_id = events[-1]["run_id"]
+    run = _saved_run(store, run_id)
+    assert [e["epic_id"] for e in run["output"]["epics"]] == ["E1", "E2"]
+
+
+def test_stream_summary_reports_partial_and_failed_runs(client, store, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        if epic_title.startswith("Bad"):
+            raise RuntimeError("model error")
+        return {"Epic": epic_title, "UserStories": [], "TestCases": []}
+
+    monkeypatch.setattr(generate, "generate_user_stories", fake_generate)
+
+    resp = client.post("/api/generate/stream", json={"epics": [{"title": "Good"}, {"title": "Bad"}]})
+    events = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    error = next(e for e in events if e["type"] == "error")
+    assert (error["index"], error["epic_id"]) == (1, "E2")  # 0-based index, 1-based default id
+    summary = events[-1]
+    assert summary["status"] == "partial"
+    assert [e["epic_id"] for e in _saved_run(store, summary["run_id"])["output"]["epics"]] == ["E1"]
+
+    saved = len(os.listdir(store.runs_dir))
+    resp = client.post("/api/generate/stream", json={"epics": [{"title": "Bad 1"}, {"title": "Bad 2"}]})
+    summary = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()][-1]
+    assert (summary["type"], summary["status"], summary["run_id"]) == ("summary", "failed", None)
+    assert len(os.listdir(store.runs_dir)) == saved  # no empty run is written
+
+
+def test_stream_supports_server_sent_events(client) -> None:
+    resp = client.post("/api/generate/stream?format=sse", json={"epics": [{"title": "Checkout"}]})
+
+    assert resp.mimetype == "text/event-stream"
+    text = resp.get_data(as_text=True)
+    assert text.startswith("event: epic\ndata: ")
+    assert "event: summary\n" in text
+
+
+def test_batch_size_groups_epics_per_model_call(client, store, monkeypatch: pytest.MonkeyPatch) -> None:
+    batches = []
+
+    def fake_batch(epics, **kwargs: Any):
+        batches.append([e["epic_id"] for e in epics])
+        return [{"Epic": e["epic_title"], "UserStories": [], "TestCases": []} for e in epics]
+
+    monkeypatch.setattr(generate, "generate_user_stories_batch", fake_batch)
+    epics = [{"epic_id": f"E{i}", "title": f"Epic {i}"} for i in range(5)]
+
+    resp = client.post("/api/generate", json={"epics": epics, "batch_size": 2})
+
+    assert resp.status_code == 200
+    assert sorted(batches) == [["E0", "E1"], ["E2", "E3"], ["E4"]]
+    run = _saved_run(store, resp.get_json()["run_id"])
+    assert [e["epic_id"] for e in run["output"]["epics"]] == [f"E{i}" for i in range(5)]
+
+
+def test_batch_size_applies_to_jobs_and_streams(client, store, monkeypatch: pytest.MonkeyPatch) -> None:
+    batches = []
+
+    def fake_batch(epics, **kwargs: Any):
+        batches.append([e["epic_id"] for e in epics])
+        return [{"Epic": e["epic_title"], "UserStories": [], "TestCases": []} for e in epics]
+
+    monkeypatch.setattr(generate, "generate_user_stories_batch", fake_batch)
+    epics = [{"epic_id": f"E{i}", "title": f"Epic {i}"} for i in range(3)]
+
+    resp = client.post("/api/generate/stream", json={"epics": epics, "batch_size": 2})
+    events = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert sorted(e["index"] for e in events if e["type"] == "epic") == [0, 1, 2]
+    assert sorted(batches) == [["E0", "E1"], ["E2"]]
+
+    batches.clear()
+    body = client.post("/api/generate", json={"epics": epics, "batch_size": 2, "async": True}).get_json()
+    deadline = time.time() + 5
+    job = client.get(body["links"]["job"]).get_json()
+    while job["status"] not in ("succeeded", "failed") and time.time() < deadline:
+        time.sleep(0.01)
+        job = client.get(body["links"]["job"]).get_json()
+    assert job["status"] == "succeeded"
+    assert sorted(batches) == [["E0", "E1"], ["E2"]]
+    run = _saved_run(store, body["run_id"])
+    assert [e["epic_id"] for e in run["output"]["epics"]] == ["E0", "E1", "E2"]
+
+
+@pytest.mark.parametrize("batch_size", ["abc", 0, 2.5, True])
+def test_invalid_batch_size_is_400(client, batch_size) -> None:
+    resp = client.post("/api/generate", json={"epics": [{"title": "a"}], "batch_size": batch_size})
+
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "Invalid batch_size"
+
+
+def test_previous_run_id_only_regenerates_changed_epics(client, store, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def fake_generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        calls.append(epic_title)
+        story = {"title": f"Story for {epic_title}: {epic_text}"}
+        return {"Epic": epic_title, "UserStories": [story], "TestCases": [], "usage": empty_usage()}
+
+    monkeypatch.setattr(generate, "generate_user_stories", fake_generate)
+    epics = [{"epic_id": f"E{i}", "title": f"Epic {i}", "description": "v1"} for i in range(4)]
+    first = client.post("/api/generate", json={"epics": epics}).get_json()["run_id"]
+
+    calls.clear()
+    epics[2] = dict(epics[2], description="v2")
+    epics.append({"epic_id": "E4", "title": "Epic 4", "description": "new"})
+    resp = client.post("/api/generate", json={"epics": epics, "previous_run_id": first})
+
+    assert resp.status_code == 200
+    assert sorted(calls) == ["Epic 2", "Epic 4"]
+    run = _saved_run(store, resp.get_json()["run_id"])
+    assert run["incremental"] == {
+        "previous_run_id": first,
+        "reused": ["E0", "E1", "E3"],
+        "regenerated": ["E2", "E4"],
+    }
+    out = run["output"]["epics"]
+    assert [e["epic_id"] for e in out] == [f"E{i}" for i in range(5)]
+    assert out[1]["UserStories"] == [{"title": "Story for Epic 1: v1"}]
+    assert out[1]["usage"]["reused_from"] == first
+    assert out[2]["UserStories"] == [{"title": "Story for Epic 2: v2"}]
+
+
+def test_incremental_run_skips_fallbacks_and_other_models(client, store, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def fake_generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        calls.append(epic_title)
+        result = {"Epic": epic_title, "UserStories": [], "TestCases": [], "usage": empty_usage("gpt-a")}
+        if epic_title == "Down":
+            result["fallback"] = True  # the live call failed and mock output stood in
+        return result
+
+    monkeypatch.setattr(generate, "generate_user_stories", fake_generate)
+    monkeypatch.setattr(generate, "using_live_model", lambda: True)
+    monkeypatch.setattr(generate, "model_name", lambda: "gpt-a")
+    epics = [{"epic_id": "E1", "title": "Up"}, {"epic_id": "E2", "title": "Down"}]
+    first = client.post("/api/generate", json={"epics": epics}).get_json()["run_id"]
+    assert _saved_run(store, first)["output"]["epics"][1]["fallback"] is True
+
+    calls.clear()
+    second = client.post("/api/generate", json={"epics": epics, "previous_run_id": first}).get_json()["run_id"]
+    assert calls == ["Down"]
+    assert _saved_run(store, second)["incremental"]["reused"] == ["E1"]
+
+    calls.clear()
+    monkeypatch.setattr(generate, "model_name", lambda: "gpt-b")
+    client.post("/api/generate", json={"epics": epics, "previous_run_id": second})
+    assert sorted(calls) == ["Down", "Up"]
+
+
+def test_incremental_stream_sends_reused_epics_first(client, store, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        return {"Epic": epic_title, "UserStories": [], "TestCases": [], "usage": empty_usage()}
+
+    monkeypatch.setattr(generate, "generate_user_stories", fake_generate)
+    epics = [{"epic_id": "E1", "title": "One"}, {"epic_id": "E2", "title": "Two"}]
+    first = client.post("/api/generate", json={"epics": epics}).get_json()["run_id"]
+
+    epics[0] = dict(epics[0], title="One, edited")
+    resp = client.post("/api/generate/stream", json={"epics": epics, "previous_run_id": first})
+
+    events = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [(e["type"], e.get("index"), e.get("reused")) for e in events] == [
+        ("epic", 1, True), ("epic", 0, None), ("summary", None, None),
+    ]
+    run = _saved_run(store, events[-1]["run_id"])
+    assert run["incremental"]["reused"] == ["E2"]
+
+
+def test_unknown_previous_run_is_404(client) -> None:
+    resp = client.post("/api/generate", json={"epics": [{"title": "a"}], "previous_run_id": "nope"})
+
+    assert resp.status_code == 404
+
+
+def test_dedupe_stories_merges_repeats_across_epics(client, store, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_generate(epic_text: str, epic_title: str, **kwargs: Any) -> Dict[str, Any]:
+        stories = [
+            {"title": "Reset password", "description": "As a user I want to reset my password by email link"},
+            {"title": f"Own story of {epic_title}", "description": f"Something only {epic_title} needs"},
+        ]
+        return {"Epic": epic_title, "UserStories": stories, "TestCases": []}
+
+    monkeypatch.setattr(generate, "generate_user_stories", fake_generate)
+    epics = [{"epic_id": "E1", "title": "Login"}, {"epic_id": "E2", "title": "Account"}]
+    resp = client.post("/api/generate", json={"epics": epics, "dedupe_stories": True})
+
+    assert resp.status_code == 200
+    run = _saved_run(store, resp.get_json()["run_id"])
+    out = run["output"]["epics"]
+    assert [len(e["UserStories"]) for e in out] == [2, 1]
+    assert run["dedupe"]["stats"]["merged"] == 1
+    decision = next(d for d in run["dedupe"]["decisions"] if d["action"] == "merge")
+    assert (decision["epic_id"], decision["into"]["epic_id"]) == ("E2", "E1")
+
+
+def test_dedupe_is_off_by_default_and_checks_threshold(client, store) -> None:
+    resp = client.post("/api/generate", json={"epics": [{"title": "a"}]})
+    assert "dedupe" not in _saved_run(store, resp.get_json()["run_id"])
+
+    resp = client.post("/api/generate", json={"epics": [{"title": "a"}], "dedupe_threshold": 1.5})
+    assert resp.status_code == 400
@@ -0,0 +1,96 @@
+"""Tests for the Jira client against a local stub Jira server."""
+
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.backend.services.jira_api import JiraAPI
+
+TOTAL_EPICS = 230
+
+
+class _StubJira(BaseHTTPRequestHandler):
+    requests_seen: list = []
+    page_cap = 100
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        type(self).requests_seen.append((url.path, query))
+        if url.path != "/rest/api/3/search":
+            self.send_error(404)
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = int(query.get("startAt", 0))
+        size = min(int(query.get("maxResults", 50)), self.page_cap)
+        issues = [
+            {"key": f"ECOM-{i}", "fields": {"summary": f"Epic {i}", "description": None}}
+            for i in range(start, min(start + size, TOTAL_EPICS))
+        ]
+        body = json.dumps({"startAt": start, "maxResults": size, "total": TOTAL_EPICS, "issues": issues})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def jira():
+    _StubJira.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubJira)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = JiraAPI(f"http://127.0.0.1:{server.server_address[1]}", "qa@example.com", "token")
+    yield client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_iter_epics_fetches_every_page_in_order(jira) -> None:
+    epics = jira.list_epics_for_project("ECOM")
+
+    assert [e["epic_id"] for e in epics] == [f"ECOM-{i}" for i in range(TOTAL_EPICS)]
+    starts = sorted(int(q["startAt"]) for _, q in _StubJira.requests_seen)
+    assert starts == [0, 100, 200]
+
+
+def test_iter_epics_follows_server_page_cap(jira, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(_StubJira, "page_cap", 50)
+
+    epics = jira.list_epics_for_project("ECOM")
+
+    assert len(epics) == TOTAL_EPICS
+    assert len(_StubJira.requests_seen) == 5
+
+
+def test_search_epics_respects_max_results(jira) -> None:
+    epics = jira.search_epics(project_key="ECOM", max_results=25)
+
+    assert len(epics) == 25
+    assert _StubJira.requests_seen[0][1]["maxResults"] == "25"
+
+
+def test_repeated_search_is_cached_then_revalidated(jira) -> None:
+    first = jira.search_issues("project = ECOM")
+    jira.search_issues("project = ECOM")
+    assert len(_StubJira.requests_seen) == 1
+
+    jira.cache_ttl = 0  # force revalidation: the stub answers 304
+    again = jira.search_issues("project = ECOM")
+
+    assert len(_StubJira.requests_seen) == 2
+    assert again == first
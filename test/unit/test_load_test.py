@@ -0,0 +1,109 @@
+"""Tests for the load-test mode of the integration evaluation runner."""
+
+from __future__ import annotations
+
+import importlib.util
+import threading
+import time
+from pathlib import Path
+
+_PATH = Path(__file__).resolve().parents[1] / "integration" / "evaluation_runner.py"
+_spec = importlib.util.spec_from_file_location("evaluation_runner", _PATH)
+evaluation_runner = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(evaluation_runner)
+
+
+class _Response:
+    def __init__(self, status_code: int, body: dict) -> None:
+        self.status_code = status_code
+        self._body = body
+
+    def json(self) -> dict:
+        return self._body
+
+
+class _FakeSession:
+    """Answers like the API after a short delay and counts concurrent requests."""
+
+    def __init__(self, delay: float = 0.005, fail_csv: bool = False) -> None:
+        self.delay = delay
+        self.fail_csv = fail_csv
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, **kwargs) -> _Response:
+        with self._lock:
+            self.calls.append((method, url.rsplit("/api", 1)[-1]))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if url.endswith("/generate"):
+            return _Response(200, {"run_id": "r1"})
+        if url.endswith("/chat"):
+            return _Response(200, {"session_id": "s1"})
+        if url.endswith("/csv") and self.fail_csv:
+            return _Response(500, {})
+        return _Response(200, {})
+
+    def post(self, url: str, **kwargs) -> _Response:
+        return self.request("POST", url, **kwargs)
+
+
+def test_percentile_interpolates() -> None:
+    values = [10.0, 20.0, 30.0, 40.0, 50.0]
+    assert evaluation_runner.percentile(values, 50) == 30.0
+    assert evaluation_runner.percentile(values, 95) == 48.0
+    assert evaluation_runner.percentile([], 95) is None
+
+
+def test_closed_loop_runs_every_endpoint_concurrently() -> None:
+    session = _FakeSession()
+    evaluator = evaluation_runner.TestEvaluator("http://test/api")
+
+    report = evaluator.run_load_test(users=4, duration=0, iterations=12, session=session)
+
+    assert report["scenarios"] == 12
+    assert session.peak > 1
+    for name in ("generate", "json", "csv", "chat"):
+        row = report["endpoints"][name]
+        assert (row["requests"], row["errors"]) == (12, 0)
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] <= row["max_ms"]
+        assert row["throughput_rps"] > 0
+    assert ("GET", "/runs/r1/csv") in session.calls
+
+
+def test_arrival_rate_paces_scenarios_and_counts_errors() -> None:
+    session = _FakeSession(fail_csv=True)
+    evaluator = evaluation_runner.TestEvaluator("http://test/api")
+
+    report = evaluator.run_load_test(users=2, rate=50, duration=0, iterations=10,
+                                     endpoints=("generate", "csv"), session=session)
+
+    assert report["arrivals"] == "constant"
+    assert report["wall_sec"] >= 9 / 50
+    assert report["endpoints"]["csv"]["errors"] == 10
+    assert report["endpoints"]["csv"]["error_rate"] == 1.0
+    assert report["arrival_lag_ms"]["p50"] is not None
+    assert set(report["endpoints"]) == {"generate", "csv"}
+
+
+def test_compare_flags_slower_p95_and_lower_throughput() -> None:
+    baseline = {"endpoints": {
+        "generate": {"p95_ms": 100.0, "throughput_rps": 10.0},
+        "csv": {"p95_ms": 10.0, "throughput_rps": 10.0},
+    }}
+    current = {"endpoints": {
+        "generate": {"p95_ms": 130.0, "throughput_rps": 7.0},
+        "csv": {"p95_ms": 11.0, "throughput_rps": 9.0},
+        "chat": {"p95_ms": 1.0, "throughput_rps": 1.0},
+    }}
+
+    regressions = evaluation_runner.compare_load_reports(current, baseline, threshold=0.2)
+
+    assert [(r["endpoint"], r["metric"]) for r in regressions] == [
+        ("generate", "p95_ms"), ("generate", "throughput_rps"),
+    ]
@@ -0,0 +1,71 @@
+"""Tests for the stage histograms, request counters and ``/metrics``."""
+
+from __future__ import annotations
+
+import pytest
+
+from src import ai_engine, metrics
+from src.metrics import Counter, Histogram
+
+try:  # Flask is optional during unit testing
+    from src.backend.app import create_app
+    from src.backend.routes import generate
+    from src.backend.services.run_catalog import RunCatalog
+    from src.backend.services.runs import RunStore
+except ModuleNotFoundError:  # pragma: no cover - environment dependent
+    MISSING_FLASK = True
+else:
+    MISSING_FLASK = False
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    hist = Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value, "parse")
+
+    lines = hist.render()
+
+    assert 't_seconds_bucket{stage="parse",le="0.1"} 2' in lines
+    assert 't_seconds_bucket{stage="parse",le="1"} 3' in lines
+    assert 't_seconds_bucket{stage="parse",le="+Inf"} 4' in lines
+    assert 't_seconds_count{stage="parse"} 4' in lines
+    assert 't_seconds_sum{stage="parse"} 3.65' in lines
+
+
+def test_counter_and_label_escaping() -> None:
+    counter = Counter("t_total", "test", ("route",))
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+
+    assert counter.value('/a"b') == 3
+    assert 't_total{route="/a\\"b"} 3' in counter.render()
+
+
+def test_timed_records_a_stage() -> None:
+    before = metrics.STAGE_SECONDS.snapshot("unit_test_stage")["count"]
+    with metrics.timed("unit_test_stage"):
+        pass
+    assert metrics.STAGE_SECONDS.snapshot("unit_test_stage")["count"] == before + 1
+
+
+@pytest.mark.skipif(MISSING_FLASK, reason="Flask is not installed")
+def test_generate_request_shows_up_on_metrics(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    store = RunStore(str(tmp_path), write_behind=False, catalog=RunCatalog(str(tmp_path)))
+    monkeypatch.setattr(generate, "get_run_store", lambda: store)
+    monkeypatch.setattr(generate, "using_live_model", lambda: False)
+    monkeypatch.setattr(ai_engine, "using_live_model", lambda: False)
+    client = create_app().test_client()
+    before = metrics.HTTP_REQUESTS.value("/api/generate", "POST", 200, "mock")
+    persisted = metrics.STAGE_SECONDS.snapshot("run_persistence")["count"]
+
+    resp = client.post("/api/generate", json={"epics": [{"title": "Checkout", "description": "Pay"}]})
+    assert resp.status_code == 200
+
+    assert metrics.HTTP_REQUESTS.value("/api/generate", "POST", 200, "mock") == before + 1
+    assert metrics.STAGE_SECONDS.snapshot("run_persistence")["count"] == persisted + 1
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE jira_agent_stage_seconds histogram" in body
+    assert 'jira_agent_stage_seconds_count{stage="schema_validation"}' in body
+    assert 'jira_agent_http_requests_total{route="/api/generate",method="POST",status="200",mode="mock"}' in body
+    assert "jira_agent_uptime_seconds " in body
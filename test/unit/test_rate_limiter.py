@@ -0,0 +1,109 @@
+"""Tests for the shared OpenAI rate limiter."""
+
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+
+from src import ai_engine
+from src.rate_limiter import RateLimiter, parse_duration
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.slept: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _limiter(clock: _Clock, rpm: float = 60, tpm: float = 1_000_000) -> RateLimiter:
+    return RateLimiter(rpm, tpm, headroom=1.0, clock=clock, sleep=clock.sleep)
+
+
+def test_parse_duration_formats() -> None:
+    assert parse_duration("2") == 2.0
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("soon") is None
+
+
+def test_callers_queue_once_the_burst_is_spent() -> None:
+    clock = _Clock()
+    limiter = _limiter(clock)  # 1 request/sec, six-second burst
+
+    waits = [limiter._reserve(1) for _ in range(8)]
+
+    assert waits[:6] == [0.0] * 6
+    assert waits[6:] == pytest.approx([1.0, 2.0])  # queued in order, not all at once
+    stats = limiter.stats()
+    assert stats["waited"] == 2
+    assert stats["wait_time_sec"] == pytest.approx(3.0)
+
+
+def test_token_budget_is_corrected_by_real_usage() -> None:
+    clock = _Clock()
+    limiter = _limiter(clock, rpm=10_000, tpm=600)  # 10 tokens/sec, 60-token burst
+
+    assert limiter.acquire(60) == 0.0
+    limiter.settle(60, 10)  # the call only used 10 tokens
+    assert limiter.acquire(50) == 0.0
+    assert limiter.acquire(10) == pytest.approx(1.0)
+
+
+def test_rate_limited_pauses_everyone_and_halves_the_rate() -> None:
+    clock = _Clock()
+    limiter = _limiter(clock)
+
+    pause = limiter.on_rate_limited({"retry-after-ms": "1500"})
+
+    assert pause == 1.5
+    assert limiter.acquire(1) == pytest.approx(1.5)
+    assert limiter.stats()["requests_per_min"] == 30.0
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_headers_set_the_ceiling_and_successes_recover_the_rate() -> None:
+    clock = _Clock()
+    limiter = _limiter(clock)
+    limiter.on_rate_limited({"x-ratelimit-reset-requests": "2s"})
+
+    headers = {"x-ratelimit-limit-requests": "120", "x-ratelimit-remaining-requests": "119"}
+    for _ in range(40):
+        limiter.observe(headers)
+
+    assert limiter.stats()["requests_per_min"] == 120.0
+
+
+def test_request_json_waits_on_429_instead_of_backing_off(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = _Clock()
+    limiter = _limiter(clock)
+    calls = {"count": 0}
+
+    class RateLimited(Exception):
+        status_code = 429
+        response = SimpleNamespace(headers={"retry-after": "3"})
+
+    def create(**kwargs: Any) -> Any:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise RateLimited("slow down")
+        body = {"UserStories": [], "TestCases": []}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(body)))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai_engine, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(ai_engine.time, "sleep", lambda s: pytest.fail("fixed backoff used for a 429"))
+
+    assert ai_engine._request_json(client, "m", "prompt") == {"UserStories": [], "TestCases": []}
+    assert calls["count"] == 2
+    assert clock.slept == [pytest.approx(3.0)]
@@ -0,0 +1,95 @@
+"""Tests for the two-tier model response cache."""
+
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from typing import Any, Dict
+
+import pytest
+
+from src import ai_engine
+from src import response_cache
+from src.response_cache import ResponseCache, make_key
+
+
+def _key(epic_text: str = "Checkout", **overrides: Any) -> str:
+    params = dict(model="m", prompt_template="t", system_prompt="s", temperature=0.3, epic_text=epic_text)
+    params.update(overrides)
+    return make_key(**params)
+
+
+def test_key_covers_every_input() -> None:
+    base = _key()
+    assert base == _key()
+    assert base != _key(model="other")
+    assert base != _key(prompt_template="other")
+    assert base != _key(system_prompt="other")
+    assert base != _key(temperature=0.7)
+    assert base != _key(epic_text="Login")
+
+
+def test_memory_lru_evicts_oldest_and_disk_still_serves(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path), max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.set(_key(name), {"Epic": name})
+
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2
+    assert stats["evictions"] == 1
+
+    assert cache.get(_key("a")) == {"Epic": "a"}  # promoted back from disk
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["hits"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(response_cache.time, "time", lambda: clock["now"])
+    cache = ResponseCache(str(tmp_path), ttl_sec=10)
+    cache.set(_key(), {"Epic": "x"})
+
+    clock["now"] += 11
+
+    assert cache.get(_key()) is None
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["expired"] == 2  # memory copy and disk copy
+
+
+def test_disk_store_is_trimmed_to_size(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path), max_entries=1, max_disk_entries=10)
+    for i in range(12):
+        cache.set(_key(str(i)), {"Epic": str(i)})
+
+    on_disk = list(tmp_path.rglob("*.json"))
+    assert len(on_disk) <= 10
+    assert cache.stats()["disk_entries"] == len(on_disk)
+
+
+def test_generate_user_stories_reuses_cached_response(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = {"count": 0}
+    body: Dict[str, Any] = {
+        "UserStories": [{"title": "Pay", "description": "d", "story_points": 3,
+                         "acceptance_criteria": {"Given": "g", "When": "w", "Then": "t"}}],
+        "TestCases": [],
+    }
+
+    def create(**kwargs: Any) -> Any:
+        calls["count"] += 1
+        message = SimpleNamespace(content=json.dumps(body))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    cache = ResponseCache(str(tmp_path))
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: client)
+    monkeypatch.setattr(ai_engine, "get_response_cache", lambda: cache)
+
+    first = ai_engine.generate_user_stories("Checkout", "Checkout", epic_id="E1")
+    second = ai_engine.generate_user_stories("Checkout", "Checkout again", epic_id="E2")
+    ai_engine.generate_user_stories("Checkout", "Checkout", use_cache=False)
+
+    assert calls["count"] == 2
+    assert first["UserStories"] == second["UserStories"]
+    assert second["epic_id"] == "E2"
+    assert second["Epic"] == "Checkout again"
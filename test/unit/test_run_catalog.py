@@ -0,0 +1,111 @@
+"""Tests for the SQLite run catalogue behind the runs listings."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from src.backend.services.run_catalog import RunCatalog
+
+
+def _write_run(directory, run_id: str, project: str, mode: str, mtime: float) -> str:
+    path = os.path.join(directory, f"{run_id}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"run_id": run_id, "project_name": project, "mode": mode,
+                   "generated_at": "2025-01-01T00:00:00Z", "output": {"epics": [{}, {}]}}, f)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture()
+def catalog(tmp_path):
+    for i in range(5):
+        _write_run(tmp_path, f"run-{i}", "Shop" if i % 2 else "Bank", "mock" if i < 3 else "live", 1000 + i)
+    cat = RunCatalog(str(tmp_path))
+    yield cat
+    cat.close()
+
+
+def test_lists_newest_first_with_cursor_pagination(catalog) -> None:
+    first, cursor = catalog.list_runs(limit=2)
+    second, cursor2 = catalog.list_runs(limit=2, cursor=cursor)
+    third, cursor3 = catalog.list_runs(limit=2, cursor=cursor2)
+
+    assert [r["run_id"] for r in first + second + third] == [f"run-{i}" for i in (4, 3, 2, 1, 0)]
+    assert cursor3 is None
+    assert first[0]["epic_count"] == 2
+
+
+def test_filters_by_project_and_mode(catalog) -> None:
+    runs, _ = catalog.list_runs(project="Shop", mode="mock")
+
+    assert [r["run_id"] for r in runs] == ["run-1"]
+
+
+def test_picks_up_files_written_outside_the_catalogue(catalog, tmp_path) -> None:
+    catalog.list_runs()
+    _write_run(tmp_path, "run-new", "Shop", "mock", 2000)
+    os.remove(tmp_path / "run-0.json")
+    os.utime(tmp_path, None)
+
+    runs, _ = catalog.list_runs(limit=10)
+
+    ids = [r["run_id"] for r in runs]
+    assert ids[0] == "run-new"
+    assert "run-0" not in ids
+
+
+def test_sync_reindexes_rewritten_runs(catalog, tmp_path) -> None:
+    catalog.list_runs()
+    path = _write_run(tmp_path, "run-2", "Renamed project", "mock", 3000)
+
+    assert catalog.sync() == 1
+    assert catalog.sync() == 0  # unchanged files are not parsed again
+    runs, _ = catalog.list_runs(limit=1)
+    assert (runs[0]["run_id"], runs[0]["project_name"]) == ("run-2", "Renamed project")
+    assert os.path.getmtime(path) == 3000
+
+
+def test_older_catalogue_gains_file_size_column(tmp_path) -> None:
+    db = tmp_path / "catalog.sqlite3"
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE runs (run_id TEXT PRIMARY KEY, project_name TEXT, generated_at TEXT, "
+                     "mode TEXT, epic_count INTEGER, sort_key REAL NOT NULL)")
+    conn.close()
+    _write_run(tmp_path, "run-0", "Shop", "mock", 1000)
+
+    cat = RunCatalog(str(tmp_path))
+    try:
+        assert cat.sync() == 1
+        assert [r["run_id"] for r in cat.list_runs()[0]] == ["run-0"]
+    finally:
+        cat.close()
+
+
+def test_runs_page_caps_the_page_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("flask")
+    from src.backend.app import create_app
+    from src.backend.routes import ui
+
+    limits = []
+
+    class FakeCatalog:
+        def list_runs(self, limit, **kwargs):
+            limits.append(limit)
+            return [], None
+
+    monkeypatch.setattr(ui, "get_run_catalog", FakeCatalog)
+    client = create_app().test_client()
+
+    assert client.get("/runs?limit=100000").status_code == 200
+    assert client.get("/runs?limit=0").status_code == 200
+    assert limits == [200, 1]
+
+
+def test_rebuild_and_bad_cursor(catalog) -> None:
+    assert catalog.rebuild() == 5
+    with pytest.raises(ValueError):
+        catalog.list_runs(cursor="not-a-cursor")
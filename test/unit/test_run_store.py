@@ -0,0 +1,163 @@
+"""Tests for the shared run store (atomic writes, write-behind, read cache)."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from src.backend.services import runs
+from src.backend.services.run_catalog import RunCatalog
+from src.backend.services.runs import RunStore
+
+
+def _run(run_id: str = "r1", project: str = "Shop") -> dict:
+    return {"run_id": run_id, "project_name": project, "mode": "mock",
+            "output": {"epics": [{"epic_id": "E1", "Epic": "Cart", "UserStories": [], "TestCases": []}]}}
+
+
+@pytest.fixture()
+def catalog(tmp_path):
+    cat = RunCatalog(str(tmp_path))
+    yield cat
+    cat.close()
+
+
+def test_writes_compact_json_atomically_and_records_in_catalog(tmp_path, catalog) -> None:
+    store = RunStore(str(tmp_path), write_behind=False, catalog=catalog)
+    path = store.save(_run())
+
+    text = open(path, encoding="utf-8").read()
+    assert json.loads(text) == _run()
+    assert ", " not in text and "\n" not in text
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    rows, _ = catalog.list_runs()
+    assert [r["run_id"] for r in rows] == ["r1"]
+
+
+def test_gzip_round_trip_replaces_plain_file(tmp_path, catalog) -> None:
+    RunStore(str(tmp_path), write_behind=False, catalog=catalog).save(_run())
+    store = RunStore(str(tmp_path), compress=True, write_behind=False, catalog=catalog)
+    path = store.save(_run(project="Bank"))
+
+    assert path.endswith(".json.gz")
+    assert not (tmp_path / "r1.json").exists()
+    assert json.loads(gzip.decompress(open(path, "rb").read()))["project_name"] == "Bank"
+    assert RunStore(str(tmp_path), write_behind=False, catalog=catalog).load("r1")["project_name"] == "Bank"
+    assert catalog.rebuild() == 1
+
+
+def test_write_behind_serves_the_run_before_it_reaches_disk(tmp_path) -> None:
+    release = threading.Event()
+
+    class SlowCatalog:
+        def record(self, run, path):
+            release.wait(5)
+
+    store = RunStore(str(tmp_path), catalog=SlowCatalog())
+    store.save(_run())
+
+    assert store.exists("r1")
+    assert store.load("r1")["project_name"] == "Shop"
+
+    release.set()
+    store.flush(timeout=5)
+    assert json.loads((tmp_path / "r1.json").read_text(encoding="utf-8")) == _run()
+    store.close()
+
+
+def test_failed_write_stays_readable_and_is_retried_on_flush(tmp_path) -> None:
+    class FlakyCatalog:
+        def __init__(self):
+            self.calls = 0
+
+        def record(self, run, path):
+            self.calls += 1
+            if self.calls == 1:
+                raise OSError("disk full")
+
+    store = RunStore(str(tmp_path), catalog=FlakyCatalog())
+    store.save(_run())
+    deadline = time.time() + 5
+    while not store.stats()["write_errors"] and time.time() < deadline:
+        time.sleep(0.01)
+
+    stats = store.stats()
+    assert (stats["failed_runs"], stats["write_errors"], stats["last_error"]) == (1, 1, "disk full")
+    assert store.load("r1")["project_name"] == "Shop"
+
+    store.flush(timeout=5)  # retries it
+    assert store.stats()["failed_runs"] == 0
+    assert store.stats()["queued_writes"] == 0
+    store.close()
+
+
+def test_shared_store_is_closed_at_exit(tmp_path, monkeypatch) -> None:
+    registered = []
+    monkeypatch.setattr(runs, "_store", None)
+    monkeypatch.setattr(runs.Config, "EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(runs.atexit, "register", registered.append)
+
+    store = runs.get_run_store()
+
+    assert registered == [store.close]
+    store.close()
+
+
+def test_repeated_reads_are_served_from_cache_until_the_file_changes(tmp_path, catalog, monkeypatch) -> None:
+    RunStore(str(tmp_path), write_behind=False, catalog=catalog).save(_run())
+    store = RunStore(str(tmp_path), write_behind=False, catalog=catalog, cache_size=2)
+    reads = {"count": 0}
+    real_read = runs.read_run_file
+
+    def counting_read(path):
+        reads["count"] += 1
+        return real_read(path)
+
+    monkeypatch.setattr(runs, "read_run_file", counting_read)
+
+    for _ in range(3):
+        assert store.load("r1")["project_name"] == "Shop"
+    assert reads["count"] == 1
+
+    path = tmp_path / "r1.json"
+    path.write_text(json.dumps(_run(project="Edited")), encoding="utf-8")
+    os.utime(path, (os.path.getmtime(path) + 5,) * 2)
+    assert store.load("r1")["project_name"] == "Edited"
+    assert reads["count"] == 2
+
+
+def test_output_epics_are_streamed_from_the_file(tmp_path) -> None:
+    run = {"run_id": "big", "epics": [{"title": "input"}], "n": 12345,
+           "output": {"mode": "mock", "epics": [{"epic_id": f"E{i}", "text": "x" * 300} for i in range(40)]},
+           "validation": {"schema_passed": True}}
+    path = tmp_path / "big.json"
+    path.write_text(json.dumps(run, indent=2), encoding="utf-8")
+    legacy = tmp_path / "old.json.gz"
+    legacy.write_bytes(gzip.compress(json.dumps({"output": {"stories": [{"epic_id": "L1"}]}}).encode("utf-8")))
+
+    assert list(runs.iter_run_epics(str(path), chunk_size=16)) == run["output"]["epics"]
+    assert list(runs.iter_run_epics(str(legacy))) == [{"epic_id": "L1"}]
+    path.write_text('{"output": {"epics": [{"epic_id": "E1"},', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(runs.iter_run_epics(str(path)))
+
+
+def test_export_reads_do_not_fill_the_cache(tmp_path, catalog) -> None:
+    RunStore(str(tmp_path), write_behind=False, catalog=catalog).save(_run())
+    store = RunStore(str(tmp_path), write_behind=False, catalog=catalog)
+
+    assert [e["epic_id"] for e in store.iter_output_epics("r1")] == ["E1"]
+    assert store._cache == {}
+    assert store.iter_output_epics("missing") is None
+
+
+def test_unknown_or_unsafe_run_ids_are_not_found(tmp_path, catalog) -> None:
+    store = RunStore(str(tmp_path), write_behind=False, catalog=catalog)
+    assert store.load("missing") is None
+    assert store.path_for("../etc/passwd") is None
+    assert store.path_for(".hidden") is None
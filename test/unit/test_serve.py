@@ -0,0 +1,102 @@
+"""Tests for the production serve entry point."""
+
+from __future__ import annotations
+
+import logging
+import sys
+import types
+from typing import Any, Dict, List
+
+import pytest
+
+from src import ai_engine
+from src.backend import serve
+
+
+def test_gunicorn_options_follow_config(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(serve.Config, "SERVE_GRACEFUL_TIMEOUT_SEC", 45)
+
+    options = serve.gunicorn_options("0.0.0.0", 8000, workers=3, threads=6)
+
+    assert options["bind"] == "0.0.0.0:8000"
+    assert (options["workers"], options["threads"]) == (3, 6)
+    assert options["worker_class"] == "gthread"
+    assert options["preload_app"] is True
+    assert options["graceful_timeout"] == 45
+    assert callable(options["post_fork"]) and callable(options["worker_exit"])
+
+
+def test_default_is_one_worker_whatever_the_cpu_count(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(serve.os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(serve.Config, "SERVE_WORKERS", 0)
+    assert serve.default_workers() == 1
+
+    monkeypatch.setattr(serve.Config, "SERVE_WORKERS", 2)
+    assert serve.default_workers() == 2
+
+
+def _serve_main(monkeypatch: pytest.MonkeyPatch, argv: List[str]) -> Dict[str, Any]:
+    """Run ``serve.main`` up to the point gunicorn would start; returns its options."""
+    pytest.importorskip("flask")
+    from src.backend import app as app_module
+
+    started: Dict[str, Any] = {}
+    monkeypatch.setitem(sys.modules, "gunicorn", types.ModuleType("gunicorn"))
+    monkeypatch.setattr(app_module, "create_app", lambda: object())
+    monkeypatch.setattr(serve, "warm_up", lambda per_process=True: {})
+    monkeypatch.setattr(serve, "_run_gunicorn", lambda app, options: started.update(options))
+    assert serve.main(argv) == 0
+    return started
+
+
+def test_serves_one_worker_by_default_without_warning(monkeypatch: pytest.MonkeyPatch, caplog) -> None:
+    monkeypatch.setattr(serve.Config, "SERVE_WORKERS", 0)
+
+    with caplog.at_level(logging.WARNING):
+        options = _serve_main(monkeypatch, ["--threads", "16"])
+
+    assert (options["workers"], options["threads"]) == (1, 16)
+    assert not caplog.records
+
+
+def test_more_workers_warn_about_process_local_state(monkeypatch: pytest.MonkeyPatch, caplog) -> None:
+    with caplog.at_level(logging.WARNING):
+        options = _serve_main(monkeypatch, ["--workers", "3"])
+
+    assert options["workers"] == 3
+    message = caplog.records[-1].getMessage()
+    for state in ("jobs", "chat sessions", "run writes", "rate limiter", "circuit breaker"):
+        assert state in message
+    assert serve.multi_worker_warning(1) is None
+
+
+def test_master_warm_up_skips_per_process_objects(monkeypatch: pytest.MonkeyPatch) -> None:
+    created: List[str] = []
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: created.append("client"))
+
+    assert list(serve.warm_up(per_process=False)) == ["validators"]
+    assert created == []
+
+    assert set(serve.warm_up()) == {"validators", "model_client", "response_cache", "run_store"}
+    assert created == ["client"]
+
+
+def test_drain_waits_for_jobs_and_flushes_runs(monkeypatch: pytest.MonkeyPatch) -> None:
+    from src.backend.services import jobs, runs
+
+    calls: List[Any] = []
+
+    class _Jobs:
+        def shutdown(self, wait: bool = True) -> None:
+            calls.append(("jobs", wait))
+
+    class _Store:
+        def flush(self, timeout=None) -> None:
+            calls.append(("runs", timeout))
+
+    monkeypatch.setattr(jobs, "get_job_manager", lambda: _Jobs())
+    monkeypatch.setattr(runs, "get_run_store", lambda: _Store())
+
+    serve.drain(5)
+
+    assert calls == [("jobs", True), ("runs", 5)]
@@ -0,0 +1,33 @@
+"""Cold-import budget for the engine (see test/benchmarks/startup_budget.py)."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+_PATH = Path(__file__).resolve().parents[1] / "benchmarks" / "startup_budget.py"
+_spec = importlib.util.spec_from_file_location("startup_budget", _PATH)
+startup_budget = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(startup_budget)
+
+
+def test_parse_importtime_reads_depth_and_times() -> None:
+    rows = startup_budget.parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     json.decoder\n"
+        "import time:       300 |        420 |   json\n"
+        "import time:        80 |        500 | src.ai_engine\n"
+    )
+
+    assert [(r["module"], r["depth"], r["cumulative_us"]) for r in rows] == [
+        ("json.decoder", 2, 120), ("json", 1, 420), ("src.ai_engine", 0, 500),
+    ]
+
+
+def test_engine_imports_within_budget_without_heavy_dependencies() -> None:
+    # Generous ceiling for slow CI machines; the CLI default (300 ms) is the real budget.
+    report = startup_budget.check(["src.ai_engine"], budget_ms=2000, repeat=1)
+
+    result = report["results"][0]
+    assert result["lazy_violations"] == []
+    assert report["passed"], result
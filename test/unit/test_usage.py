@@ -0,0 +1,102 @@
+"""Tests for token usage and cost accounting."""
+
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from src import ai_engine, usage
+from src.usage import UsageTracker, estimate_cost, split_usage, summarise
+
+
+def _response(body: dict, prompt_tokens: int, completion_tokens: int) -> Any:
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(body)))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                              total_tokens=prompt_tokens + completion_tokens),
+    )
+
+
+def _story(title: str) -> dict:
+    return {"title": title, "description": "d", "story_points": 3,
+            "acceptance_criteria": {"Given": "g", "When": "w", "Then": "t"}}
+
+
+def test_cost_uses_longest_matching_price(monkeypatch: pytest.MonkeyPatch) -> None:
+    # gpt-4o-mini: $0.15 in / $0.60 out per 1M tokens, even for dated snapshots.
+    assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 1_000_000) == 0.75
+    assert estimate_cost("gpt-4o", 1_000_000, 0) == 2.5
+    assert estimate_cost("unknown-model", 10, 10) is None
+
+    monkeypatch.setattr(usage.Config, "MODEL_PRICES_JSON", '{"house-model": [1, 2]}')
+    assert estimate_cost("house-model", 1_000_000, 1_000_000) == 3.0
+
+
+def test_split_and_summarise() -> None:
+    shares = split_usage({"model": "gpt-4o", "calls": 1, "prompt_tokens": 10, "completion_tokens": 5,
+                          "total_tokens": 15, "cost_usd": 0.3}, 3)
+    assert [s["prompt_tokens"] for s in shares] == [4, 3, 3]
+    assert [s["calls"] for s in shares] == [1, 0, 0]
+    assert sum(s["total_tokens"] for s in shares) == 15
+
+    total = summarise(shares + [usage.empty_usage("gpt-4o", cached=True), None])
+    assert total["prompt_tokens"] == 10 and total["completion_tokens"] == 5
+    assert total["epics"] == 4 and total["cached_epics"] == 1
+    assert total["calls"] == 1
+    assert total["by_model"]["gpt-4o"]["calls"] == 1
+    assert total["cost_usd"] == pytest.approx(0.3)
+
+
+def test_tracker_window_drops_old_calls() -> None:
+    clock = {"now": 1000.0}
+    tracker = UsageTracker(window_sec=60, clock=lambda: clock["now"])
+    tracker.record("gpt-4o-mini", 100, 50, 0.001)
+    clock["now"] += 61
+    tracker.record("gpt-4o-mini", 10, 5, None)
+
+    snap = tracker.snapshot()
+    assert snap["window"] == {"calls": 1, "prompt_tokens": 10, "completion_tokens": 5, "cost_usd": 0.0}
+    assert snap["lifetime"]["calls"] == 2
+    assert snap["lifetime"]["prompt_tokens"] == 110
+
+
+def test_generation_reports_usage_per_epic_and_for_cache_hits(monkeypatch: pytest.MonkeyPatch) -> None:
+    replies = [
+        _response({"Epics": {"E1": {"UserStories": [_story("Cart")], "TestCases": []},
+                             "E2": {"UserStories": [_story("Pay")], "TestCases": []}}}, 300, 100),
+        _response({"UserStories": [_story("Search")], "TestCases": []}, 120, 80),
+    ]
+
+    def create(**kwargs: Any) -> Any:
+        return replies.pop(0)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: client)
+    monkeypatch.setattr(ai_engine, "get_response_cache", lambda: None)
+    monkeypatch.setattr(ai_engine, "get_rate_limiter", lambda: None)
+    monkeypatch.setenv("OPENAI_MODEL", "gpt-4o-mini")
+
+    batch = ai_engine.generate_user_stories_batch([
+        {"epic_text": "cart", "epic_title": "Cart", "epic_id": "E1", "epic_description": "x"},
+        {"epic_text": "pay", "epic_title": "Pay", "epic_id": "E2", "epic_description": "x"},
+    ])
+    single = ai_engine.generate_user_stories("search", "Search", epic_id="E3")
+
+    assert [r["usage"]["prompt_tokens"] for r in batch] == [150, 150]
+    assert batch[0]["usage"]["batched_with"] == 2
+    assert single["usage"]["total_tokens"] == 200
+    assert single["usage"]["calls"] == 1
+    assert single["usage"]["cost_usd"] == pytest.approx((120 * 0.15 + 80 * 0.60) / 1_000_000)
+    totals = summarise(r["usage"] for r in batch + [single])
+    assert totals["total_tokens"] == 600
+    assert totals["calls"] == 2  # one batched call plus one single call
+
+
+def test_mock_output_reports_zero_usage(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ai_engine, "_initialise_client", lambda: None)
+    result = ai_engine.generate_user_stories("Checkout", "Checkout")
+    assert result["usage"]["model"] == "mock"
+    assert result["usage"]["total_tokens"] == 0
@@ -61,4 +61,39 @@ def test_validate_output_handles_non_list_input() -> None:
     is_valid, errors = validators.validate_output(_valid_epic())
 
     assert is_valid
-    assert errors == []
\ No newline at end of file
+    assert errors == []
+
+
+def test_validate_output_collect_all_reports_every_epic() -> None:
+    first = _valid_epic()
+    first["UserStories"][0].pop("title")
+    second = _valid_epic()
+    second["TestCases"][0].pop("expected_result")
+
+    is_valid, errors = validators.validate_output([first, second], collect_all=True)
+
+    assert not is_valid
+    assert len(errors) == 2
+    assert "[0, 'UserStories', 0]" in errors[0]
+    assert "[1, 'TestCases', 0]" in errors[1]
+
+
+def test_validate_epics_groups_errors_per_epic() -> None:
+    broken = _valid_epic()
+    broken.pop("Epic")
+
+    per_epic = validators.validate_epics([_valid_epic(), broken])
+
+    assert per_epic[0] == []
+    assert any("missing field 'Epic'" in err for err in per_epic[1])
+
+
+def test_compiled_validator_is_reused_until_schema_changes(monkeypatch) -> None:
+    first = validators.get_validator()
+    assert validators.get_validator() is first
+
+    monkeypatch.setattr(validators, "_schema_mtimes", lambda: (0, 0, 0))
+
+    rebuilt = validators.get_validator()
+    assert rebuilt is not first
+    assert validators.get_validator() is rebuilt